@@ -18,6 +18,7 @@
 #########################################################################
 import json
 from slugify import slugify
+from functools import partial
 from urllib.parse import urljoin
 
 from django.db.models import Q
@@ -39,6 +40,7 @@ from avatar.templatetags.avatar_tags import avatar_url
 from geonode.favorite.models import Favorite
 from geonode.base.models import (
     Link,
+    ContactRole,
     ResourceBase,
     HierarchicalKeyword,
     Region,
@@ -55,7 +57,8 @@ from geonode.groups.models import (
     GroupProfile)
 
 from geonode.utils import build_absolute_uri
-from geonode.security.utils import get_resources_with_perms
+from geonode.base.utils import get_resources_counts
+from geonode.security.utils import get_resources_with_perms, get_user_perms_for_objects
 from geonode.resource.models import ExecutionRequest
 
 import logging
@@ -79,41 +82,97 @@ class BaseDynamicModelSerializer(DynamicModelSerializer):
         return data
 
 
+def _get_resources_perms(user, resources):
+    perms = get_user_perms_for_objects(
+        user, list(resources) + [_resource.get_self_resource() for _resource in resources])
+    return {
+        _resource.pk: list(perms[_index].union(perms[_index + len(resources)]))
+        for _index, _resource in enumerate(resources)
+    }
+
+
+def _get_resources_favorites(user, resources):
+    return set(Favorite.objects.filter(
+        user=user, object_id__in=[_resource.pk for _resource in resources]).values_list('object_id', flat=True))
+
+
+def _get_resources_links(resources):
+    link_fields = [
+        'extension',
+        'link_type',
+        'name',
+        'mime',
+        'url'
+    ]
+    links = {}
+    for lnk in Link.objects.filter(
+            resource_id__in=[_resource.pk for _resource in resources],
+            link_type__in=['OGC:WMS', 'OGC:WFS', 'OGC:WCS', 'image', 'metadata']):
+        links.setdefault(lnk.resource_id, []).append(model_to_dict(lnk, fields=link_fields))
+    return links
+
+
+def _get_resources_contacts(resources):
+    roles = {
+        'pointOfContact': 'poc',
+        'author': 'metadata_author'
+    }
+    contacts = {}
+    for contact_role in ContactRole.objects.filter(
+            resource_id__in=[_resource.pk for _resource in resources],
+            role__in=list(roles.keys())).select_related('contact'):
+        contacts.setdefault(contact_role.resource_id, {})[roles[contact_role.role]] = contact_role.contact
+    return contacts
+
+
 class ResourceBaseToRepresentationSerializerMixin(DynamicModelSerializer):
 
+    def get_page_data(self, key, instance, loader):
+        """
+        Returns the data computed by 'loader' for the whole page the 'instance' belongs to,
+        so that it is computed once with a bounded number of queries and shared by all the page items.
+        """
+        parent = self.parent
+        page = getattr(parent, 'instance', None) if isinstance(parent, serializers.ListSerializer) else None
+        if page is None:
+            return loader([instance])
+        page_data = parent.__dict__.setdefault('_page_data', {})
+        if key not in page_data:
+            page_data[key] = loader(list(page))
+        return page_data[key]
+
     def to_representation(self, instance):
         request = self.context.get('request')
         data = super(ResourceBaseToRepresentationSerializerMixin, self).to_representation(instance)
         if request:
-            data['perms'] = instance.get_user_perms(request.user).union(
-                instance.get_self_resource().get_user_perms(request.user)
-            )
+            data['perms'] = self.get_page_data(
+                'perms', instance, partial(_get_resources_perms, request.user)).get(instance.pk, [])
             if not request.user.is_anonymous and getattr(settings, "FAVORITE_ENABLED", False):
-                favorite = Favorite.objects.filter(user=request.user, object_id=instance.pk).count()
-                data['favorite'] = favorite > 0
+                data['favorite'] = instance.pk in self.get_page_data(
+                    'favorites', instance, partial(_get_resources_favorites, request.user))
         # Adding links to resource_base api
         obj_id = data.get('pk', None)
         if obj_id:
-            dehydrated = []
-            link_fields = [
-                'extension',
-                'link_type',
-                'name',
-                'mime',
-                'url'
-            ]
-
-            links = Link.objects.filter(
-                resource_id=int(obj_id),
-                link_type__in=['OGC:WMS', 'OGC:WFS', 'OGC:WCS', 'image', 'metadata']
-            )
-            for lnk in links:
-                formatted_link = model_to_dict(lnk, fields=link_fields)
-                dehydrated.append(formatted_link)
+            dehydrated = self.get_page_data('links', instance, _get_resources_links).get(int(obj_id), [])
             if len(dehydrated) > 0:
                 data['links'] = dehydrated
         return data
 
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields):
+        """
+        Plans the eager loading of the relations needed to represent the given 'fields'
+        of a list of resources.
+        """
+        select_related = [
+            _name for _name in (
+                'owner', 'group', 'category', 'license', 'restriction_code_type', 'spatial_representation_type')
+            if _name in fields
+        ]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        return queryset
+
 
 class ResourceBaseTypesSerializer(DynamicEphemeralSerializer):
     name = serializers.CharField()
@@ -348,7 +407,10 @@ class ContactRoleField(DynamicComputedField):
         super().__init__(**kwargs)
 
     def get_attribute(self, instance):
-        return getattr(instance, self.contat_type)
+        get_page_data = getattr(self.parent, 'get_page_data', None)
+        if get_page_data is None:
+            return getattr(instance, self.contat_type)
+        return get_page_data('contacts', instance, _get_resources_contacts).get(instance.pk, {}).get(self.contat_type)
 
     def to_representation(self, value):
         return UserSerializer(embed=True, many=False).to_representation(value)
@@ -606,7 +668,11 @@ class FavoriteSerializer(DynamicModelSerializer):
 
 class BaseResourceCountSerializer(BaseDynamicModelSerializer):
 
-    def to_representation(self, instance):
+    def get_resources_counts(self, instance):
+        """
+        Returns the resources counts of the whole page the 'instance' belongs to,
+        computed once with a single grouped query and shared by all the page items.
+        """
         request = self.context.get('request')
         filter_options = {}
         if request.query_params:
@@ -614,12 +680,23 @@ class BaseResourceCountSerializer(BaseDynamicModelSerializer):
                 'type_filter': request.query_params.get('type'),
                 'title_filter': request.query_params.get('title__icontains')
             }
+        parent = self.parent
+        page = getattr(parent, 'instance', None) if isinstance(parent, serializers.ListSerializer) else None
+        if page is None:
+            return get_resources_counts(
+                get_resources_with_perms(request.user, filter_options), self.Meta.count_type, values=[instance.pk])
+        if getattr(parent, '_resources_counts', None) is None:
+            parent._resources_counts = get_resources_counts(
+                get_resources_with_perms(request.user, filter_options),
+                self.Meta.count_type,
+                values=[_item.pk for _item in page])
+        return parent._resources_counts
+
+    def to_representation(self, instance):
         data = super().to_representation(instance)
         if not isinstance(data, int):
             try:
-                count_filter = {self.Meta.count_type: instance}
-                data['count'] = get_resources_with_perms(
-                    request.user, filter_options).filter(**count_filter).count()
+                data['count'] = self.get_resources_counts(instance).get(instance.pk, 0)
             except (TypeError, NoReverseMatch) as e:
                 logger.exception(e)
         return data
@@ -32,6 +32,8 @@ from unittest.mock import patch
 from urllib.parse import urljoin
 
 from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth.models import Group
 from django.contrib.auth import get_user_model
@@ -1590,6 +1592,53 @@ class BaseApiTests(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['total'], 8)
 
+    def test_regions_list_counts(self):
+        """
+        Ensure the regions counts are computed in a single grouped query per page.
+        """
+        url = reverse('regions-list')
+        self.assertTrue(self.client.login(username='bobby', password='bob'))
+        response = self.client.get(f"{url}?page_size=50", format='json')
+        self.assertEqual(response.status_code, 200)
+
+        bobby = get_user_model().objects.get(username='bobby')
+        for region in response.data['regions']:
+            self.assertEqual(
+                region['count'],
+                get_resources_with_perms(bobby).filter(regions__id=region['id']).count())
+
+        with self.assertNumQueries(self._count_queries(f"{url}?page_size=10")):
+            self.client.get(f"{url}?page_size=50", format='json')
+
+    def test_base_resources_list_queries(self):
+        """
+        Ensure the number of queries listing the resources does not depend on the page size.
+        """
+        url = reverse('base-resources-list')
+        self.assertTrue(self.client.login(username='bobby', password='bob'))
+        response = self.client.get(f"{url}?filter{{resource_type}}=document&page_size=9", format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['resources']), 9)
+
+        bobby = get_user_model().objects.get(username='bobby')
+        for resource in response.data['resources']:
+            _resource = ResourceBase.objects.get(pk=resource['pk']).get_real_instance()
+            self.assertSetEqual(
+                set(resource['perms']),
+                set(_resource.get_user_perms(bobby).union(_resource.get_self_resource().get_user_perms(bobby))))
+
+        with self.assertNumQueries(self._count_queries(f"{url}?filter{{resource_type}}=document&page_size=3")):
+            self.client.get(f"{url}?filter{{resource_type}}=document&page_size=9", format='json')
+
+        with self.settings(DEBUG=True):
+            response = self.client.get(f"{url}?filter{{resource_type}}=document&page_size=3", format='json')
+            self.assertTrue(int(response['X-Query-Count']) > 0)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url, format='json')
+        return len(context.captured_queries)
+
     def test_keywords_list(self):
         """
         Ensure we can access the list of keywords.
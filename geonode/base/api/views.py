@@ -28,13 +28,14 @@ from PIL import Image
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import URLValidator
-from django.db import models
+from django.db import models, connection
 from django.http import HttpResponseForbidden
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.conf import settings
 from django.db.models import Subquery
 from django.http.request import QueryDict
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 
 from drf_spectacular.utils import extend_schema
@@ -303,6 +304,23 @@ class ResourceBaseViewSet(DynamicModelViewSet):
     serializer_class = ResourceBaseSerializer
     pagination_class = GeoNodeApiPagination
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # plan the eager loading of the relations needed by the requested fields
+            serializer = self.get_serializer()
+            queryset = self.serializer_class.setup_eager_loading(
+                queryset, getattr(serializer, 'child', serializer).fields)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if not settings.DEBUG:
+            return super().list(request, *args, **kwargs)
+        with CaptureQueriesContext(connection) as queries:
+            response = super().list(request, *args, **kwargs)
+        response['X-Query-Count'] = len(queries)
+        return response
+
     def _filtered(self, request, filter):
         paginator = GeoNodeApiPagination()
         paginator.page_size = request.GET.get('page_size', 10)
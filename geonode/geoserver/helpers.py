@@ -23,6 +23,7 @@ import time
 import uuid
 import json
 import errno
+import hashlib
 import typing
 import logging
 import datetime
@@ -80,6 +81,7 @@ from geonode.utils import (
     set_resource_default_links)
 
 from .security import set_geowebcache_invalidate_cache
+from .models import CatalogResourceFingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -609,12 +611,18 @@ def gs_slurp(
         skip_geonode_registered=False,
         remove_deleted=False,
         permissions=None,
-        execute_signals=False):
+        execute_signals=False,
+        incremental=False,
+        batch_size=None):
     """Configure the layers available in GeoServer in GeoNode.
        It returns a list of dictionaries with the name of the layer,
        the result of the operation and the errors and traceback if it failed.
+
+       When 'incremental' is set, only the resources which are not registered in GeoNode
+       or whose fingerprint changed since the last synchronization are processed.
+       When 'batch_size' is set, the resources are processed asynchronously by the
+       Celery workers, in batches of 'batch_size' resources.
     """
-    from geonode.resource.manager import resource_manager
 
     if console is None:
         console = open(os.devnull, 'w')
@@ -689,7 +697,7 @@ def gs_slurp(
                 raise
 
     # filter out layers already registered in geonode
-    dataset_names = Dataset.objects.all().values_list('alternate', flat=True)
+    dataset_names = set(Dataset.objects.values_list('alternate', flat=True))
     if skip_geonode_registered:
         try:
             resources = [k for k in resources
@@ -704,67 +712,85 @@ def gs_slurp(
     # i.e. look for matching layers in GeoNode and also disable?
     # disabled_resources = [k for k in resources if k.enabled == "false"]
 
-    number = len(resources)
-    if verbosity > 0:
-        msg = "Found %d layers, starting processing" % number
-        print(msg, file=console)
     output = {
         'stats': {
             'failed': 0,
             'updated': 0,
             'created': 0,
             'deleted': 0,
+            'unchanged': 0,
+            'dispatched': 0,
         },
         'layers': [],
         'deleted_datasets': []
     }
     start = datetime.datetime.now(timezone.get_current_timezone())
+
+    # compute the fingerprints of the resources, and skip the unchanged ones
+    fingerprints = {}
+    if incremental:
+        _resources = []
+        stored_fingerprints = _get_catalog_fingerprints()
+        for k in resources:
+            try:
+                alternate = f'{k.workspace.name}:{k.name}'
+                fingerprints[alternate] = get_catalog_resource_fingerprint(k)
+            except Exception:
+                if ignore_errors:
+                    _resources.append(k)
+                    continue
+                else:
+                    raise
+            if alternate in dataset_names and stored_fingerprints.get(alternate) == fingerprints[alternate]:
+                output['stats']['unchanged'] += 1
+            else:
+                _resources.append(k)
+        resources = _resources
+
+    number = len(resources)
+    if verbosity > 0:
+        if incremental:
+            msg = "Found %d added or changed layers (%d unchanged), starting processing" % (
+                number, output['stats']['unchanged'])
+        else:
+            msg = "Found %d layers, starting processing" % number
+        print(msg, file=console)
+
+    if batch_size and number:
+        from celery import chord
+        from geonode.geoserver.tasks import (
+            geoserver_slurp_resources,
+            geoserver_slurp_summary)
+
+        _keys = [
+            (k.workspace.name, k.store.name, k.name, fingerprints.get(f'{k.workspace.name}:{k.name}'))
+            for k in resources
+        ]
+        batches = [
+            geoserver_slurp_resources.signature(
+                args=(_keys[i:i + batch_size], ),
+                kwargs={
+                    'owner_id': owner.pk if owner else None,
+                    'permissions': permissions,
+                    'execute_signals': execute_signals
+                })
+            for i in range(0, number, batch_size)
+        ]
+        chord(batches, body=geoserver_slurp_summary.signature()).apply_async()
+        output['stats']['dispatched'] = number
+        if verbosity > 0:
+            print(f"Dispatched {len(batches)} batches of layers to the workers", file=console)
+        resources = []
+
     for i, resource in enumerate(resources):
         name = resource.name
-        the_store = resource.store
-        workspace = the_store.workspace
         try:
-            created = False
-            layer = Dataset.objects.filter(name=name, workspace=workspace.name).first()
-            if not layer:
-                layer = resource_manager.create(
-                    str(uuid.uuid4()),
-                    resource_type=Dataset,
-                    defaults=dict(
-                        name=name,
-                        workspace=workspace.name,
-                        store=the_store.name,
-                        subtype=get_dataset_storetype(the_store.resource_type),
-                        alternate=f"{workspace.name}:{resource.name}",
-                        title=resource.title or _('No title provided'),
-                        abstract=resource.abstract or _('No abstract provided'),
-                        owner=owner
-                    )
-                )
-                created = True
-
-            # sync permissions in GeoFence
-            perm_spec = json.loads(_perms_info_json(layer))
-            resource_manager.set_permissions(
-                layer.uuid,
-                permissions=perm_spec)
-
-            # recalculate the layer statistics
-            set_attributes_from_geoserver(layer, overwrite=True)
-
-            # in some cases we need to explicitily save the resource to execute the signals
-            # (for sure when running updatelayers)
-            resource_manager.update(
-                layer.uuid,
-                instance=layer,
-                notify=execute_signals)
-
-            # Creating the Thumbnail
-            resource_manager.set_thumbnail(
-                layer.uuid,
-                overwrite=True, check_bbox=False
-            )
-
+            layer, created = sync_catalog_resource(
+                resource,
+                owner=owner,
+                permissions=permissions,
+                execute_signals=execute_signals,
+                fingerprint=fingerprints.get(f'{resource.workspace.name}:{name}'))
         except Exception as e:
             if ignore_errors:
                 status = 'failed'
@@ -777,11 +803,6 @@ def gs_slurp(
 
         else:
             if created:
-                if not permissions:
-                    layer.set_default_permissions()
-                else:
-                    layer.set_permissions(permissions)
-
                 status = 'created'
                 output['stats']['created'] += 1
             else:
@@ -824,25 +845,17 @@ def gs_slurp(
         # add any layers not found in GeoServer to deleted_datasets (must match
         # workspace and store as well):
         deleted_datasets = []
+        geoserver_datasets = {
+            (resource.name, resource.workspace.name, resource.store.name)
+            for resource in resources_for_delete_compare
+        }
         for layer in q:
             logger.debug(
                 "GeoNode Dataset info: name: %s, workspace: %s, store: %s",
                 layer.name,
                 layer.workspace,
                 layer.store)
-            dataset_found_in_geoserver = False
-            for resource in resources_for_delete_compare:
-                # if layer.name matches a GeoServer resource, check also that
-                # workspace and store match, mark valid:
-                if layer.name == resource.name:
-                    if layer.workspace == resource.workspace.name and layer.store == resource.store.name:
-                        logger.debug(
-                            "Matches GeoServer layer: name: %s, workspace: %s, store: %s",
-                            resource.name,
-                            resource.workspace.name,
-                            resource.store.name)
-                        dataset_found_in_geoserver = True
-            if not dataset_found_in_geoserver:
+            if (layer.name, layer.workspace, layer.store) not in geoserver_datasets:
                 logger.debug(
                     "----- Dataset %s not matched, marked for deletion ---------------",
                     layer.name)
@@ -871,6 +884,7 @@ def gs_slurp(
                     object_id=layer.id).delete()
                 layer.keywords.clear()
 
+                CatalogResourceFingerprint.objects.filter(alternate=layer.alternate).delete()
                 layer.delete()
                 output['stats']['deleted'] += 1
                 status = "delete_succeeded"
@@ -895,6 +909,137 @@ def gs_slurp(
     return output
 
 
+def get_catalog_resource_fingerprint(resource):
+    """Returns a fingerprint of the GeoServer catalog resource, changing whenever
+       any of the resource properties synchronized by GeoNode changes.
+    """
+    def _text(tag):
+        try:
+            _node = resource.dom.find(tag) if resource.dom is not None else None
+            return _node.text if _node is not None else None
+        except Exception:
+            return None
+
+    properties = {
+        'store': resource.store.name,
+        'title': resource.title,
+        'abstract': resource.abstract,
+        'keywords': resource.keywords,
+        'enabled': str(resource.enabled),
+        'advertised': str(resource.advertised),
+        'projection': resource.projection,
+        'native_bbox': resource.native_bbox,
+        'latlon_bbox': resource.latlon_bbox,
+        'dateModified': _text('dateModified'),
+    }
+    return hashlib.md5(json.dumps(properties, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _get_catalog_fingerprints():
+    return dict(CatalogResourceFingerprint.objects.values_list('alternate', 'fingerprint'))
+
+
+def sync_catalog_resource(resource, owner=None, permissions=None, execute_signals=False, fingerprint=None):
+    """Creates or updates the GeoNode Dataset of a GeoServer catalog resource, and
+       stores the resource fingerprint once synchronized.
+       It returns the Dataset and whether it has been created.
+    """
+    from geonode.resource.manager import resource_manager
+
+    name = resource.name
+    the_store = resource.store
+    workspace = the_store.workspace
+
+    created = False
+    layer = Dataset.objects.filter(name=name, workspace=workspace.name).first()
+    if not layer:
+        layer = resource_manager.create(
+            str(uuid.uuid4()),
+            resource_type=Dataset,
+            defaults=dict(
+                name=name,
+                workspace=workspace.name,
+                store=the_store.name,
+                subtype=get_dataset_storetype(the_store.resource_type),
+                alternate=f"{workspace.name}:{resource.name}",
+                title=resource.title or _('No title provided'),
+                abstract=resource.abstract or _('No abstract provided'),
+                owner=owner
+            )
+        )
+        created = True
+
+    # sync permissions in GeoFence
+    perm_spec = json.loads(_perms_info_json(layer))
+    resource_manager.set_permissions(
+        layer.uuid,
+        permissions=perm_spec)
+
+    # recalculate the layer statistics
+    set_attributes_from_geoserver(layer, overwrite=True)
+
+    # in some cases we need to explicitily save the resource to execute the signals
+    # (for sure when running updatelayers)
+    resource_manager.update(
+        layer.uuid,
+        instance=layer,
+        notify=execute_signals)
+
+    # Creating the Thumbnail
+    resource_manager.set_thumbnail(
+        layer.uuid,
+        overwrite=True, check_bbox=False
+    )
+
+    if created:
+        if not permissions:
+            layer.set_default_permissions()
+        else:
+            layer.set_permissions(permissions)
+
+    if fingerprint:
+        CatalogResourceFingerprint.objects.update_or_create(
+            alternate=f"{workspace.name}:{name}",
+            defaults=dict(
+                workspace=workspace.name,
+                store=the_store.name,
+                fingerprint=fingerprint
+            )
+        )
+    return layer, created
+
+
+def sync_catalog_resources(resources, owner=None, permissions=None, execute_signals=False):
+    """Synchronizes a batch of GeoServer catalog resources, identified by
+       (workspace, store, name, fingerprint) tuples.
+       It returns the statistics of the batch.
+    """
+    stats = {
+        'failed': 0,
+        'updated': 0,
+        'created': 0,
+        'errors': {},
+    }
+    for workspace, store, name, fingerprint in resources:
+        try:
+            resource = gs_catalog.get_resource(name=name, store=store, workspace=workspace)
+            if resource is None:
+                raise Exception(f"Resource {workspace}:{name} not found in the catalog")
+            layer, created = sync_catalog_resource(
+                resource,
+                owner=owner,
+                permissions=permissions,
+                execute_signals=execute_signals,
+                fingerprint=fingerprint)
+        except Exception as e:
+            logger.exception(e)
+            stats['failed'] += 1
+            stats['errors'][f"{workspace}:{name}"] = str(e)
+        else:
+            stats['created' if created else 'updated'] += 1
+    return stats
+
+
 def get_stores(store_type=None):
     cat = gs_catalog
     stores = cat.get_stores()
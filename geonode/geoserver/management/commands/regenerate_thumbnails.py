@@ -0,0 +1,134 @@
+#########################################################################
+#
+# Copyright (C) 2022 OSGeo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#########################################################################
+
+import time
+
+from celery import chord
+
+from django.db.models import Q
+from django.core.management.base import BaseCommand
+
+from geonode.base.models import ResourceBase
+from geonode.thumbs.utils import chunked_ids
+from geonode.thumbs.thumbnails import create_thumbnails, merge_thumbnails_stats
+from geonode.geoserver.tasks import (
+    geoserver_create_thumbnails_batch,
+    geoserver_create_thumbnails_summary)
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the thumbnails of Datasets and Maps in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-t',
+            '--type',
+            dest='resource_type',
+            choices=['dataset', 'map'],
+            default=None,
+            help='Only regenerate the thumbnails of the given resource type.')
+        parser.add_argument(
+            '-f',
+            '--filter',
+            dest='filter',
+            default=None,
+            help='Only regenerate the thumbnails of the resources whose title matches the given filter.')
+        parser.add_argument(
+            '-u',
+            '--username',
+            dest='username',
+            default=None,
+            help='Only regenerate the thumbnails of the resources owned by the specified username.')
+        parser.add_argument(
+            '-c',
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=100,
+            help='Number of resources processed by each batch.')
+        parser.add_argument(
+            '--skip-existing',
+            action='store_true',
+            dest='skip_existing',
+            default=False,
+            help='Do not overwrite existing thumbnails.')
+        parser.add_argument(
+            '--background-zoom',
+            dest='background_zoom',
+            type=int,
+            default=None,
+            help='Zoom level of the thumbnails background.')
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='async',
+            default=False,
+            help='Dispatch the batches to the Celery workers, a summary is logged by the workers once all of them '
+                 'have been processed.')
+
+    def handle(self, **options):
+        resources = ResourceBase.objects.filter(
+            Q(polymorphic_ctype__model='dataset') | Q(polymorphic_ctype__model='map'))
+        if options.get('resource_type'):
+            resources = resources.filter(polymorphic_ctype__model=options['resource_type'])
+        if options.get('filter'):
+            resources = resources.filter(title__icontains=options['filter'])
+        if options.get('username'):
+            resources = resources.filter(owner__username=options['username'])
+
+        chunk_size = max(options.get('chunk_size') or 100, 1)
+        overwrite = not options.get('skip_existing')
+        background_zoom = options.get('background_zoom')
+        total = resources.count()
+        started_at = time.time()
+
+        if options.get('async'):
+            batches = [
+                geoserver_create_thumbnails_batch.signature(
+                    args=(ids, ),
+                    kwargs={'overwrite': overwrite, 'background_zoom': background_zoom})
+                for ids in chunked_ids(resources, chunk_size)
+            ]
+            if not batches:
+                print("No resources found, nothing to do.")
+                return
+            summary = geoserver_create_thumbnails_summary.signature(
+                kwargs={'started_at': started_at})
+            chord(batches, body=summary).apply_async()
+            print(f"Dispatched {len(batches)} batches for {total} resources.")
+            return
+
+        results = []
+        for ids in chunked_ids(resources, chunk_size):
+            result = create_thumbnails(ids, overwrite=overwrite, background_zoom=background_zoom)
+            results.append(result)
+            progress = merge_thumbnails_stats(results)
+            elapsed = time.time() - started_at
+            print(
+                f"Processed {progress['processed']}/{total} resources "
+                f"({progress['processed'] / elapsed if elapsed else 0:.2f} resources/s), "
+                f"{progress['failed']} failed")
+
+        summary = merge_thumbnails_stats(results)
+        elapsed = time.time() - started_at
+        print(
+            f"Regenerated {summary['generated']} thumbnails ({summary['reused']} reused renderings), "
+            f"{summary['skipped']} skipped and {summary['failed']} failed in {elapsed:.2f}s.")
+        for resource_id, error in summary['errors'].items():
+            print(f"Resource {resource_id}: {error}")
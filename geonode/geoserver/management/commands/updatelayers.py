@@ -78,6 +78,18 @@ class Command(BaseCommand):
             dest="workspace",
             default=None,
             help="Only update data on specified workspace"),
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            dest='incremental',
+            default=False,
+            help='Only process the layers added or changed in GeoServer since the last synchronization.'),
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=None,
+            help='Process the layers asynchronously on the Celery workers, in batches of the given size.'),
         parser.add_argument(
             '-p',
             '--permissions',
@@ -96,6 +108,8 @@ class Command(BaseCommand):
         workspace = options.get('workspace')
         filter = options.get('filter')
         store = options.get('store')
+        incremental = options.get('incremental')
+        batch_size = options.get('batch_size')
         if not options.get('permissions'):
             permissions = None
         else:
@@ -118,7 +132,9 @@ class Command(BaseCommand):
             skip_geonode_registered=skip_geonode_registered,
             remove_deleted=remove_deleted,
             permissions=permissions,
-            execute_signals=True)
+            execute_signals=True,
+            incremental=incremental,
+            batch_size=batch_size)
 
         if verbosity > 1:
             print("\nDetailed report of failures:")
@@ -145,6 +161,10 @@ class Command(BaseCommand):
             print(f"{output['stats']['created']} Created layers")
             print(f"{output['stats']['updated']} Updated layers")
             print(f"{output['stats']['failed']} Failed layers")
+            if incremental:
+                print(f"{output['stats']['unchanged']} Unchanged layers")
+            if batch_size:
+                print(f"{output['stats']['dispatched']} Layers dispatched to the workers")
             try:
                 duration_dataset = round(
                     output['stats']['duration_sec'] * 1.0 / len(output['layers']), 2)
@@ -71,7 +71,8 @@ from .security import (
     get_user_geolimits,
     toggle_dataset_cache,
     purge_geofence_dataset_rules,
-    sync_geofence_with_guardian,
+    get_geofence_rules_for_perms,
+    sync_geofence_rules,
     set_geofence_invalidate_cache
 )
 logger = logging.getLogger(__name__)
@@ -408,11 +409,9 @@ class GeoServerResourceManager(ResourceManagerInterface):
                 if settings.OGC_SERVER['default'].get("GEOFENCE_SECURITY_ENABLED", False):
                     if not getattr(settings, 'DELAYED_SECURITY_SIGNALS', False):
                         _disable_cache = []
+                        _rules = []
                         _owner = owner or instance.owner
                         if permissions is not None and len(permissions):
-                            if not created:
-                                purge_geofence_dataset_rules(instance.get_self_resource())
-
                             # Owner
                             perms = [
                                 "view_resourcebase",
@@ -421,7 +420,7 @@ class GeoServerResourceManager(ResourceManagerInterface):
                                 "change_resourcebase",
                                 "change_resourcebase_permissions",
                                 "download_resourcebase"]
-                            sync_geofence_with_guardian(instance, perms, user=_owner)
+                            _rules += get_geofence_rules_for_perms(instance, perms, user=_owner)
                             gf_services = _get_gf_services(instance, perms)
                             _, _, _disable_dataset_cache, _, _, _ = get_user_geolimits(instance, _owner, None, gf_services)
                             _disable_cache.append(_disable_dataset_cache)
@@ -437,7 +436,7 @@ class GeoServerResourceManager(ResourceManagerInterface):
                                             group_perms = permissions['groups']
                                         if user == "AnonymousUser":
                                             _user = None
-                                        sync_geofence_with_guardian(instance, perms, user=_user, group_perms=group_perms)
+                                        _rules += get_geofence_rules_for_perms(instance, perms, user=_user, group_perms=group_perms)
                                         gf_services = _get_gf_services(instance, perms)
                                         _group = list(group_perms.keys())[0] if group_perms else None
                                         _, _, _disable_dataset_cache, _, _, _ = get_user_geolimits(instance, _user, _group, gf_services)
@@ -450,7 +449,7 @@ class GeoServerResourceManager(ResourceManagerInterface):
                                     # Set the GeoFence Rules
                                     if _group and _group.name and _group.name == 'anonymous':
                                         _group = None
-                                    sync_geofence_with_guardian(instance, perms, group=_group)
+                                    _rules += get_geofence_rules_for_perms(instance, perms, group=_group)
                                     gf_services = _get_gf_services(instance, perms)
                                     _, _, _disable_dataset_cache, _, _, _ = get_user_geolimits(instance, None, _group, gf_services)
                                     _disable_cache.append(_disable_dataset_cache)
@@ -458,9 +457,6 @@ class GeoServerResourceManager(ResourceManagerInterface):
                             anonymous_can_view = settings.DEFAULT_ANONYMOUS_VIEW_PERMISSION
                             anonymous_can_download = settings.DEFAULT_ANONYMOUS_DOWNLOAD_PERMISSION
 
-                            if not created:
-                                purge_geofence_dataset_rules(instance.get_self_resource())
-
                             # Owner & Managers
                             perms = [
                                 "view_resourcebase",
@@ -469,36 +465,39 @@ class GeoServerResourceManager(ResourceManagerInterface):
                                 "change_resourcebase",
                                 "change_resourcebase_permissions",
                                 "download_resourcebase"]
-                            sync_geofence_with_guardian(instance, perms, user=_owner)
+                            _rules += get_geofence_rules_for_perms(instance, perms, user=_owner)
                             gf_services = _get_gf_services(instance, perms)
                             _, _, _disable_dataset_cache, _, _, _ = get_user_geolimits(instance, _owner, None, gf_services)
                             _disable_cache.append(_disable_dataset_cache)
 
                             _member_group_perm, _group_managers = instance.get_group_managers(get_user_groups(_owner))
                             for _group_manager in _group_managers:
-                                sync_geofence_with_guardian(instance, perms, user=_group_manager)
+                                _rules += get_geofence_rules_for_perms(instance, perms, user=_group_manager)
                                 _, _, _disable_dataset_cache, _, _, _ = get_user_geolimits(instance, _group_manager, None, gf_services)
                                 _disable_cache.append(_disable_dataset_cache)
 
                             for user_group in get_user_groups(_owner):
                                 if not skip_registered_members_common_group(user_group):
-                                    sync_geofence_with_guardian(instance, perms, group=user_group)
+                                    _rules += get_geofence_rules_for_perms(instance, perms, group=user_group)
                                     _, _, _disable_dataset_cache, _, _, _ = get_user_geolimits(instance, None, user_group, gf_services)
                                     _disable_cache.append(_disable_dataset_cache)
 
                             # Anonymous
                             if anonymous_can_view:
-                                sync_geofence_with_guardian(instance, VIEW_PERMISSIONS, user=None, group=None)
+                                _rules += get_geofence_rules_for_perms(instance, VIEW_PERMISSIONS, user=None, group=None)
                                 gf_services = _get_gf_services(instance, VIEW_PERMISSIONS)
                                 _, _, _disable_dataset_cache, _, _, _ = get_user_geolimits(instance, None, None, gf_services)
                                 _disable_cache.append(_disable_dataset_cache)
 
                             if anonymous_can_download:
-                                sync_geofence_with_guardian(instance, DOWNLOAD_PERMISSIONS, user=None, group=None)
+                                _rules += get_geofence_rules_for_perms(instance, DOWNLOAD_PERMISSIONS, user=None, group=None)
                                 gf_services = _get_gf_services(instance, DOWNLOAD_PERMISSIONS)
                                 _, _, _disable_dataset_cache, _, _, _ = get_user_geolimits(instance, None, None, gf_services)
                                 _disable_cache.append(_disable_dataset_cache)
 
+                        # the rules not matching the permissions are replaced with a single GeoFence batch
+                        sync_geofence_rules([(instance, _rules)], replace=not created)
+
                         if _disable_cache:
                             filters, formats = _get_gwc_filters_and_formats(_disable_cache)
                             try:
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.12 on 2022-04-06 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogResourceFingerprint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alternate', models.CharField(max_length=255, unique=True)),
+                ('workspace', models.CharField(blank=True, max_length=255, null=True)),
+                ('store', models.CharField(blank=True, max_length=255, null=True)),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('last_synced', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -16,3 +16,23 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #########################################################################
+
+from django.db import models
+
+
+class CatalogResourceFingerprint(models.Model):
+    """
+    Fingerprint of a GeoServer catalog resource, as of the last time it has been
+    successfully synchronized by "gs_slurp".
+
+    The incremental mode of "gs_slurp" compares the stored fingerprints with the
+    current catalog in order to process only added or changed resources.
+    """
+    alternate = models.CharField(max_length=255, unique=True)
+    workspace = models.CharField(max_length=255, null=True, blank=True)
+    store = models.CharField(max_length=255, null=True, blank=True)
+    fingerprint = models.CharField(max_length=32)
+    last_synced = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.alternate} [{self.fingerprint}]"
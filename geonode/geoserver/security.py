@@ -76,41 +76,38 @@ def _get_geofence_payload(layer, dataset_name, workspace, access, user=None, gro
     return etree.tostring(root_el)
 
 
-def _update_geofence_rule(layer, dataset_name, workspace,
-                          service, request=None,
-                          user=None, group=None,
-                          geo_limit=None, allow=True):
-    payload = _get_geofence_payload(
-        layer=layer,
-        dataset_name=dataset_name,
-        workspace=workspace,
-        access="ALLOW" if allow else "DENY",
-        user=user,
-        group=group,
-        service=service,
-        request=request,
-        geo_limit=geo_limit
-    )
-    logger.debug(f"request data: {payload}")
-    response = requests.post(
-        f"{settings.OGC_SERVER['default']['LOCATION']}rest/geofence/rules",
-        data=payload,
-        headers={
-            'Content-type': 'application/xml'
-        },
-        auth=HTTPBasicAuth(
-            username=settings.OGC_SERVER['default']['USER'],
-            password=settings.OGC_SERVER['default']['PASSWORD']
-        )
+def _get_geofence_rule(dataset_name, workspace, access, user=None, group=None,
+                       service=None, request=None, geo_limit=None) -> dict:
+    """JSON counterpart of '_get_geofence_payload', without the priority, which is assigned when applied."""
+    rule = {
+        'userName': user or None,
+        'roleName': f"ROLE_{group.upper()}" if group is not None else None,
+        'workspace': workspace,
+        'layer': dataset_name,
+        'service': service if service is not None and service != "*" else None,
+        'request': request if request is not None and request != "*" else None,
+        'access': access
+    }
+    if service and service == "*" and geo_limit is not None and geo_limit != "":
+        rule['access'] = "LIMIT"
+        rule['limits'] = {
+            'catalogMode': "MIXED",
+            'allowedArea': geo_limit
+        }
+    return rule
+
+
+def _get_geofence_rule_key(rule: dict) -> tuple:
+    """The fields identifying what a rule grants, i.e. everything but its id and priority."""
+    limits = rule.get('limits') or {}
+    return (
+        rule.get('userName') or None,
+        rule.get('roleName') or None,
+        rule.get('service') or None,
+        rule.get('request') or None,
+        rule.get('access'),
+        limits.get('allowedArea') or None
     )
-    logger.debug(f"response status_code: {response.status_code}")
-    if response.status_code not in (200, 201):
-        msg = (f"Could not ADD GeoServer User {user} Rule for "
-               f"Dataset {layer}: '{response.text}'")
-        if 'Duplicate Rule' in response.text:
-            logger.debug(msg)
-        else:
-            raise RuntimeError(msg)
 
 
 def get_geofence_rules(page=0, entries=1, count=False):
@@ -288,6 +285,172 @@ def set_geofence_invalidate_cache():
             return False
 
 
+def get_dataset_geofence_rules(dataset) -> typing.Optional[list]:
+    """
+    Returns the GeoFence Rules of the Dataset sorted by priority, or None if they could not be retrieved.
+    """
+    url = settings.OGC_SERVER['default']['LOCATION']
+    user = settings.OGC_SERVER['default']['USER']
+    passwd = settings.OGC_SERVER['default']['PASSWORD']
+    workspace = get_dataset_workspace(dataset)
+    dataset_name = dataset.name if dataset and hasattr(dataset, 'name') else dataset.alternate
+    try:
+        r = requests.get(
+            f"{url}rest/geofence/rules.json?workspace={workspace}&layer={dataset_name}",
+            headers={'Content-type': 'application/json'},
+            auth=HTTPBasicAuth(user, passwd),
+            timeout=10,
+            verify=False
+        )
+        if r.status_code < 200 or r.status_code >= 300:
+            logger.debug(f"Could not retrieve the GeoFence Rules of Dataset {dataset_name}: [{r.status_code}] {r.text}")
+            return None
+        gs_rules = r.json()
+        rules = [_r for _r in (gs_rules.get('rules') or []) if _r.get('layer') == dataset_name]
+        return sorted(rules, key=lambda _r: int(_r.get('priority') or 0))
+    except Exception:
+        tb = traceback.format_exc()
+        logger.debug(tb)
+        return None
+
+
+def _unique_geofence_rules(rules: list, existing_rules: list = None) -> list:
+    """Drops the duplicated rules, and the ones among 'existing_rules', keeping the order."""
+    _keys = set(_get_geofence_rule_key(_r) for _r in existing_rules or [])
+    unique_rules = []
+    for _rule in rules:
+        _key = _get_geofence_rule_key(_rule)
+        if _key not in _keys:
+            _keys.add(_key)
+            unique_rules.append(_rule)
+    return unique_rules
+
+
+def diff_geofence_rules(existing_rules: list, rules: list) -> typing.Tuple[list, list]:
+    """
+    Compares the existing GeoFence Rules of a Dataset with the desired ones.
+
+    Rules are compared principal by principal (user, role or anonymous), since the relative priority
+    of the rules of a principal matters (e.g. the WFS-T DENY rules must come before the WFS ALLOW one):
+    the rules of a principal are left untouched when they already match the desired ones, in the same order,
+    and replaced altogether otherwise.
+
+    :return: the ids of the rules to be deleted and the rules to be inserted
+    """
+    def _by_principal(_rules):
+        principals = {}
+        for _rule in _rules:
+            principals.setdefault(_get_geofence_rule_key(_rule)[:2], []).append(_rule)
+        return principals
+
+    existing = _by_principal(existing_rules)
+    desired = _by_principal(_unique_geofence_rules(rules))
+    to_delete = []
+    to_insert = []
+    for _principal in list(existing.keys()) + [_p for _p in desired.keys() if _p not in existing]:
+        _existing = existing.get(_principal, [])
+        _desired = desired.get(_principal, [])
+        if [_get_geofence_rule_key(_r) for _r in _existing] != [_get_geofence_rule_key(_r) for _r in _desired]:
+            to_delete += [_r['id'] for _r in _existing if _r.get('id') is not None]
+            to_insert += _desired
+    return to_delete, to_insert
+
+
+def run_geofence_batch(operations: list) -> bool:
+    """
+    Executes the GeoFence operations in a single request to the GeoFence batch API; falls back to one
+    request per operation if the batch could not be executed.
+
+    :param operations: list of ('delete', <rule id>) and ('insert', <rule dict>) tuples
+    """
+    if not operations:
+        return True
+    url = settings.OGC_SERVER['default']['LOCATION']
+    auth = HTTPBasicAuth(
+        username=settings.OGC_SERVER['default']['USER'],
+        password=settings.OGC_SERVER['default']['PASSWORD']
+    )
+    batch = []
+    for _operation, _value in operations:
+        if _operation == 'delete':
+            batch.append({'@service': 'rules', '@type': 'delete', '@id': _value})
+        else:
+            batch.append({'@service': 'rules', '@type': 'insert', 'Rule': _value})
+    try:
+        response = requests.post(
+            f"{url}rest/geofence/batch/exec",
+            json={'Batch': {'operations': batch}},
+            auth=auth
+        )
+        if response.status_code in (200, 201, 204):
+            return True
+        logger.debug(f"Could not execute the GeoFence batch: [{response.status_code}] {response.text}")
+    except Exception:
+        tb = traceback.format_exc()
+        logger.debug(tb)
+
+    _success = True
+    for _operation, _value in operations:
+        try:
+            if _operation == 'delete':
+                response = requests.delete(
+                    f"{url}rest/geofence/rules/id/{_value}",
+                    auth=auth)
+            else:
+                response = requests.post(
+                    f"{url}rest/geofence/rules",
+                    json={'Rule': _value},
+                    auth=auth)
+        except Exception:
+            tb = traceback.format_exc()
+            logger.debug(tb)
+            logger.error(f"Could not {_operation} GeoFence Rule {_value}")
+            _success = False
+            continue
+        if response.status_code not in (200, 201, 204):
+            if 'Duplicate Rule' in response.text:
+                continue
+            logger.error(f"Could not {_operation} GeoFence Rule {_value}: [{response.status_code}] {response.text}")
+            _success = False
+    return _success
+
+
+def sync_geofence_rules(datasets_rules: list, replace: bool = True, invalidate: bool = True) -> bool:
+    """
+    Applies the desired GeoFence Rules of a batch of Datasets with a single GeoFence batch request.
+
+    :param datasets_rules: list of (dataset, rules) tuples, the rules being sorted by priority
+    :param replace: whether the existing rules of the datasets not matching the desired ones must be
+        deleted; when False the rules are just added
+    :param invalidate: whether the GeoFence rules cache must be invalidated afterwards
+    """
+    operations = []
+    to_insert = []
+    for dataset, rules in datasets_rules:
+        if replace:
+            existing_rules = get_dataset_geofence_rules(dataset)
+            if existing_rules is None:
+                # the existing rules could not be retrieved; add the missing ones at least
+                existing_rules = []
+            _to_delete, _to_insert = diff_geofence_rules(existing_rules, rules)
+            operations += [('delete', _id) for _id in _to_delete]
+            to_insert += _to_insert
+        else:
+            # GeoFence rejects the duplicated rules
+            to_insert += _unique_geofence_rules(rules, get_dataset_geofence_rules(dataset) or [])
+    if to_insert:
+        # every new rule goes right before the lowest priority one, in order
+        highest_priority = get_highest_priority()
+        priority = highest_priority if highest_priority >= 0 else 0
+        for _rule in to_insert:
+            operations.append(('insert', dict({_k: _v for _k, _v in _rule.items() if _v is not None}, priority=priority)))
+            priority += 1
+    _success = run_geofence_batch(operations)
+    if invalidate and operations:
+        set_geofence_invalidate_cache()
+    return _success
+
+
 def toggle_dataset_cache(dataset_name, enable=True, filters=None, formats=None):
     """Disable/enable a GeoServer Tiled Dataset Configuration"""
     if settings.OGC_SERVER['default']['GEOFENCE_SECURITY_ENABLED']:
@@ -490,9 +653,10 @@ def set_geofence_all(instance):
             resource.set_dirty_state()
 
 
-def sync_geofence_with_guardian(dataset, perms, user=None, group=None, group_perms=None):
+def get_geofence_rules_for_perms(dataset, perms, user=None, group=None, group_perms=None) -> list:
     """
-    Sync Guardian permissions to GeoFence.
+    Computes the GeoFence Rules, sorted by priority, granting the Guardian permissions 'perms'
+    on the Dataset to the user, to the group, or to anyone if both are None.
     """
     _dataset_name = dataset.name if dataset and hasattr(dataset, 'name') else dataset.alternate
     _dataset_workspace = get_dataset_workspace(dataset)
@@ -528,49 +692,43 @@ def sync_geofence_with_guardian(dataset, perms, user=None, group=None, group_per
         gf_services_limits_first.update(gf_services)
         gf_services = gf_services_limits_first
 
+    principals = []
+    if _user:
+        _wkt = users_geolimits.last().wkt if users_geolimits and users_geolimits.count() else None
+        principals.append((_user, None, _wkt))
+    elif not _group:
+        _wkt = anonymous_geolimits.last().wkt if anonymous_geolimits and anonymous_geolimits.count() else None
+        principals.append((None, None, _wkt))
+    if _group:
+        _wkt = groups_geolimits.last().wkt if groups_geolimits and groups_geolimits.count() else None
+        principals.append((None, _group, _wkt))
+
+    rules = []
     for service, allowed in gf_services.items():
         if dataset and _dataset_name and allowed:
-            if _user:
-                logger.debug(f"Adding 'user' to geofence the rule: {dataset} {service} {_user}")
-                _wkt = None
-                if users_geolimits and users_geolimits.count():
-                    _wkt = users_geolimits.last().wkt
-                if service in gf_requests:
-                    for request, enabled in gf_requests[service].items():
-                        _update_geofence_rule(dataset, _dataset_name, _dataset_workspace,
-                                              service, request=request, user=_user, allow=enabled)
-                _update_geofence_rule(dataset, _dataset_name, _dataset_workspace, service, user=_user, geo_limit=_wkt)
-            elif not _group:
-                logger.debug(f"Adding to geofence the rule: {dataset} {service} *")
-                _wkt = None
-                if anonymous_geolimits and anonymous_geolimits.count():
-                    _wkt = anonymous_geolimits.last().wkt
-                if service in gf_requests:
-                    for request, enabled in gf_requests[service].items():
-                        _update_geofence_rule(dataset, _dataset_name, _dataset_workspace,
-                                              service, request=request, user=_user, allow=enabled)
-                _update_geofence_rule(dataset, _dataset_name, _dataset_workspace, service, geo_limit=_wkt)
-                if service in gf_requests:
-                    for request, enabled in gf_requests[service].items():
-                        _update_geofence_rule(dataset, _dataset_name, _dataset_workspace,
-                                              service, request=request, user=_user, allow=enabled)
-            if _group:
-                logger.debug(f"Adding 'group' to geofence the rule: {dataset} {service} {_group}")
-                _wkt = None
-                if groups_geolimits and groups_geolimits.count():
-                    _wkt = groups_geolimits.last().wkt
-                if service in gf_requests:
-                    for request, enabled in gf_requests[service].items():
-                        _update_geofence_rule(dataset, _dataset_name, _dataset_workspace,
-                                              service, request=request, group=_group, allow=enabled)
-                _update_geofence_rule(dataset, _dataset_name, _dataset_workspace, service, group=_group, geo_limit=_wkt)
-                if service in gf_requests:
-                    for request, enabled in gf_requests[service].items():
-                        _update_geofence_rule(dataset, _dataset_name, _dataset_workspace,
-                                              service, request=request, group=_group, allow=enabled)
-    if not getattr(settings, 'DELAYED_SECURITY_SIGNALS', False):
-        set_geofence_invalidate_cache()
-    else:
+            for _principal_user, _principal_group, _wkt in principals:
+                logger.debug(f"Adding to geofence the rule: {dataset} {service} {_principal_user or _principal_group or '*'}")
+                # the requests rules come first, in order to take precedence over the service one
+                for request, enabled in gf_requests.get(service, {}).items():
+                    rules.append(
+                        _get_geofence_rule(_dataset_name, _dataset_workspace, "ALLOW" if enabled else "DENY",
+                                           user=_principal_user, group=_principal_group,
+                                           service=service, request=request))
+                rules.append(
+                    _get_geofence_rule(_dataset_name, _dataset_workspace, "ALLOW",
+                                       user=_principal_user, group=_principal_group,
+                                       service=service, geo_limit=_wkt))
+    return rules
+
+
+def sync_geofence_with_guardian(dataset, perms, user=None, group=None, group_perms=None):
+    """
+    Sync Guardian permissions to GeoFence.
+    """
+    rules = get_geofence_rules_for_perms(dataset, perms, user=user, group=group, group_perms=group_perms)
+    _delayed = getattr(settings, 'DELAYED_SECURITY_SIGNALS', False)
+    sync_geofence_rules([(dataset, rules)], replace=False, invalidate=not _delayed)
+    if _delayed:
         dataset.set_dirty_state()
 
 
@@ -585,34 +743,50 @@ def sync_resources_with_guardian(resource=None):
         dirty_resources = ResourceBase.objects.filter(id=resource.id)
     else:
         dirty_resources = ResourceBase.objects.filter(dirty_state=True)
-    if dirty_resources and dirty_resources.count() > 0:
+    dirty_datasets = Dataset.objects.filter(id__in=dirty_resources.values('id'))
+    if dirty_datasets.exists():
         logger.debug(" --------------------------- synching with guardian!")
-        for r in dirty_resources:
-            if r.polymorphic_ctype.name == 'dataset':
-                layer = None
-                try:
-                    purge_geofence_dataset_rules(r)
-                    layer = Dataset.objects.get(id=r.id)
-                    perm_spec = layer.get_all_level_info()
-                    # All the other users
-                    if 'users' in perm_spec:
-                        for user, perms in perm_spec['users'].items():
-                            user = get_user_model().objects.get(username=user)
-                            # Set the GeoFence User Rules
-                            geofence_user = str(user)
-                            if "AnonymousUser" in geofence_user or get_anonymous_user() in geofence_user:
-                                geofence_user = None
-                            sync_geofence_with_guardian(layer, perms, user=geofence_user)
-                    # All the other groups
-                    if 'groups' in perm_spec:
-                        for group, perms in perm_spec['groups'].items():
-                            group = Group.objects.get(name=group)
-                            # Set the GeoFence Group Rules
-                            sync_geofence_with_guardian(layer, perms, group=group)
-                    r.clear_dirty_state()
-                except Exception as e:
-                    logger.exception(e)
-                    logger.warn(f"!WARNING! - Failure Synching-up Security Rules for Resource [{r}]")
+        datasets_rules = []
+        synced_datasets = []
+        perm_specs = {}
+        usernames = set()
+        groupnames = set()
+        for layer in dirty_datasets.iterator():
+            try:
+                perm_specs[layer] = layer.get_all_level_info()
+                usernames.update(str(_u) for _u in perm_specs[layer].get('users', {}).keys())
+                groupnames.update(str(_g) for _g in perm_specs[layer].get('groups', {}).keys())
+            except Exception as e:
+                logger.exception(e)
+                logger.warn(f"!WARNING! - Failure Synching-up Security Rules for Resource [{layer}]")
+        users = {_u.username: _u for _u in get_user_model().objects.filter(username__in=usernames)}
+        groups = {_g.name: _g for _g in Group.objects.filter(name__in=groupnames)}
+        anonymous_user = get_anonymous_user()
+        for layer, perm_spec in perm_specs.items():
+            try:
+                rules = []
+                # All the other users
+                for user, perms in perm_spec.get('users', {}).items():
+                    user = users[str(user)]
+                    # Set the GeoFence User Rules
+                    geofence_user = user
+                    if "AnonymousUser" in str(user) or user == anonymous_user:
+                        geofence_user = None
+                    rules += get_geofence_rules_for_perms(layer, perms, user=geofence_user)
+                # All the other groups
+                for group, perms in perm_spec.get('groups', {}).items():
+                    group = groups[str(group)]
+                    # Set the GeoFence Group Rules
+                    rules += get_geofence_rules_for_perms(layer, perms, group=group)
+                datasets_rules.append((layer, rules))
+                synced_datasets.append(layer.id)
+            except Exception as e:
+                logger.exception(e)
+                logger.warn(f"!WARNING! - Failure Synching-up Security Rules for Resource [{layer}]")
+        # a single batch, and cache invalidation, for all the dirty datasets
+        if sync_geofence_rules(datasets_rules):
+            for r in ResourceBase.objects.filter(id__in=synced_datasets):
+                r.clear_dirty_state()
 
 
 def get_user_geolimits(layer, user, group, gf_services):
@@ -624,7 +798,8 @@ def get_user_geolimits(layer, user, group, gf_services):
     anonymous_geolimits = None
     if user:
         _user = user if isinstance(user, str) else user.username
-        users_geolimits = layer.users_geolimits.filter(user=get_user_model().objects.get(username=_user))
+        users_geolimits = layer.users_geolimits.filter(
+            user=get_user_model().objects.get(username=_user) if isinstance(user, str) else user)
         gf_services["*"] = users_geolimits.count() > 0 if not gf_services["*"] else gf_services["*"]
         _disable_dataset_cache = users_geolimits.count() > 0
 
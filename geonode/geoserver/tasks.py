@@ -17,8 +17,10 @@
 #
 #########################################################################
 import os
+import time
 
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
 
 from celery import shared_task
@@ -42,6 +44,7 @@ from .helpers import (
     set_dataset_style,
     cascading_delete,
     create_gs_thumbnail,
+    sync_catalog_resources,
     sync_instance_with_geoserver)
 
 logger = get_task_logger(__name__)
@@ -185,6 +188,56 @@ def geoserver_create_style(
                 geoserver_automatic_default_style_set.send_robust(sender=instance, instance=instance)
 
 
+@app.task(
+    bind=True,
+    base=FaultTolerantTask,
+    name='geonode.geoserver.tasks.geoserver_slurp_resources',
+    queue='geoserver.catalog',
+    acks_late=False,
+    ignore_result=False)
+def geoserver_slurp_resources(self, resources, owner_id=None, permissions=None, execute_signals=False):
+    """
+    Runs sync_catalog_resources on a batch of GeoServer catalog resources.
+    """
+    owner = get_user_model().objects.filter(pk=owner_id).first() if owner_id else None
+    return sync_catalog_resources(
+        resources,
+        owner=owner,
+        permissions=permissions,
+        execute_signals=execute_signals)
+
+
+@app.task(
+    bind=True,
+    base=FaultTolerantTask,
+    name='geonode.geoserver.tasks.geoserver_slurp_summary',
+    queue='geoserver.catalog',
+    acks_late=False,
+    ignore_result=False)
+def geoserver_slurp_summary(self, results):
+    """
+    Collects the statistics of the batches of an asynchronous gs_slurp.
+    """
+    summary = {
+        'failed': 0,
+        'updated': 0,
+        'created': 0,
+        'errors': {},
+    }
+    for result in results:
+        if not result:
+            continue
+        for counter in ('failed', 'updated', 'created'):
+            summary[counter] += result.get(counter, 0)
+        summary['errors'].update(result.get('errors', {}))
+    logger.info(
+        f"GeoServer catalog sync completed: {summary['created']} created, "
+        f"{summary['updated']} updated, {summary['failed']} failed")
+    for alternate, error in summary['errors'].items():
+        logger.warning(f"Failed to sync {alternate}: {error}")
+    return summary
+
+
 @app.task(
     bind=True,
     base=FaultTolerantTask,
@@ -251,6 +304,46 @@ def geoserver_create_thumbnail(self, instance_id, overwrite=True, check_bbox=Tru
                 instance.set_processing_state(enumerations.STATE_PROCESSED)
 
 
+@app.task(
+    bind=True,
+    base=FaultTolerantTask,
+    name='geonode.geoserver.tasks.geoserver_create_thumbnails_batch',
+    queue='geoserver.events',
+    acks_late=False,
+    ignore_result=False)
+def geoserver_create_thumbnails_batch(self, resource_ids, overwrite=True, background_zoom=None):
+    """
+    Runs create_thumbnails on a batch of resources and returns the batch statistics.
+    """
+    from geonode.thumbs.thumbnails import create_thumbnails
+    return create_thumbnails(resource_ids, overwrite=overwrite, background_zoom=background_zoom)
+
+
+@app.task(
+    bind=True,
+    base=FaultTolerantTask,
+    name='geonode.geoserver.tasks.geoserver_create_thumbnails_summary',
+    queue='geoserver.events',
+    acks_late=False,
+    ignore_result=False)
+def geoserver_create_thumbnails_summary(self, results, started_at=None):
+    """
+    Collects the statistics of the thumbnails batches of a bulk regeneration.
+    """
+    from geonode.thumbs.thumbnails import merge_thumbnails_stats
+    summary = merge_thumbnails_stats(results)
+    if started_at:
+        summary["wall_time"] = max(time.time() - started_at, 0)
+        summary["throughput"] = summary["processed"] / summary["wall_time"] if summary["wall_time"] else 0
+    logger.info(
+        f"Thumbnails regeneration completed: {summary['processed']} resources in {summary['batches']} batches, "
+        f"{summary['generated']} generated ({summary['reused']} reused), {summary['skipped']} skipped, "
+        f"{summary['failed']} failed")
+    for resource_id, error in summary["errors"].items():
+        logger.warning(f"Thumbnail generation failed for resource {resource_id}: {error}")
+    return summary
+
+
 @app.task(
     bind=True,
     base=FaultTolerantTask,
@@ -20,6 +20,7 @@ import re
 import logging
 
 from urllib.parse import urljoin
+from unittest.mock import patch, MagicMock
 
 from django.conf import settings
 from django.urls import reverse
@@ -28,7 +29,12 @@ from geonode import geoserver
 from geonode.decorators import on_ogc_backend
 from geonode.tests.base import GeoNodeBaseTestSupport
 from geonode.geoserver.views import _response_callback
-from geonode.geoserver.helpers import get_dataset_storetype
+from geonode.layers.models import Dataset
+from geonode.geoserver.models import CatalogResourceFingerprint
+from geonode.geoserver.helpers import (
+    gs_slurp,
+    get_dataset_storetype,
+    get_catalog_resource_fingerprint)
 from geonode.layers.populate_datasets_data import create_dataset_data
 
 from geonode.base.populate_test_data import (
@@ -202,3 +208,44 @@ xlink:href="{settings.GEOSERVER_LOCATION}ows?service=WMS&amp;request=GetLegendGr
 
         response = self.client.get(f"{reverse('ows_endpoint')}?service=WFS&version=1.1.0&request=DescribeFeatureType&typeName=geonode:tipi_forestali&outputFormat=image/png&access_token=something")
         self.assertEqual(response.status_code, 200)
+
+    def test_gs_slurp_incremental(self):
+        dataset = Dataset.objects.exclude(alternate=None).first()
+        workspace, name = dataset.alternate.split(':')
+        resource = MagicMock(
+            enabled=True, advertised=True, title=dataset.title, abstract=dataset.abstract, keywords=[],
+            projection='EPSG:4326', native_bbox=None, latlon_bbox=None, dom=None)
+        resource.name = name
+        resource.workspace.name = workspace
+        resource.store.name = dataset.store
+
+        with patch('geonode.geoserver.helpers.gs_catalog') as catalog_mock, \
+                patch('geonode.geoserver.helpers.sync_catalog_resource') as sync_mock:
+            catalog_mock.get_resources.return_value = [resource]
+            sync_mock.return_value = (dataset, False)
+
+            # no fingerprint stored yet: the resource is processed
+            output = gs_slurp(incremental=True)
+            self.assertEqual(sync_mock.call_count, 1)
+            self.assertEqual(output['stats']['updated'], 1)
+            self.assertEqual(output['stats']['unchanged'], 0)
+
+            CatalogResourceFingerprint.objects.create(
+                alternate=dataset.alternate,
+                fingerprint=get_catalog_resource_fingerprint(resource))
+            output = gs_slurp(incremental=True)
+            self.assertEqual(sync_mock.call_count, 1)
+            self.assertEqual(output['stats']['unchanged'], 1)
+
+            # a changed resource is processed again
+            resource.title = 'changed title'
+            output = gs_slurp(incremental=True)
+            self.assertEqual(sync_mock.call_count, 2)
+            self.assertEqual(output['stats']['updated'], 1)
+
+            # a full synchronization doesn't compute the fingerprints
+            with patch('geonode.geoserver.helpers.get_catalog_resource_fingerprint') as fingerprint_mock:
+                output = gs_slurp()
+            fingerprint_mock.assert_not_called()
+            self.assertEqual(sync_mock.call_count, 3)
+            self.assertIsNone(sync_mock.call_args[1]['fingerprint'])
@@ -55,6 +55,7 @@ from geonode.layers.forms import LayerStyleUploadForm
 from geonode.layers.models import Dataset, Style
 from geonode.layers.views import _resolve_dataset, _PERMISSION_MSG_MODIFY
 from geonode.maps.models import Map
+from geonode.security.cache import has_perm
 from geonode.proxy.views import (
     proxy,
     fetch_response_headers)
@@ -762,8 +763,7 @@ def get_capabilities(request, layerid=None, user=None,
         layers = Dataset.objects.filter(alternate__in=alternates)
 
     for layer in layers:
-        if request.user.has_perm('view_resourcebase',
-                                 layer.get_self_resource()):
+        if has_perm(request.user, 'view_resourcebase', layer.get_self_resource()):
             access_token = get_or_create_token(request.user)
             if access_token and not access_token.is_expired():
                 access_token = access_token.token
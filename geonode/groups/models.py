@@ -287,3 +287,16 @@ def group_pre_delete(instance, sender, **kwargs):
 
 
 signals.pre_delete.connect(group_pre_delete, sender=Group)
+
+
+def group_membership_changed(sender, **kwargs):
+    """Group memberships and roles affect the permissions of the users on all the resources"""
+    from geonode.security.cache import invalidate_permissions_cache
+
+    if sender in (GroupMember, get_user_model().groups.through):
+        invalidate_permissions_cache()
+
+
+signals.post_save.connect(group_membership_changed, sender=GroupMember)
+signals.post_delete.connect(group_membership_changed, sender=GroupMember)
+signals.m2m_changed.connect(group_membership_changed)
@@ -305,6 +305,7 @@ class AsynchronousHarvestingSessionAdmin(admin.ModelAdmin):
         "harvester",
         "total_records_to_process",
         "records_done",
+        "records_skipped",
         "get_progress_percentage",
     )
     readonly_fields = (
@@ -317,8 +318,47 @@ class AsynchronousHarvestingSessionAdmin(admin.ModelAdmin):
         "harvester",
         "total_records_to_process",
         "records_done",
+        "records_skipped",
         "get_progress_percentage",
         "details",
+        "show_link_to_events",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="Events")
+    def show_link_to_events(self, session: models.AsynchronousHarvestingSession):
+        changelist_uri = reverse("admin:harvesting_asynchronousharvestingsessionevent_changelist")
+        return mark_safe(
+            format_html(
+                f'<a class="button grp-button" href="{changelist_uri}?session__id__exact={session.id}">Go</a>'
+            )
+        )
+
+
+@admin.register(models.AsynchronousHarvestingSessionEvent)
+class AsynchronousHarvestingSessionEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "session",
+        "created",
+        "message",
+    )
+    list_filter = (
+        "session",
+    )
+    search_fields = (
+        "message",
+    )
+    list_per_page = 50
+    list_select_related = (
+        "session",
+    )
+    readonly_fields = (
+        "session",
+        "created",
+        "message",
     )
 
     def has_add_permission(self, request):
@@ -348,6 +388,8 @@ class HarvestableResourceAdmin(admin.ModelAdmin):
         "last_harvesting_message",
         "last_harvesting_succeeded",
         "remote_resource_type",
+        "remote_fingerprint",
+        "harvested_fingerprint",
     )
     list_filter = (
         "harvester",
@@ -115,6 +115,9 @@ class HarvesterSerializer(BriefHarvesterSerializer):
             "last_check_harvestable_resources_message",
             "harvest_new_resources_by_default",
             "delete_orphan_resources_automatically",
+            "harvesting_chunk_size",
+            "harvesting_concurrency",
+            "delta_harvesting",
             "last_updated",
             "links",
         )
@@ -249,6 +252,17 @@ class BriefAsynchronousHarvestingSessionSerializer(DynamicModelSerializer):
             "ended",
             "total_records_to_process",
             "records_done",
+            "records_skipped",
+        )
+
+
+class AsynchronousHarvestingSessionEventSerializer(DynamicModelSerializer):
+    class Meta:
+        model = models.AsynchronousHarvestingSessionEvent
+        fields = (
+            "id",
+            "created",
+            "message",
         )
 
 
@@ -31,6 +31,12 @@ harvesters_node.register(
     basename='harvestable-resources',
     parents_query_lookups=['harvester_id']
 )
-router.register('harvesting-sessions', views.AsynchronousHarvestingSessionViewSet)
+sessions_node = router.register('harvesting-sessions', views.AsynchronousHarvestingSessionViewSet)
+sessions_node.register(
+    'events',
+    views.AsynchronousHarvestingSessionEventViewSet,
+    basename='harvesting-session-events',
+    parents_query_lookups=['session_id']
+)
 
 urlpatterns = router.urls
@@ -98,3 +98,14 @@ class AsynchronousHarvestingSessionViewSet(WithDynamicViewSetMixin, viewsets.Rea
     queryset = models.AsynchronousHarvestingSession.objects.all()
     serializer_class = serializers.BriefAsynchronousHarvestingSessionSerializer
     pagination_class = GeoNodeApiPagination
+
+
+class AsynchronousHarvestingSessionEventViewSet(
+    NestedViewSetMixin,
+    WithDynamicViewSetMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = models.AsynchronousHarvestingSessionEvent.objects.all()
+    serializer_class = serializers.AsynchronousHarvestingSessionEventSerializer
+    pagination_class = GeoNodeApiPagination
@@ -50,6 +50,11 @@ def get_setting(setting_key: str) -> typing.Any:
         ),
         "HARVESTED_RESOURCE_FILE_MAX_MEMORY_SIZE": getattr(
             settings, "HARVESTED_RESOURCE_MAX_MEMORY_SIZE", settings.FILE_UPLOAD_MAX_MEMORY_SIZE),
-        "HARVESTER_SCHEDULER_FREQUENCY_MINUTES": getattr(settings, "HARVESTER_SCHEDULER_FREQUENCY_MINUTES", 0.5)
+        "HARVESTER_SCHEDULER_FREQUENCY_MINUTES": getattr(settings, "HARVESTER_SCHEDULER_FREQUENCY_MINUTES", 0.5),
+        "HARVESTER_AVAILABILITY_CHECK_TIMEOUT_SECONDS": getattr(
+            settings, "HARVESTER_AVAILABILITY_CHECK_TIMEOUT_SECONDS", 5),
+        "HARVESTER_FETCH_CONCURRENCY": getattr(settings, "HARVESTER_FETCH_CONCURRENCY", 4),
+        "HARVESTER_FETCH_RATE_LIMIT": getattr(settings, "HARVESTER_FETCH_RATE_LIMIT", 10),
+        "HARVESTING_SESSION_EVENTS_RETENTION_DAYS": getattr(settings, "HARVESTING_SESSION_EVENTS_RETENTION_DAYS", 30),
     }.get(setting_key, getattr(settings, setting_key, None))
     return result
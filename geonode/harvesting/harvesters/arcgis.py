@@ -140,7 +140,7 @@ class ArcgisMapServiceResourceExtractor(ArcgisServiceResourceExtractor):
 
     def __init__(self, service: arcrest.MapService):
         super().__init__(service)
-        self.http_session = requests.Session()
+        self.http_session = base.RemoteSession()
         self._cached_resources = None
 
     def get_num_resources(self) -> int:
@@ -260,7 +260,7 @@ class ArcgisImageServiceResourceExtractor(ArcgisServiceResourceExtractor):
 
     def __init__(self, service: arcrest.ImageService):
         super().__init__(service)
-        self.http_session = requests.Session()
+        self.http_session = base.RemoteSession()
 
     def get_num_resources(self) -> int:
         return len(self.list_resources())
@@ -412,7 +412,7 @@ class ArcgisHarvesterWorker(base.BaseHarvesterWorker):
             harvest_maps = harvest_map_services
             harvest_images = harvest_image_services
         super().__init__(catalog_url, harvester_id)
-        self.http_session = requests.Session()
+        self.http_session = base.RemoteSession()
         self.harvest_map_services = harvest_maps
         self.harvest_image_services = harvest_images
         self.resource_name_filter = resource_name_filter
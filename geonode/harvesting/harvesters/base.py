@@ -19,15 +19,22 @@
 
 import abc
 import dataclasses
+import hashlib
 import html
 import io
+import json
 import logging
+import threading
+import time
 import typing
+from concurrent import futures
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import geonode.upload.files
 import requests
 from django.core.files import uploadedfile
+from django.db import connection
 
 from geonode.base import enumerations
 from geonode.base.models import ResourceBase
@@ -47,6 +54,66 @@ class HarvestingException(Exception):
     pass
 
 
+class RemoteResourceNotModified(Exception):
+    """The remote resource has not changed since it was last harvested"""
+
+
+class RateLimiter:
+    """Spread the calls of all the threads sharing it at `rate` calls per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self.interval:
+            with self._lock:
+                now = time.monotonic()
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + self.interval
+            if slot > now:
+                time.sleep(slot - now)
+
+
+_rate_limiters: typing.Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(url: str) -> RateLimiter:
+    """Return the rate limiter shared by all the requests made to the host of `url`.
+
+    The limit is enforced per worker process.
+
+    """
+
+    host = urlsplit(url).netloc.lower()
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(host)
+        if limiter is None:
+            limiter = RateLimiter(config.get_setting("HARVESTER_FETCH_RATE_LIMIT"))
+            _rate_limiters[host] = limiter
+    return limiter
+
+
+class RemoteSession(requests.Session):
+    """A `requests.Session` honoring the rate limit of the remote hosts.
+
+    The session can be shared among the threads fetching remote resources concurrently.
+
+    """
+
+    def request(self, method, url, *args, **kwargs):
+        get_rate_limiter(url).wait()
+        return super().request(method, url, *args, **kwargs)
+
+
+def get_fingerprint(data: typing.Any) -> str:
+    """Return a checksum of the input JSON-like data, to be used as a `remote_fingerprint`"""
+    serialized = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.md5(serialized.encode("utf-8")).hexdigest()
+
+
 @dataclasses.dataclass()
 class BriefRemoteResource:
     unique_identifier: str
@@ -54,6 +121,8 @@ class BriefRemoteResource:
     resource_type: str
     abstract: typing.Optional[str] = ""
     should_be_harvested: bool = False
+    # last modification date or checksum of the remote resource, if the worker is able to tell it
+    remote_fingerprint: typing.Optional[str] = None
 
 
 @dataclasses.dataclass()
@@ -137,6 +206,36 @@ class BaseHarvesterWorker(abc.ABC):
 
         """
 
+    def conditional_get(
+            self,
+            http_session: requests.Session,
+            url: str,
+            harvestable_resource: "HarvestableResource",  # noqa
+            **kwargs
+    ) -> requests.Response:
+        """Perform a conditional GET request for the details of a harvestable resource.
+
+        The validators (ETag/Last-Modified) returned by the remote on the previous successful
+        harvesting are sent along, so that unchanged records can be skipped cheaply. This
+        method raises `RemoteResourceNotModified` when the remote answers with a 304 status.
+
+        """
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if harvestable_resource.geonode_resource_id and harvestable_resource.last_harvesting_succeeded:
+            if harvestable_resource.remote_etag:
+                headers["If-None-Match"] = harvestable_resource.remote_etag
+            if harvestable_resource.remote_last_modified:
+                headers["If-Modified-Since"] = harvestable_resource.remote_last_modified
+        response = http_session.get(url, headers=headers, **kwargs)
+        if response.status_code == requests.codes.not_modified:
+            raise RemoteResourceNotModified(
+                f"Remote resource {harvestable_resource.unique_identifier!r} has not been modified")
+        if response.status_code == requests.codes.ok:
+            harvestable_resource.remote_etag = response.headers.get("ETag", "")[:255]
+            harvestable_resource.remote_last_modified = response.headers.get("Last-Modified", "")[:255]
+        return response
+
     @classmethod
     def get_extra_config_schema(cls) -> typing.Optional[typing.Dict]:
         """Return a jsonschema schema to be used to validate models.Harvester objects"""
@@ -334,6 +433,59 @@ class BaseHarvesterWorker(abc.ABC):
         return result
 
 
+def prefetch_resources(
+        worker: BaseHarvesterWorker,
+        harvestable_resources: typing.Iterable["HarvestableResource"],  # noqa
+        max_workers: typing.Optional[int] = None
+) -> typing.Iterator[typing.Tuple["HarvestableResource", typing.Any]]:  # noqa
+    """Fetch the details of the input harvestable resources concurrently.
+
+    Yields `(harvestable_resource, outcome)` pairs in the input order, where `outcome`
+    is either the return value of `worker.get_resource()` or the exception it raised.
+    Resources keep on being fetched in the background while the caller processes the
+    ones already yielded.
+
+    """
+
+    harvestable_resources = list(harvestable_resources)
+    if max_workers is None:
+        max_workers = config.get_setting("HARVESTER_FETCH_CONCURRENCY")
+    max_workers = min(max_workers or 1, len(harvestable_resources))
+    if max_workers <= 1:
+        for harvestable_resource in harvestable_resources:
+            yield harvestable_resource, _fetch_resource(worker, harvestable_resource)
+    else:
+        with futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="harvester-fetch") as executor:
+            pending = [
+                (
+                    harvestable_resource,
+                    executor.submit(_fetch_resource_in_thread, worker, harvestable_resource)
+                ) for harvestable_resource in harvestable_resources
+            ]
+            try:
+                for harvestable_resource, future in pending:
+                    yield harvestable_resource, future.result()
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+
+def _fetch_resource(worker: BaseHarvesterWorker, harvestable_resource: "HarvestableResource"):  # noqa
+    try:
+        return worker.get_resource(harvestable_resource)
+    except Exception as exc:
+        return exc
+
+
+def _fetch_resource_in_thread(worker: BaseHarvesterWorker, harvestable_resource: "HarvestableResource"):  # noqa
+    try:
+        return _fetch_resource(worker, harvestable_resource)
+    finally:
+        # NOTE: each thread gets its own database connection, which must not be leaked
+        connection.close()
+
+
 def download_resource_file(url: str, target_name: str) -> Path:
     """Download a resource file and store it using GeoNode's `storage_manager`.
 
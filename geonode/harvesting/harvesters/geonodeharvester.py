@@ -116,7 +116,7 @@ class GeonodeCurrentHarvester(base.BaseHarvesterWorker):
         """A harvester for remote GeoNode instances."""
         super().__init__(*args, **kwargs)
         self.remote_url = self.remote_url.rstrip("/")
-        self.http_session = requests.Session()
+        self.http_session = base.RemoteSession()
         self.harvest_documents = bool(harvest_documents)
         self.harvest_datasets = bool(harvest_datasets)
         self.copy_datasets = bool(copy_datasets)
@@ -178,6 +178,7 @@ class GeonodeCurrentHarvester(base.BaseHarvesterWorker):
                             title=raw_resource["title"],
                             abstract=raw_resource["abstract"],
                             resource_type=raw_resource["resource_type"],
+                            remote_fingerprint=raw_resource.get("last_updated"),
                         )
                         result.append(brief_resource)
                     except KeyError as exc:
@@ -206,7 +207,7 @@ class GeonodeCurrentHarvester(base.BaseHarvesterWorker):
             GeoNodeResourceTypeCurrent.DOCUMENT.value: "/documents/"
         }[harvestable_resource.remote_resource_type]
         url = f"{self.base_api_url}{url_fragment}{harvestable_resource.unique_identifier}/"
-        response = self.http_session.get(url)
+        response = self.conditional_get(self.http_session, url, harvestable_resource)
         result = None
         if response.status_code == requests.codes.ok:
             try:
@@ -490,7 +491,7 @@ class GeonodeLegacyHarvester(base.BaseHarvesterWorker):
         """A harvester for remote GeoNode instances."""
         super().__init__(*args, **kwargs)
         self.remote_url = self.remote_url.rstrip("/")
-        self.http_session = requests.Session()
+        self.http_session = base.RemoteSession()
         self.harvest_documents = (
             harvest_documents if harvest_documents is not None else True)
         self.harvest_datasets = harvest_datasets if harvest_datasets is not None else True
@@ -593,7 +594,7 @@ class GeonodeLegacyHarvester(base.BaseHarvesterWorker):
             Map: f"/maps/{resource_unique_identifier}/",
         }[local_resource_type]
         url = f"{self.base_api_url}{endpoint_suffix}"
-        response = self.http_session.get(url)
+        response = self.conditional_get(self.http_session, url, harvestable_resource)
         result = None
         if response.status_code == requests.codes.ok:
             api_record = response.json()
@@ -1052,7 +1053,7 @@ class GeonodeUnifiedHarvesterWorker(base.BaseHarvesterWorker):
         self._concrete_harvester_worker = None
         super().__init__(*args, **kwargs)
         self.remote_url = self.remote_url.rstrip("/")
-        self.http_session = requests.Session()
+        self.http_session = base.RemoteSession()
         self.harvest_documents = bool(harvest_documents)
         self.harvest_datasets = bool(harvest_datasets)
         self.copy_datasets = bool(copy_datasets)
@@ -123,7 +123,7 @@ class OgcWmsHarvester(base.BaseHarvesterWorker):
             **kwargs
     ):
         super().__init__(*args, **kwargs)
-        self.http_session = requests.Session()
+        self.http_session = base.RemoteSession()
         self.http_session.headers = {
             "Content-Type": "application/xml"
         }
@@ -252,6 +252,7 @@ class OgcWmsHarvester(base.BaseHarvesterWorker):
                     title=title,
                     abstract=layer['abstract'],
                     resource_type='layers',
+                    remote_fingerprint=base.get_fingerprint(layer),
                 )
             )
         return resources
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.16 on 2022-11-07 10:21
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('harvesting', '0049_alter_harvester_harvester_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harvester',
+            name='harvesting_chunk_size',
+            field=models.PositiveIntegerField(default=10, help_text='Number of resources harvested by each harvesting task, one after the other and with the same harvester worker (thus reusing its connections to the remote service)', validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddField(
+            model_name='harvester',
+            name='harvesting_concurrency',
+            field=models.PositiveIntegerField(default=0, help_text='Maximum number of harvesting tasks to be run in parallel. Set to 0 in order to let the celery workers run as many of them as they can'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2022-11-08 09:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('harvesting', '0050_harvester_harvesting_chunk_size_concurrency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AsynchronousHarvestingSessionEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('message', models.TextField()),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='harvesting.asynchronousharvestingsession')),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+    ]
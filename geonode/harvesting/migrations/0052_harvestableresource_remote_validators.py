@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2022-11-10 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('harvesting', '0051_asynchronousharvestingsessionevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harvestableresource',
+            name='remote_etag',
+            field=models.CharField(blank=True, help_text='ETag of the remote resource when it was last harvested', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='harvestableresource',
+            name='remote_last_modified',
+            field=models.CharField(blank=True, help_text='Last-Modified date of the remote resource when it was last harvested', max_length=255),
+        ),
+    ]
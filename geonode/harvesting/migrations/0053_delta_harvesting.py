@@ -0,0 +1,33 @@
+# Generated by Django 3.2.16 on 2022-11-14 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('harvesting', '0052_harvestableresource_remote_validators'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='harvester',
+            name='delta_harvesting',
+            field=models.BooleanField(default=False, help_text='Only harvest the resources that have been modified on the remote service since their last successful harvesting. This relies on the modification fingerprint reported by the harvester worker when refreshing the harvestable resources - resources without a fingerprint are always harvested'),
+        ),
+        migrations.AddField(
+            model_name='asynchronousharvestingsession',
+            name='records_skipped',
+            field=models.IntegerField(default=0, editable=False, help_text='Number of records skipped because they have not changed on the remote service'),
+        ),
+        migrations.AddField(
+            model_name='harvestableresource',
+            name='remote_fingerprint',
+            field=models.CharField(blank=True, help_text='Modification fingerprint (e.g. last modification date or checksum) of the remote resource, as reported when the harvestable resources were last refreshed', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='harvestableresource',
+            name='harvested_fingerprint',
+            field=models.CharField(blank=True, help_text='Modification fingerprint of the remote resource when it was last harvested successfully', max_length=255),
+        ),
+    ]
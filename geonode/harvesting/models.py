@@ -26,6 +26,7 @@ import jsonschema.exceptions
 from django.conf import settings
 from django.contrib import admin
 from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
 from django.utils.module_loading import import_string
@@ -123,6 +124,31 @@ class Harvester(models.Model):
         ),
         default=False,
     )
+    harvesting_chunk_size = models.PositiveIntegerField(
+        help_text=_(
+            "Number of resources harvested by each harvesting task, one after the other "
+            "and with the same harvester worker (thus reusing its connections to the "
+            "remote service)"
+        ),
+        default=10,
+        validators=[MinValueValidator(1)]
+    )
+    harvesting_concurrency = models.PositiveIntegerField(
+        help_text=_(
+            "Maximum number of harvesting tasks to be run in parallel. Set to 0 in "
+            "order to let the celery workers run as many of them as they can"
+        ),
+        default=0
+    )
+    delta_harvesting = models.BooleanField(
+        help_text=_(
+            "Only harvest the resources that have been modified on the remote service "
+            "since their last successful harvesting. This relies on the modification "
+            "fingerprint reported by the harvester worker when refreshing the harvestable "
+            "resources - resources without a fingerprint are always harvested"
+        ),
+        default=False
+    )
     last_updated = models.DateTimeField(
         help_text=_("Date of last update to the harvester configuration."),
         auto_now=True
@@ -386,6 +412,11 @@ class AsynchronousHarvestingSession(models.Model):
         default=0,
         help_text=_("Number of records that have already been processed")
     )
+    records_skipped = models.IntegerField(
+        default=0,
+        editable=False,
+        help_text=_("Number of records skipped because they have not changed on the remote service")
+    )
 
     @admin.display(description="Progress (%)")
     def get_progress_percentage(self) -> int:
@@ -448,6 +479,33 @@ class AsynchronousHarvestingSession(models.Model):
         self.save()
 
 
+class AsynchronousHarvestingSessionEvent(models.Model):
+    """Append-only log of an asynchronous session.
+
+    Messages are recorded as new rows instead of being appended to the session's
+    `details`, which would mean rewriting an ever-growing text under a row lock
+    on every update. Events older than `HARVESTING_SESSION_EVENTS_RETENTION_DAYS`
+    are periodically deleted.
+
+    """
+
+    MAX_MESSAGE_LENGTH = 2000
+
+    session = models.ForeignKey(
+        AsynchronousHarvestingSession,
+        on_delete=models.CASCADE,
+        related_name="events"
+    )
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    message = models.TextField()
+
+    class Meta:
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"{self.session_id} - {self.created} - {self.message[:50]}"
+
+
 class HarvestableResource(models.Model):
     STATUS_READY = "ready"
     STATUS_UPDATING_HARVESTABLE_RESOURCE = "updating-harvestable-resource"
@@ -494,6 +552,29 @@ class HarvestableResource(models.Model):
         ),
         blank=True
     )
+    remote_etag = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("ETag of the remote resource when it was last harvested")
+    )
+    remote_last_modified = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("Last-Modified date of the remote resource when it was last harvested")
+    )
+    remote_fingerprint = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_(
+            "Modification fingerprint (e.g. last modification date or checksum) of the "
+            "remote resource, as reported when the harvestable resources were last refreshed"
+        )
+    )
+    harvested_fingerprint = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text=_("Modification fingerprint of the remote resource when it was last harvested successfully")
+    )
 
     class Meta:
         constraints = [
@@ -18,20 +18,19 @@
 #########################################################################
 
 import math
+import time
 import logging
 import typing
+import datetime as dt
 
-from celery import chord
+from celery import chain, chord
 from django.core.exceptions import ValidationError
-from django.db.models import (
-    F,
-    Value,
-)
-from django.db.models.functions import Concat
+from django.db.models import F, OuterRef, Subquery
 from django.utils import timezone
 from geonode.celery_app import app
 
 from . import models
+from .config import get_setting
 from .harvesters import base
 
 logger = logging.getLogger(__name__)
@@ -51,39 +50,108 @@ def harvesting_scheduler(self):
     settings. The default value is 0.5, which means that this function is called every
     thirty seconds.
 
+    The due harvesters are found with a single query and the availability checks are
+    dispatched as separate tasks, so that a slow remote service does not block the tick.
+
     """
 
     logger.debug("+++++ harvesting_dispatcher starting... +++++")
-    for harvester in models.Harvester.objects.all():
-        if harvester.is_availability_check_due():
-            logger.debug(f"{harvester.name} - Updating availability...")
-            available = harvester.update_availability()
-            logger.debug(f"{harvester.name} - is {'not ' if not available else ''}available")
-        else:
-            logger.debug(f"{harvester.name} - No need to update availability yet")
-        if harvester.scheduling_enabled:
-            logger.debug(f"{harvester.name} - scheduling_enabled: {harvester.scheduling_enabled!r}")
-            if harvester.is_harvestable_resources_refresh_due():
-                logger.debug(f"{harvester.name} - Initiating update of harvestable resources...")
-                try:
-                    harvester.initiate_update_harvestable_resources()
-                except RuntimeError:
-                    logger.exception(msg=f"{harvester.name} - Could not initiate the update of harvestable resources")
-            else:
-                logger.debug(f"{harvester.name} - No need to update harvestable resources yet")
-            if harvester.is_harvesting_due():
-                logger.debug(f"{harvester.name} - initiating harvesting...")
-                try:
-                    harvester.initiate_perform_harvesting()
-                except RuntimeError:
-                    logger.exception(msg=f"{harvester.name} - Could not initiate harvesting")
-            else:
-                logger.debug(f"{harvester.name} - No need to harvest yet")
-        else:
-            logger.debug(f"{harvester.name} - Scheduling is disabled for this harvester, skipping...")
+    tick_started = time.monotonic()
+    now_ = timezone.now()
+    availability_due, refresh_due, harvesting_due = _get_due_harvesters(now_)
+    if availability_due:
+        # NOTE: the harvesters are marked as checked right away, so that the next ticks do
+        # not dispatch the same checks again while these are still queued
+        models.Harvester.objects.filter(pk__in=availability_due).update(last_checked_availability=now_)
+        timeout_seconds = get_setting("HARVESTER_AVAILABILITY_CHECK_TIMEOUT_SECONDS")
+        for harvester_id in availability_due:
+            logger.debug(f"Harvester {harvester_id} - Dispatching availability check...")
+            check_harvester_available.apply_async(
+                args=(harvester_id,),
+                kwargs={"timeout_seconds": timeout_seconds},
+                expires=get_setting("HARVESTER_SCHEDULER_FREQUENCY_MINUTES") * 60,
+                soft_time_limit=timeout_seconds * 2,
+                time_limit=timeout_seconds * 3
+            )
+    for harvester in models.Harvester.objects.filter(pk__in=refresh_due | harvesting_due):
+        if harvester.pk in refresh_due:
+            logger.debug(f"{harvester.name} - Initiating update of harvestable resources...")
+            try:
+                harvester.initiate_update_harvestable_resources()
+            except RuntimeError:
+                logger.exception(msg=f"{harvester.name} - Could not initiate the update of harvestable resources")
+        if harvester.pk in harvesting_due:
+            logger.debug(f"{harvester.name} - initiating harvesting...")
+            try:
+                harvester.initiate_perform_harvesting()
+            except RuntimeError:
+                logger.exception(msg=f"{harvester.name} - Could not initiate harvesting")
+    deleted_events = delete_expired_asynchronous_session_events()
+    logger.debug(f"Deleted {deleted_events} expired harvesting session events")
+    tick_duration = time.monotonic() - tick_started
+    tick_message = (
+        f"harvesting_scheduler tick took {tick_duration:.3f}s - availability checks: {len(availability_due)}, "
+        f"refresh sessions: {len(refresh_due)}, harvesting sessions: {len(harvesting_due)}"
+    )
+    if tick_duration > get_setting("HARVESTER_SCHEDULER_FREQUENCY_MINUTES") * 60:
+        logger.warning(f"{tick_message} - longer than the scheduler frequency")
+    else:
+        logger.info(tick_message)
     logger.debug("+++++ harvesting_dispatcher ending... +++++")
 
 
+def _get_due_harvesters(
+        now_: dt.datetime
+) -> typing.Tuple[typing.Set[int], typing.Set[int], typing.Set[int]]:
+    """Return the ids of the harvesters that are due for an availability check, a refresh and a harvesting.
+
+    The latest sessions of all the harvesters are fetched in a single query. This
+    mirrors the `Harvester.is_*_due()` methods.
+
+    """
+
+    def latest_session_started(session_type: str):
+        return Subquery(
+            models.AsynchronousHarvestingSession.objects.filter(
+                harvester=OuterRef("pk"),
+                session_type=session_type
+            ).order_by("-started").values("started")[:1]
+        )
+
+    availability_due = set()
+    refresh_due = set()
+    harvesting_due = set()
+    harvesters = models.Harvester.objects.annotate(
+        latest_refresh_started=latest_session_started(
+            models.AsynchronousHarvestingSession.TYPE_DISCOVER_HARVESTABLE_RESOURCES),
+        latest_harvesting_started=latest_session_started(
+            models.AsynchronousHarvestingSession.TYPE_HARVESTING),
+    ).values_list(
+        "pk",
+        "scheduling_enabled",
+        "last_checked_availability",
+        "check_availability_frequency",
+        "latest_refresh_started",
+        "refresh_harvestable_resources_update_frequency",
+        "latest_harvesting_started",
+        "harvesting_session_update_frequency",
+    )
+    for (pk, scheduling_enabled, last_checked_availability, check_availability_frequency,
+         latest_refresh_started, refresh_frequency, latest_harvesting_started, harvesting_frequency) in harvesters:
+        if _is_due(last_checked_availability, check_availability_frequency, now_):
+            availability_due.add(pk)
+        if scheduling_enabled:
+            if _is_due(latest_refresh_started, refresh_frequency, now_):
+                refresh_due.add(pk)
+            if _is_due(latest_harvesting_started, harvesting_frequency, now_):
+                harvesting_due.add(pk)
+    return availability_due, refresh_due, harvesting_due
+
+
+def _is_due(latest: typing.Optional[dt.datetime], frequency_minutes: int, now_: dt.datetime) -> bool:
+    return latest is None or latest + dt.timedelta(minutes=frequency_minutes) < now_
+
+
 @app.task(
     bind=True,
     queue='geonode',
@@ -103,7 +171,9 @@ def harvesting_dispatcher(
     The implementation briefly consists of:
 
     - start a harvesting session
-    - determine which of the known harvestable resources have to be harvested
+    - determine which of the known harvestable resources have to be harvested. With
+      delta harvesting, the resources whose remote fingerprint did not change since
+      their last successful harvesting are skipped
     - schedule each harvestable resource to be harvested asynchronously
     - when all resources have been harvested, finish the harvesting session
 
@@ -116,8 +186,22 @@ def harvesting_dispatcher(
 
     session = models.AsynchronousHarvestingSession.objects.get(pk=harvesting_session_id)
     harvester = session.harvester
-    harvestable_resources = list(harvester.harvestable_resources.filter(
-        should_be_harvested=True).values_list("id", flat=True))
+    to_harvest = harvester.harvestable_resources.filter(should_be_harvested=True)
+    if harvester.delta_harvesting:
+        unchanged = to_harvest.filter(
+            geonode_resource__isnull=False,
+            last_harvesting_succeeded=True,
+            harvested_fingerprint=F("remote_fingerprint")
+        ).exclude(remote_fingerprint="")
+        num_skipped = unchanged.count()
+        if num_skipped > 0:
+            to_harvest = to_harvest.exclude(pk__in=unchanged.values("pk"))
+            message = f"Skipping {num_skipped} resources that have not changed since their last harvesting"
+            logger.debug(message)
+            models.AsynchronousHarvestingSession.objects.filter(pk=harvesting_session_id).update(
+                records_skipped=num_skipped)
+            add_asynchronous_session_events(harvesting_session_id, [message])
+    harvestable_resources = list(to_harvest.values_list("id", flat=True))
     if len(harvestable_resources) > 0:
         harvest_resources.apply_async(args=(harvestable_resources, harvesting_session_id))
     else:
@@ -152,13 +236,23 @@ def harvest_resources(
                 session.status = session.STATUS_ON_GOING
                 session.total_records_to_process = len(harvestable_resource_ids)
                 session.save()
-                resource_tasks = []
-                for harvestable_resource_id in harvestable_resource_ids:
-                    resource_tasks.append(
-                        _harvest_resource.signature(
-                            args=(harvestable_resource_id, harvesting_session_id)
+                # NOTE: resources are harvested in chunks, each one by a single task
+                # with its own harvester worker. When the concurrency is limited, the
+                # chunks are spread over as many chains of tasks
+                chunk_size = max(harvester.harvesting_chunk_size or 1, 1)
+                chunk_tasks = []
+                for index in range(0, len(harvestable_resource_ids), chunk_size):
+                    chunk_tasks.append(
+                        _harvest_resources_chunk.signature(
+                            args=(harvestable_resource_ids[index:index + chunk_size], harvesting_session_id),
+                            immutable=True
                         )
                     )
+                concurrency = harvester.harvesting_concurrency
+                if concurrency and len(chunk_tasks) > concurrency:
+                    resource_tasks = [chain(*chunk_tasks[lane::concurrency]) for lane in range(concurrency)]
+                else:
+                    resource_tasks = chunk_tasks
                 harvesting_finalizer = _finish_harvesting.signature(
                     args=(harvesting_session_id,),
                     immutable=True
@@ -210,37 +304,14 @@ def _harvest_resource(
     if session.status != session.STATUS_ABORTING:
         harvestable_resource = models.HarvestableResource.objects.get(pk=harvestable_resource_id)
         worker: base.BaseHarvesterWorker = harvestable_resource.harvester.get_harvester_worker()
-        harvested_resource_info = worker.get_resource(harvestable_resource)
-        now_ = timezone.now()
-        if harvested_resource_info is not None:
-            if worker.should_copy_resource(harvestable_resource):
-                copied_path = worker.copy_resource(harvestable_resource, harvested_resource_info)
-                if copied_path is not None:
-                    harvested_resource_info.copied_resources.append(copied_path)
-            try:
-                worker.update_geonode_resource(
-                    harvested_resource_info,
-                    harvestable_resource,
-                )
-                result = True
-                details = ""
-            except (RuntimeError, ValidationError) as exc:
-                logger.error(msg="Unable to update geonode resource")
-                result = False
-                details = str(exc)
-            harvesting_message = f"{harvestable_resource.title}({harvestable_resource_id}) - {'Success' if result else details}"
+        _, fetched = next(base.prefetch_resources(worker, [harvestable_resource]))
+        result, harvesting_message = _harvest_resource_with_worker(worker, harvestable_resource, fetched)
+        if harvesting_message is not None:
             update_asynchronous_session(
                 harvesting_session_id,
                 additional_processed_records=1 if result else 0,
                 additional_details=harvesting_message
             )
-            harvestable_resource.last_harvesting_message = f"{now_} - {harvesting_message}"
-            harvestable_resource.last_harvesting_succeeded = result
-        else:
-            harvestable_resource.last_harvesting_message = f"{now_}Harvesting failed"
-            harvestable_resource.last_harvesting_succeeded = False
-        harvestable_resource.last_harvested = now_
-        harvestable_resource.save()
     else:
         message = (
             f"Skipping harvesting of resource {harvestable_resource_id} since the "
@@ -250,6 +321,141 @@ def _harvest_resource(
         logger.debug(message)
 
 
+@app.task(
+    bind=True,
+    queue='geonode',
+    acks_late=False,
+    ignore_result=False,
+)
+def _harvest_resources_chunk(
+        self,
+        harvestable_resource_ids: typing.List[int],
+        harvesting_session_id: int
+):
+    """Harvest a chunk of resources, all with the same harvester worker.
+
+    The details of the remote resources are fetched concurrently, ahead of their
+    processing. The session progress is updated once, when the whole chunk has been
+    processed.
+
+    """
+
+    session = models.AsynchronousHarvestingSession.objects.select_related(
+        "harvester").get(pk=harvesting_session_id)
+    harvester = session.harvester
+    worker: base.BaseHarvesterWorker = harvester.get_harvester_worker()
+    harvestable_resources = {
+        r.pk: r for r in models.HarvestableResource.objects.filter(pk__in=harvestable_resource_ids)}
+    to_harvest = []
+    for harvestable_resource_id in harvestable_resource_ids:
+        harvestable_resource = harvestable_resources.get(harvestable_resource_id)
+        if harvestable_resource is not None:
+            harvestable_resource.harvester = harvester
+            to_harvest.append(harvestable_resource)
+    processed = 0
+    messages = []
+    fetched_resources = base.prefetch_resources(worker, to_harvest)
+    try:
+        for index, (harvestable_resource, fetched) in enumerate(fetched_resources):
+            session_status = models.AsynchronousHarvestingSession.objects.filter(
+                pk=harvesting_session_id).values_list("status", flat=True).first()
+            if session_status == session.STATUS_ABORTING:
+                message = (
+                    f"Skipping harvesting of resources {[r.pk for r in to_harvest[index:]]} since the "
+                    f"session has been aborted"
+                )
+                messages.append(message)
+                logger.debug(message)
+                break
+            try:
+                result, harvesting_message = _harvest_resource_with_worker(worker, harvestable_resource, fetched)
+            except Exception as exc:
+                # NOTE: a failure must not prevent the other resources of the chunk from being harvested
+                logger.exception(msg=f"Unable to harvest resource {harvestable_resource.pk}")
+                now_ = timezone.now()
+                result = False
+                harvesting_message = f"{harvestable_resource.title}({harvestable_resource.pk}) - {exc}"
+                models.HarvestableResource.objects.filter(pk=harvestable_resource.pk).update(
+                    last_harvested=now_,
+                    last_harvesting_message=f"{now_} - {harvesting_message}",
+                    last_harvesting_succeeded=False,
+                    remote_etag="",
+                    remote_last_modified="",
+                    harvested_fingerprint=""
+                )
+            processed += 1 if result else 0
+            if harvesting_message is not None:
+                messages.append(harvesting_message)
+    finally:
+        fetched_resources.close()
+    update_asynchronous_session(
+        harvesting_session_id,
+        additional_processed_records=processed,
+        additional_details=messages or None
+    )
+
+
+def _harvest_resource_with_worker(
+        worker: base.BaseHarvesterWorker,
+        harvestable_resource: models.HarvestableResource,
+        fetched: typing.Any
+) -> typing.Tuple[bool, typing.Optional[str]]:
+    """Harvest a single resource with the input harvester worker.
+
+    `fetched` is the outcome of fetching the remote resource, as yielded by the
+    `base.prefetch_resources()`. Returns whether the harvesting succeeded along
+    with the message for the harvesting session, if any.
+
+    """
+
+    now_ = timezone.now()
+    if isinstance(fetched, base.RemoteResourceNotModified):
+        harvesting_message = f"{harvestable_resource.title}({harvestable_resource.pk}) - Not modified"
+        harvestable_resource.last_harvesting_message = f"{now_} - {harvesting_message}"
+        harvestable_resource.last_harvesting_succeeded = True
+        harvestable_resource.harvested_fingerprint = harvestable_resource.remote_fingerprint
+        harvestable_resource.last_harvested = now_
+        harvestable_resource.save()
+        return True, harvesting_message
+    elif isinstance(fetched, Exception):
+        raise fetched
+    harvested_resource_info = fetched
+    result = False
+    harvesting_message = None
+    if harvested_resource_info is not None:
+        if worker.should_copy_resource(harvestable_resource):
+            copied_path = worker.copy_resource(harvestable_resource, harvested_resource_info)
+            if copied_path is not None:
+                harvested_resource_info.copied_resources.append(copied_path)
+        try:
+            worker.update_geonode_resource(
+                harvested_resource_info,
+                harvestable_resource,
+            )
+            result = True
+            details = ""
+        except (RuntimeError, ValidationError) as exc:
+            logger.error(msg="Unable to update geonode resource")
+            result = False
+            details = str(exc)
+        harvesting_message = f"{harvestable_resource.title}({harvestable_resource.pk}) - {'Success' if result else details}"
+        harvestable_resource.last_harvesting_message = f"{now_} - {harvesting_message}"
+        harvestable_resource.last_harvesting_succeeded = result
+    else:
+        harvestable_resource.last_harvesting_message = f"{now_}Harvesting failed"
+        harvestable_resource.last_harvesting_succeeded = False
+    if harvestable_resource.last_harvesting_succeeded:
+        harvestable_resource.harvested_fingerprint = harvestable_resource.remote_fingerprint
+    else:
+        # NOTE: make sure the resource is fully fetched again on the next harvesting
+        harvestable_resource.remote_etag = ""
+        harvestable_resource.remote_last_modified = ""
+        harvestable_resource.harvested_fingerprint = ""
+    harvestable_resource.last_harvested = now_
+    harvestable_resource.save()
+    return result, harvesting_message
+
+
 @app.task(
     bind=True,
     queue='geonode',
@@ -325,9 +531,9 @@ def _handle_harvesting_error(self, task_id, *args, **kwargs):
     queue='geonode',
     acks_late=False,
 )
-def check_harvester_available(self, harvester_id: int):
+def check_harvester_available(self, harvester_id: int, timeout_seconds: typing.Optional[int] = 5):
     harvester = models.Harvester.objects.get(pk=harvester_id)
-    available = harvester.update_availability()
+    available = harvester.update_availability(timeout_seconds=timeout_seconds)
     logger.info(
         f"Harvester {harvester!r}: remote server is "
         f"{'' if available else 'not '}available"
@@ -415,24 +621,7 @@ def _update_harvestable_resources_batch(
         except base.HarvestingException:
             logger.exception("Could not retrieve list of remote resources.")
         else:
-            processed = 0
-            for remote_resource in found_resources:
-                resource, created = models.HarvestableResource.objects.get_or_create(
-                    harvester=harvester,
-                    unique_identifier=remote_resource.unique_identifier,
-                    title=remote_resource.title,
-                    defaults={
-                        "should_be_harvested": harvester.harvest_new_resources_by_default,
-                        "remote_resource_type": remote_resource.resource_type,
-                        "last_refreshed": timezone.now()
-                    }
-                )
-                processed += 1
-                # NOTE: make sure to save the resource because we need to have its
-                # `last_updated` property be refreshed - this is done in order to be able
-                # to compare when a resource has been found
-                resource.last_refreshed = timezone.now()
-                resource.save()
+            processed = refresh_harvestable_resources(harvester, found_resources)
             update_asynchronous_session(refresh_session_id, additional_processed_records=processed)
     else:
         logger.info("The refresh session has been asked to abort, so skipping...")
@@ -496,6 +685,69 @@ def _handle_harvestable_resources_update_error(self, task_id, *args, **kwargs):
     )
 
 
+def refresh_harvestable_resources(
+        harvester: models.Harvester,
+        found_resources: typing.List[base.BriefRemoteResource]
+) -> int:
+    """Upsert a page of remote resources as harvestable resources of the harvester.
+
+    The whole page is refreshed with a constant number of queries: the new resources
+    are bulk created, the known ones get their `last_refreshed` property updated at
+    once - it is what `_delete_stale_harvestable_resources()` relies upon in order to
+    find out which resources have not been found - and the ones whose title or
+    modification fingerprint changed on the remote service are bulk updated.
+
+    """
+
+    remote_resources = {}
+    for remote_resource in found_resources:
+        remote_resources[remote_resource.unique_identifier] = remote_resource
+    if not remote_resources:
+        return 0
+    now_ = timezone.now()
+    existing = {
+        unique_identifier: (pk, title, fingerprint) for pk, unique_identifier, title, fingerprint in
+        models.HarvestableResource.objects.filter(
+            harvester=harvester,
+            unique_identifier__in=remote_resources.keys()
+        ).values_list("pk", "unique_identifier", "title", "remote_fingerprint")
+    }
+    # NOTE: conflicts are ignored since the same resource may have been
+    # listed by a concurrent batch in the meantime
+    models.HarvestableResource.objects.bulk_create(
+        [
+            models.HarvestableResource(
+                harvester=harvester,
+                unique_identifier=unique_identifier,
+                title=remote_resource.title,
+                should_be_harvested=harvester.harvest_new_resources_by_default,
+                remote_resource_type=remote_resource.resource_type,
+                remote_fingerprint=(remote_resource.remote_fingerprint or "")[:255],
+                last_refreshed=now_
+            ) for unique_identifier, remote_resource in remote_resources.items()
+            if unique_identifier not in existing
+        ],
+        ignore_conflicts=True
+    )
+    if existing:
+        models.HarvestableResource.objects.filter(
+            harvester=harvester,
+            unique_identifier__in=existing.keys()
+        ).update(last_refreshed=now_, last_updated=now_)
+        changed = []
+        for unique_identifier, (pk, title, fingerprint) in existing.items():
+            remote_resource = remote_resources[unique_identifier]
+            remote_fingerprint = (remote_resource.remote_fingerprint or "")[:255]
+            if remote_resource.title != title or remote_fingerprint != fingerprint:
+                changed.append(
+                    models.HarvestableResource(
+                        pk=pk, title=remote_resource.title, remote_fingerprint=remote_fingerprint)
+                )
+        if changed:
+            models.HarvestableResource.objects.bulk_update(changed, ["title", "remote_fingerprint"])
+    return len(found_resources)
+
+
 def _delete_stale_harvestable_resources(harvester: models.Harvester):
     """Delete harvestable resources that haven't been found on the current refresh.
 
@@ -518,14 +770,17 @@ def _delete_stale_harvestable_resources(harvester: models.Harvester):
     logger.debug(f"now: {timezone.now()}")
     to_remove = models.HarvestableResource.objects.filter(
         harvester=harvester, last_refreshed__lte=previously_checked_at)
-    for harvestable_resource in to_remove:
-        # NOTE: Iterating on each resource and calling its `delete()` method instead of
-        # just calling `delete()` on the queryset because this way we can be sure that
-        # the instance's `delete()` method is called (django may not call
-        # `instance.delete()` when using the queryset directly, for performance
-        # reasons). This is because `HarvestableResource.delete()` has the custom logic
-        # to check whether the related GeoNode resource should also be deleted or not
-        harvestable_resource.delete()
+    if harvester.delete_orphan_resources_automatically:
+        # NOTE: this is the custom logic of `HarvestableResource.delete()`, which is
+        # not called when deleting the queryset; only the resources having something
+        # to clean up are visited, with a single worker instance
+        worker = harvester.get_harvester_worker()
+        for harvestable_resource in to_remove.select_related("geonode_resource").iterator():
+            if harvestable_resource.geonode_resource is not None:
+                harvestable_resource.geonode_resource.delete()
+            worker.finalize_harvestable_resource_deletion(harvestable_resource)
+    deleted, _ = to_remove.delete()
+    logger.debug(f"Deleted {deleted} stale harvestable resources")
 
 
 def finish_asynchronous_session(
@@ -542,7 +797,8 @@ def finish_asynchronous_session(
     if additional_processed_records is not None:
         update_kwargs["records_done"] = F("records_done") + additional_processed_records
     if final_details is not None:
-        update_kwargs["details"] = Concat("details", Value(f"\n{final_details}"))
+        update_kwargs["details"] = final_details[:models.AsynchronousHarvestingSessionEvent.MAX_MESSAGE_LENGTH]
+        add_asynchronous_session_events(session_id, [final_details])
     models.AsynchronousHarvestingSession.objects.filter(id=session_id).update(**update_kwargs)
     models.Harvester.objects.filter(sessions__pk=session_id).update(
         status=models.Harvester.STATUS_READY)
@@ -552,7 +808,7 @@ def update_asynchronous_session(
         session_id: int,
         total_records_to_process: typing.Optional[int] = None,
         additional_processed_records: typing.Optional[int] = None,
-        additional_details: typing.Optional[str] = None,
+        additional_details: typing.Optional[typing.Union[str, typing.List[str]]] = None,
 ) -> None:
     update_kwargs = {}
     if total_records_to_process is not None:
@@ -560,5 +816,28 @@ def update_asynchronous_session(
     if additional_processed_records is not None:
         update_kwargs["records_done"] = F("records_done") + additional_processed_records
     if additional_details is not None:
-        update_kwargs["details"] = Concat("details", Value(f"\n{additional_details}"))
-    models.AsynchronousHarvestingSession.objects.filter(id=session_id).update(**update_kwargs)
+        add_asynchronous_session_events(
+            session_id, [additional_details] if isinstance(additional_details, str) else additional_details)
+    if update_kwargs:
+        models.AsynchronousHarvestingSession.objects.filter(id=session_id).update(**update_kwargs)
+
+
+def add_asynchronous_session_events(session_id: int, messages: typing.List[str]) -> None:
+    """Append the messages to the session log, with a single insert."""
+    max_length = models.AsynchronousHarvestingSessionEvent.MAX_MESSAGE_LENGTH
+    models.AsynchronousHarvestingSessionEvent.objects.bulk_create(
+        [
+            models.AsynchronousHarvestingSessionEvent(session_id=session_id, message=message[:max_length])
+            for message in messages if message
+        ]
+    )
+
+
+def delete_expired_asynchronous_session_events() -> int:
+    """Delete the session events older than the `HARVESTING_SESSION_EVENTS_RETENTION_DAYS` setting."""
+    retention_days = get_setting("HARVESTING_SESSION_EVENTS_RETENTION_DAYS")
+    if not retention_days:
+        return 0
+    deleted, _ = models.AsynchronousHarvestingSessionEvent.objects.filter(
+        created__lt=timezone.now() - dt.timedelta(days=retention_days)).delete()
+    return deleted
@@ -20,7 +20,10 @@ from unittest import mock
 
 from django.utils import timezone
 
-from geonode.harvesting.harvesters import geonodeharvester
+from geonode.harvesting.harvesters import (
+    base,
+    geonodeharvester,
+)
 from geonode.tests.base import GeoNodeBaseSimpleTestSupport
 
 from .. import models
@@ -62,7 +65,7 @@ class GeoNodeHarvesterWorkerTestCase(GeoNodeBaseSimpleTestSupport):
             )
             harvester.get_harvester_worker()
 
-    @mock.patch("geonode.harvesting.harvesters.geonodeharvester.requests.Session")
+    @mock.patch("geonode.harvesting.harvesters.geonodeharvester.base.RemoteSession")
     def test_check_availability_works_when_response_includes_layers_object(self, mock_requests_session):
         mock_response = mock.MagicMock()
         mock_response.json.return_value = {"layers": []}
@@ -73,7 +76,7 @@ class GeoNodeHarvesterWorkerTestCase(GeoNodeBaseSimpleTestSupport):
         result = worker.check_availability()
         self.assertEqual(result, True)
 
-    @mock.patch("geonode.harvesting.harvesters.geonodeharvester.requests.Session")
+    @mock.patch("geonode.harvesting.harvesters.geonodeharvester.base.RemoteSession")
     def test_check_availability_fails_when_response_does_not_include_layers_object(self, mock_requests_session):
         mock_response = mock.MagicMock()
         mock_response.json.return_value = {}
@@ -83,3 +86,22 @@ class GeoNodeHarvesterWorkerTestCase(GeoNodeBaseSimpleTestSupport):
         worker = geonodeharvester.GeonodeLegacyHarvester(base_url, harvester_id=None)
         result = worker.check_availability()
         self.assertEqual(result, False)
+
+    @mock.patch("geonode.harvesting.harvesters.geonodeharvester.base.RemoteSession")
+    def test_get_resource_sends_conditional_request(self, mock_requests_session):
+        mock_response = mock.MagicMock()
+        mock_response.status_code = 304
+        mock_requests_session.return_value.get.return_value = mock_response
+        harvestable_resource = models.HarvestableResource(
+            unique_identifier="1",
+            remote_resource_type=geonodeharvester.GeoNodeResourceType.DATASET.value,
+            geonode_resource_id=1,
+            last_harvesting_succeeded=True,
+            remote_etag='"fake-etag"',
+        )
+
+        worker = geonodeharvester.GeonodeLegacyHarvester("http://fake-url3", harvester_id=None)
+        with self.assertRaises(base.RemoteResourceNotModified):
+            worker.get_resource(harvestable_resource)
+        headers = mock_requests_session.return_value.get.call_args[1]["headers"]
+        self.assertEqual(headers, {"If-None-Match": '"fake-etag"'})
@@ -16,10 +16,13 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #########################################################################
+from datetime import timedelta
 from unittest import mock
+from uuid import uuid4
 
 from django.contrib.auth import get_user_model
 from django.utils.timezone import now
+from geonode.base.models import ResourceBase
 from geonode.tests.base import (
     GeoNodeBaseTestSupport
 )
@@ -28,6 +31,7 @@ from .. import (
     models,
     tasks,
 )
+from ..harvesters import base
 
 
 class TasksTestCase(GeoNodeBaseTestSupport):
@@ -102,6 +106,113 @@ class TasksTestCase(GeoNodeBaseTestSupport):
             mock_worker.get_resource.assert_called()
             mock_worker.update_geonode_resource.assert_not_called()
 
+    def test_harvest_resources_chunk_reuses_worker(self):
+        """Test that the resources of a chunk are harvested with a single worker and a single session update."""
+        harvestable_resource_ids = list(
+            models.HarvestableResource.objects.filter(harvester=self.harvester).values_list("id", flat=True))
+        mock_worker = mock.MagicMock()
+        mock_worker.get_resource.return_value = mock.MagicMock()
+        mock_worker.should_copy_resource.return_value = False
+        with mock.patch.object(models.Harvester, "get_harvester_worker", return_value=mock_worker) as mock_get_worker, \
+                mock.patch("geonode.harvesting.tasks.update_asynchronous_session") as mock_update_asynchronous_session:
+            tasks._harvest_resources_chunk(harvestable_resource_ids, self.harvesting_session.id)
+            mock_get_worker.assert_called_once()
+            self.assertEqual(mock_worker.update_geonode_resource.call_count, len(harvestable_resource_ids))
+            mock_update_asynchronous_session.assert_called_once()
+            self.assertEqual(
+                mock_update_asynchronous_session.call_args[1]["additional_processed_records"],
+                len(harvestable_resource_ids))
+        for harvestable_resource in models.HarvestableResource.objects.filter(harvester=self.harvester):
+            self.assertTrue(harvestable_resource.last_harvesting_succeeded)
+
+    def test_harvest_resources_chunk_skips_not_modified_resources(self):
+        """Resources that have not changed on the remote are not updated locally, yet count as processed."""
+        harvestable_resource_ids = list(
+            models.HarvestableResource.objects.filter(harvester=self.harvester).values_list("id", flat=True))
+        mock_worker = mock.MagicMock()
+        mock_worker.get_resource.side_effect = base.RemoteResourceNotModified()
+        with mock.patch.object(models.Harvester, "get_harvester_worker", return_value=mock_worker), \
+                mock.patch("geonode.harvesting.tasks.update_asynchronous_session") as mock_update_asynchronous_session, \
+                self.settings(HARVESTER_FETCH_CONCURRENCY=2):
+            tasks._harvest_resources_chunk(harvestable_resource_ids, self.harvesting_session.id)
+            self.assertEqual(mock_worker.get_resource.call_count, len(harvestable_resource_ids))
+            mock_worker.update_geonode_resource.assert_not_called()
+            self.assertEqual(
+                mock_update_asynchronous_session.call_args[1]["additional_processed_records"],
+                len(harvestable_resource_ids))
+        for harvestable_resource in models.HarvestableResource.objects.filter(harvester=self.harvester):
+            self.assertTrue(harvestable_resource.last_harvesting_succeeded)
+            self.assertIn("Not modified", harvestable_resource.last_harvesting_message)
+
+    @mock.patch("geonode.harvesting.tasks.chain")
+    @mock.patch("geonode.harvesting.tasks.chord")
+    def test_harvest_resources_sends_chunked_requests(self, mock_chord, mock_chain):
+        """Verify that the harvesting chord has one member per chunk, spread over as many chains as the concurrency."""
+        models.Harvester.objects.filter(pk=self.harvester.pk).update(harvesting_chunk_size=2, harvesting_concurrency=2)
+        with mock.patch.object(models.Harvester, "update_availability", return_value=True):
+            tasks.harvest_resources(list(range(1, 10)), self.harvesting_session.id)
+        # 5 chunks over 2 chains
+        self.assertEqual(mock_chain.call_count, 2)
+        self.assertEqual([len(c[0]) for c in mock_chain.call_args_list], [3, 2])
+        self.assertEqual(len(mock_chord.call_args[0][0]), 2)
+        mock_chord.return_value.apply_async.assert_called()
+
+    @mock.patch("geonode.harvesting.tasks.harvest_resources")
+    def test_harvesting_dispatcher_skips_unchanged_resources(self, mock_harvest_resources):
+        """With delta harvesting, only the resources modified since their last harvesting are scheduled."""
+        harvester = models.Harvester.objects.create(
+            remote_url="fake delta url",
+            name="delta harvester",
+            default_owner=self.harvester_owner,
+            harvester_type=self.harvester_type,
+            delta_harvesting=True,
+        )
+        geonode_resource = ResourceBase.objects.create(uuid=str(uuid4()), owner=self.harvester_owner)
+        resources = {}
+        for name, harvested_fingerprint, remote_fingerprint in (
+                ("unchanged", "2022-01-01", "2022-01-01"),
+                ("changed", "2022-01-01", "2022-02-01"),
+                ("unknown", "", "")):
+            resources[name] = models.HarvestableResource.objects.create(
+                unique_identifier=name,
+                title=name,
+                harvester=harvester,
+                should_be_harvested=True,
+                geonode_resource=geonode_resource,
+                last_harvesting_succeeded=True,
+                harvested_fingerprint=harvested_fingerprint,
+                remote_fingerprint=remote_fingerprint,
+                last_refreshed=now()
+            )
+        session = models.AsynchronousHarvestingSession.objects.create(
+            harvester=harvester,
+            session_type=models.AsynchronousHarvestingSession.TYPE_HARVESTING
+        )
+        tasks.harvesting_dispatcher(session.id)
+        scheduled = mock_harvest_resources.apply_async.call_args[1]["args"][0]
+        self.assertEqual(sorted(scheduled), sorted([resources["changed"].pk, resources["unknown"].pk]))
+        session.refresh_from_db()
+        self.assertEqual(session.records_skipped, 1)
+
+    def test_update_asynchronous_session_appends_events(self):
+        session = models.AsynchronousHarvestingSession.objects.create(
+            harvester=self.harvester,
+            session_type=models.AsynchronousHarvestingSession.TYPE_HARVESTING
+        )
+        tasks.update_asynchronous_session(
+            session.id, additional_processed_records=2, additional_details=["first", "second"])
+        tasks.update_asynchronous_session(session.id, additional_details="third")
+        session.refresh_from_db()
+        self.assertEqual(session.records_done, 2)
+        self.assertEqual(session.details, "")
+        self.assertEqual(list(session.events.values_list("message", flat=True)), ["first", "second", "third"])
+
+        # expired events are deleted
+        session.events.filter(message="first").update(created=now() - timedelta(days=365))
+        with self.settings(HARVESTING_SESSION_EVENTS_RETENTION_DAYS=30):
+            self.assertEqual(tasks.delete_expired_asynchronous_session_events(), 1)
+        self.assertEqual(list(session.events.values_list("message", flat=True)), ["second", "third"])
+
     def test_finish_harvesting_updates_harvester_status(self):
         tasks._finish_harvesting(self.harvesting_session.id)
         self.harvester.refresh_from_db()
@@ -144,16 +255,62 @@ class TasksTestCase(GeoNodeBaseTestSupport):
         mock_chord.assert_called()
         mock_chord.return_value.apply_async.assert_called()
 
-    def test_harvesting_scheduler(self):
-        mock_harvester = mock.MagicMock(spec=models.Harvester).return_value
-        mock_harvester.scheduling_enabled = True
-        mock_harvester.is_harvestable_resources_refresh_due.return_value = True
-        mock_harvester.is_harvesting_due.return_value = True
-        with mock.patch("geonode.harvesting.tasks.models.Harvester.objects") as mock_qs:
-            mock_qs.all.return_value = [mock_harvester]
-            tasks.harvesting_scheduler()
-            mock_harvester.is_availability_check_due.assert_called()
-            mock_harvester.is_harvestable_resources_refresh_due.assert_called()
-            mock_harvester.initiate_update_harvestable_resources.assert_called()
-            mock_harvester.is_harvesting_due.assert_called()
-            mock_harvester.initiate_perform_harvesting.assert_called()
+    @mock.patch("geonode.harvesting.tasks.check_harvester_available")
+    @mock.patch.object(models.Harvester, "initiate_perform_harvesting")
+    @mock.patch.object(models.Harvester, "initiate_update_harvestable_resources")
+    def test_harvesting_scheduler(self, mock_initiate_refresh, mock_initiate_harvesting, mock_check_available):
+        # the harvester has never been checked nor refreshed, but it has just been harvested
+        tasks.harvesting_scheduler()
+        mock_check_available.apply_async.assert_called_once()
+        self.assertEqual(mock_check_available.apply_async.call_args[1]["args"], (self.harvester.pk,))
+        mock_initiate_refresh.assert_called_once()
+        mock_initiate_harvesting.assert_not_called()
+        self.harvester.refresh_from_db()
+        self.assertIsNotNone(self.harvester.last_checked_availability)
+
+        # the availability check is not due anymore, the refresh still is since it was mocked
+        with self.assertNumQueries(1):
+            availability_due, refresh_due, harvesting_due = tasks._get_due_harvesters(now())
+        self.assertEqual(availability_due, set())
+        self.assertEqual(refresh_due, {self.harvester.pk})
+        self.assertEqual(harvesting_due, set())
+
+    def test_refresh_harvestable_resources(self):
+        refreshed_before = now()
+        found_resources = [
+            base.BriefRemoteResource(
+                unique_identifier="fake-identifier-0",
+                title="fake-title-0",
+                resource_type="fake-remote-resource-type"
+            ),
+            base.BriefRemoteResource(
+                unique_identifier="fake-identifier-1",
+                title="new-fake-title-1",
+                resource_type="fake-remote-resource-type"
+            ),
+            base.BriefRemoteResource(
+                unique_identifier="fake-identifier-3",
+                title="fake-title-3",
+                resource_type="fake-remote-resource-type"
+            ),
+        ]
+        with self.assertNumQueries(4):
+            processed = tasks.refresh_harvestable_resources(self.harvester, found_resources)
+        self.assertEqual(processed, 3)
+        harvestable_resources = {
+            r.unique_identifier: r for r in models.HarvestableResource.objects.filter(harvester=self.harvester)}
+        self.assertEqual(len(harvestable_resources), 4)
+        self.assertEqual(harvestable_resources["fake-identifier-1"].title, "new-fake-title-1")
+        self.assertEqual(
+            harvestable_resources["fake-identifier-3"].should_be_harvested,
+            self.harvester.harvest_new_resources_by_default)
+        for index in (0, 1, 3):
+            self.assertGreaterEqual(harvestable_resources[f"fake-identifier-{index}"].last_refreshed, refreshed_before)
+        self.assertLess(harvestable_resources["fake-identifier-2"].last_refreshed, refreshed_before)
+
+        # the resource which has not been found is stale
+        self.harvester.last_checked_harvestable_resources = refreshed_before
+        tasks._delete_stale_harvestable_resources(self.harvester)
+        self.assertFalse(
+            models.HarvestableResource.objects.filter(unique_identifier="fake-identifier-2").exists())
+        self.assertEqual(models.HarvestableResource.objects.filter(harvester=self.harvester).count(), 3)
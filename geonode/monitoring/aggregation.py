@@ -17,6 +17,7 @@
 #
 #########################################################################
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, time
 from decimal import Decimal
 import logging
@@ -24,6 +25,7 @@ import logging
 import pytz
 
 from django.conf import settings
+from django.db import connection
 from django.db.models import Sum, F
 from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
 
@@ -34,6 +36,8 @@ from geonode.monitoring.models import (Metric, MetricValue, ServiceTypeMetric,
 
 log = logging.getLogger(__name__)
 
+AGGREGATION_BATCH_SIZE = 1000
+
 
 def get_metric_names():
     """
@@ -176,7 +180,7 @@ def adjust_now_to_noon(now):
     return pytz.utc.localize(datetime.combine(now.date(), time(0, 0, 0)))
 
 
-def aggregate_past_periods(metric_data_q=None, periods=None, cleanup=True, now=None, max_since=None):
+def aggregate_past_periods(metric_data_q=None, periods=None, cleanup=True, now=None, max_since=None, workers=None):
     """
     Aggregate past metric data into longer periods
     @param metric_data_q Query for metric data to use as input
@@ -189,6 +193,8 @@ def aggregate_past_periods(metric_data_q=None, periods=None, cleanup=True, now=N
                (default: current now)
     @param max_since look for data no older than max_since
                      (default: 1 year)
+    @param workers number of periods aggregated in parallel
+                   (default: settings.MONITORING_AGGREGATION_WORKERS)
     """
     utc = pytz.utc
     if now is None:
@@ -197,9 +203,11 @@ def aggregate_past_periods(metric_data_q=None, periods=None, cleanup=True, now=N
         metric_data_q = MetricValue.objects.all()
     if periods is None:
         periods = settings.MONITORING_DATA_AGGREGATION
+    if workers is None:
+        workers = getattr(settings, 'MONITORING_AGGREGATION_WORKERS', 1)
     max_since = max_since or now - timedelta(days=356)
     previous_cutoff = None
-    counter = 0
+    target_periods = []
     now = adjust_now_to_noon(now)
     # start from the end, oldest one first
     for cutoff_base, aggregation_period in reversed(periods):
@@ -217,84 +225,100 @@ def aggregate_past_periods(metric_data_q=None, periods=None, cleanup=True, now=N
                   " '%s', aggregate to '%s'",
                   cutoff_base, aggregation_period, since, until, previous_cutoff, aggregation_period)
 
-        periods = generate_periods(since, aggregation_period, end=until)
-
-        # for each target period we select mertic values within it
-        # and extract service, resource, event type and label combinations
-        # then, for each distinctive set, calculate per-metric aggregate values
-        for period_start, period_end in periods:
-            log.debug('period %s - %s (%s s)', period_start, period_end, period_end - period_start)
-            ret = aggregate_period(period_start, period_end, metric_data_q, cleanup)
-            counter += ret
+        target_periods.extend(generate_periods(since, aggregation_period, end=until))
         previous_cutoff = until
+
+    # for each target period we aggregate the metric values within it,
+    # per service, metric, resource, event type and label.
+    # Target periods never overlap, so they can be aggregated in parallel
+    if workers > 1 and len(target_periods) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            counters = executor.map(
+                lambda period: _aggregate_period_in_thread(period[0], period[1], metric_data_q, cleanup),
+                target_periods)
+            return sum(counters)
+    counter = 0
+    for period_start, period_end in target_periods:
+        counter += aggregate_period(period_start, period_end, metric_data_q, cleanup)
     return counter
 
 
+def _aggregate_period_in_thread(period_start, period_end, metric_data_q, cleanup):
+    try:
+        return aggregate_period(period_start, period_end, metric_data_q, cleanup)
+    finally:
+        connection.close()
+
+
+AGGREGATION_GROUP_FIELDS = ('service_id', 'service_metric_id', 'resource_id', 'event_type_id', 'label_id',)
+
+
 def aggregate_period(period_start, period_end, metric_data_q, cleanup=True):
-    counter = 0
+    """
+    Aggregate the metric values within a period, with a constant number of queries.
+
+    Source values are marked first, so that the values collected in the meantime are left
+    for the next run. Then all the aggregates are computed by a single GROUP BY, which
+    computes every kind of aggregate and picks the one matching the type of each metric,
+    and the aggregated values are upserted in bulk. Source values are removed at once.
+    """
+    log.debug('period %s - %s (%s s)', period_start, period_end, period_end - period_start)
     to_remove_data = {'remove_at': period_start.strftime("%Y%m%d%H%M%S")}
     source_metric_data = metric_data_q.filter(valid_from__gte=period_start,
                                               valid_to__lte=period_end)\
         .exclude(valid_from=period_start,
                  valid_to=period_end,
                  data={})
-    r = source_metric_data.values_list('service_id', 'service_metric_id', 'resource_id', 'event_type_id', 'label_id',)\
-                          .distinct('service_id', 'service_metric_id', 'resource_id', 'event_type_id', 'label_id')
-    source_metric_data.update(data=to_remove_data)
-
-    for service_id, metric_id, resource_id, event_type_id, label_id in r:
-        m = Metric.objects.filter(service_type__id=metric_id).get()
-        f = m.get_aggregate_field()
-        per_metric_q = source_metric_data.filter(service_metric_id=metric_id,
-                                                 service_id=service_id,
-                                                 resource_id=resource_id,
-                                                 event_type_id=event_type_id,
-                                                 label_id=label_id)
-
-        try:
-            value_q = per_metric_q.aggregate(fvalue=f,
-                                             fsamples_count=Sum(F('samples_count')))
-        except TypeError as err:
-            raise ValueError(f, m, err)
-        value = value_q['fvalue']
-        samples_count = value_q['fsamples_count']
-        if cleanup:
-            per_metric_q.delete()
+    if not source_metric_data.update(data=to_remove_data):
+        return 0
+    marked_metric_data = metric_data_q.filter(valid_from__gte=period_start,
+                                              valid_to__lte=period_end,
+                                              data=to_remove_data)
+
+    aggregates = {
+        f'agg_{metric_type}': aggregate_field
+        for metric_type, aggregate_field in Metric.AGGREGATE_DJANGO_MAP.items()
+    }
+    rows = marked_metric_data.order_by()\
+        .values(*AGGREGATION_GROUP_FIELDS, 'service_metric__metric__type')\
+        .annotate(fsamples_count=Sum(F('samples_count')), **aggregates)
+    values = {}
+    for row in rows:
+        key = tuple(row[field] for field in AGGREGATION_GROUP_FIELDS)
+        value = row[f"agg_{row['service_metric__metric__type']}"]
+        values[key] = (value, row['fsamples_count'])
+    if cleanup:
+        marked_metric_data.delete()
+
+    existing = {
+        tuple(item[:-1]): item[-1] for item in
+        metric_data_q.filter(valid_from=period_start, valid_to=period_end)
+                     .values_list(*AGGREGATION_GROUP_FIELDS, 'id')
+    }
+    to_create = []
+    to_update = []
+    for key, (value, samples_count) in values.items():
         log.debug('Metric %s: %s - %s (value: %s, samples: %s)',
-                  m, period_start, period_end, value, samples_count)
-        if not metric_data_q.filter(service_metric_id=metric_id,
-                                    service_id=service_id,
-                                    resource_id=resource_id,
-                                    event_type_id=event_type_id,
-                                    valid_from=period_start,
-                                    valid_to=period_end,
-                                    label_id=label_id).exists():
-            MetricValue.objects.create(service_metric_id=metric_id,
-                                       service_id=service_id,
-                                       resource_id=resource_id,
-                                       event_type_id=event_type_id,
-                                       value=value,
-                                       value_num=value,
-                                       value_raw=value,
-                                       valid_from=period_start,
-                                       valid_to=period_end,
-                                       label_id=label_id,
-                                       samples_count=samples_count)
+                  key, period_start, period_end, value, samples_count)
+        if key in existing:
+            to_update.append(MetricValue(id=existing[key],
+                                         value=value,
+                                         value_num=value,
+                                         value_raw=value,
+                                         data=None,
+                                         samples_count=samples_count))
         else:
-            metric_data_q.filter(service_metric_id=metric_id,
-                                 service_id=service_id,
-                                 resource_id=resource_id,
-                                 event_type_id=event_type_id,
-                                 valid_from=period_start,
-                                 valid_to=period_end,
-                                 label_id=label_id)\
-                .update(value=value,
-                        value_num=value,
-                        value_raw=value,
-                        data=None,
-                        samples_count=samples_count)
-        counter += 1
-
-    if cleanup:
-        source_metric_data.filter(data=to_remove_data).delete()
-    return counter
+            to_create.append(MetricValue(value=value,
+                                         value_num=value,
+                                         value_raw=value,
+                                         valid_from=period_start,
+                                         valid_to=period_end,
+                                         samples_count=samples_count,
+                                         **dict(zip(AGGREGATION_GROUP_FIELDS, key))))
+    if to_create:
+        MetricValue.objects.bulk_create(to_create, batch_size=AGGREGATION_BATCH_SIZE)
+    if to_update:
+        MetricValue.objects.bulk_update(to_update,
+                                        ['value', 'value_num', 'value_raw', 'data', 'samples_count'],
+                                        batch_size=AGGREGATION_BATCH_SIZE)
+    return len(values)
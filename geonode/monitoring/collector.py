@@ -40,6 +40,7 @@ from geonode.monitoring.models import (Metric, MetricValue, RequestEvent, Monito
                                        ExceptionEvent, EventType, NotificationCheck, BuiltIns)
 
 from geonode.monitoring.utils import generate_periods, align_period_start, align_period_end
+from geonode.monitoring.partitions import drop_old_partitions
 from geonode.monitoring.aggregation import (aggregate_past_periods, calculate_rate, calculate_percent,
                                             extract_resources, extract_event_type,
                                             extract_event_types, extract_special_event_types,
@@ -51,6 +52,9 @@ from geonode.utils import parse_datetime
 
 log = logging.getLogger(__name__)
 
+# maximum number of labels stored for each count and value metric
+METRIC_VALUES_MAX_LABELS = 100
+
 
 class CollectorAPI:
 
@@ -383,55 +387,35 @@ class CollectorAPI:
                           requests, service, **metric_values):
         metric = Metric.get_for(metric_name, service=service)
 
-        def _key(v):
-            return v['value']
-
         # we need list of three items:
         #  * value - numeric value for given metric
         #  * label - label value to be used
         #  * samples count - number of samples for a metric
+        # count and value metrics are computed per label with a single grouped query,
+        # which also selects the top labels
         if metric.is_rate:
-            row = requests.aggregate(value=models.Avg(column_name))
-            row['samples'] = requests.count()
+            row = requests.aggregate(value=models.Avg(column_name),
+                                     samples=models.Count('id'))
             row['label'] = Metric.TYPE_RATE
             q = [row]
         elif metric.is_count:
-            q = []
-            values = requests.distinct(
-                column_name).values_list(column_name, flat=True)
-            for v in values:
-                rqs = requests.filter(**{column_name: v})
-                row = rqs.aggregate(
-                    value=models.Sum(column_name),
-                    samples=models.Count(column_name)
-                )
-                row['label'] = v
-                q.append(row)
-            q.sort(key=_key)
-            q.reverse()
+            q = requests.values(column_name)\
+                .annotate(value=models.Sum(column_name),
+                          samples=models.Count(column_name))\
+                .order_by(models.F('value').desc(nulls_last=True), models.F(column_name).desc())
+            q = [dict(row, label=row[column_name]) for row in q[:METRIC_VALUES_MAX_LABELS]]
         elif metric.is_value:
-            q = []
             is_user_metric = column_name == "user_identifier"
+            q = requests.values(column_name)
             if is_user_metric:
-                values = requests.distinct(
-                    column_name).values_list(column_name, "user_username")
+                q = q.annotate(username=models.Max("user_username"))
             else:
-                values = requests.distinct(
-                    column_name).values_list(column_name, flat=True)
-            for v in values:
-                if v is not None:
-                    value = v
-                    if is_user_metric:
-                        value = v[0]
-                    rqs = requests.filter(**{column_name: value})
-                    row = rqs.aggregate(
-                        value=models.Count(column_name),
-                        samples=models.Count(column_name)
-                    )
-                    row['label'] = v
-                    q.append(row)
-            q.sort(key=_key)
-            q.reverse()
+                q = q.exclude(**{f'{column_name}__isnull': True})
+            q = q.annotate(value=models.Count(column_name),
+                           samples=models.Count(column_name))\
+                .order_by('-value', models.F(column_name).desc())
+            q = [dict(row, label=(row[column_name], row['username'],) if is_user_metric else row[column_name])
+                 for row in q[:METRIC_VALUES_MAX_LABELS]]
         elif metric.is_value_numeric:
             q = []
             row = requests.aggregate(value=models.Max(column_name),
@@ -440,18 +424,15 @@ class CollectorAPI:
             q.append(row)
         else:
             raise ValueError(f"Unsupported metric type: {metric.type}")
-        rows = q[:100]
-        metric_values.update({'metric': metric_name, 'service': service})
-        for row in rows:
-            label = row['label']
+        values = []
+        for row in q:
             value = row['value']
-            samples = row['samples']
-            metric_values.update({'value': value or 0,
-                                  'label': label,
-                                  'samples_count': samples,
-                                  'value_raw': value or 0,
-                                  'value_num': value if isinstance(value, (float, Decimal, int)) else None})
-            log.debug(MetricValue.add(**metric_values))
+            values.append({'value': value or 0,
+                           'label': row['label'],
+                           'samples_count': row['samples'],
+                           'value_raw': value or 0,
+                           'value_num': value if isinstance(value, (float, Decimal, int)) else None})
+        log.debug(MetricValue.add_many(metric, service=service, values=values, **metric_values))
 
     def process(self, service, data, valid_from, valid_to, *args, **kwargs):
         if service.is_hostgeonode:
@@ -481,9 +462,6 @@ class CollectorAPI:
         if not with_errors.exists():
             return
 
-        labels = ExceptionEvent.objects.filter(request__in=with_errors)\
-                                       .distinct()\
-                                       .values_list('error_type', flat=True)
         defaults = {'valid_from': valid_from,
                     'valid_to': valid_to,
                     'resource': resource,
@@ -495,14 +473,21 @@ class CollectorAPI:
         cnt = with_errors.count()
         log.debug(MetricValue.add(value=cnt, value_num=cnt, value_raw=cnt, **defaults))
 
-        defaults['metric'] = 'response.error.types'
-        for label in labels:
-            cnt = with_errors.filter(exceptions__error_type=label).count()
-
-            defaults['label'] = label
-
-            defaults['samples_count'] = cnt
-            log.debug(MetricValue.add(value=cnt, value_num=cnt, value_raw=cnt, **defaults))
+        error_types = with_errors.values('exceptions__error_type')\
+                                 .annotate(cnt=models.Count('id'))\
+                                 .order_by()
+        values = [{'label': row['exceptions__error_type'],
+                   'value': row['cnt'],
+                   'value_num': row['cnt'],
+                   'value_raw': row['cnt'],
+                   'samples_count': row['cnt']} for row in error_types]
+        log.debug(MetricValue.add_many('response.error.types',
+                                       valid_from,
+                                       valid_to,
+                                       service,
+                                       values,
+                                       resource=resource,
+                                       event_type=event_type))
 
     def process_requests_batch(self, service, requests, valid_from, valid_to):
         """
@@ -536,17 +521,16 @@ class CollectorAPI:
 
             log.debug(MetricValue.add('request.count', **count_mdefaults))
 
-            paths = srequests.distinct('request_path') \
-                .values_list('request_path', flat=True)
-            for path in paths:
-                count = srequests.filter(request_path=path).count()
-                count_mdefaults['value'] = count
-                count_mdefaults['label'] = path
-                count_mdefaults['value_num'] = count
-                count_mdefaults['value_raw'] = count
-                count_mdefaults['samples_count'] = count
-
-                log.debug(MetricValue.add('request.path', **count_mdefaults))
+            paths = srequests.values('request_path') \
+                .annotate(count=models.Count('id')) \
+                .order_by()
+            log.debug(MetricValue.add_many('request.path',
+                                           values=[{'label': row['request_path'],
+                                                    'value': row['count'],
+                                                    'value_num': row['count'],
+                                                    'value_raw': row['count'],
+                                                    'samples_count': row['count']} for row in paths],
+                                           **mdefaults))
 
             for mname, cname in (('request.ip', 'client_ip',),
                                  ('request.users', 'user_identifier',),
@@ -969,9 +953,18 @@ class CollectorAPI:
             raise TypeError("MONITORING_DATA_TTL should be an instance of "
                             f"datatime.timedelta, not {threshold.__class__}")
         cutoff = datetime.utcnow().replace(tzinfo=utc) - threshold
-        ExceptionEvent.objects.filter(created__lte=cutoff).delete()
-        RequestEvent.objects.filter(created__lte=cutoff).delete()
-        MetricValue.objects.filter(valid_to__lte=cutoff).delete()
+        # whole partitions are dropped first, the remaining rows are deleted in batches
+        # to keep the transactions short
+        drop_old_partitions(cutoff)
+        batch_size = getattr(settings, 'MONITORING_DELETE_BATCH_SIZE', 10000)
+        for q in (ExceptionEvent.objects.filter(created__lte=cutoff),
+                  RequestEvent.objects.filter(created__lte=cutoff),
+                  MetricValue.objects.filter(valid_to__lte=cutoff),):
+            while True:
+                ids = list(q.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                q.model.objects.filter(id__in=ids).delete()
 
     def compose_notifications(self, ndata, when=None):
         utc = pytz.utc
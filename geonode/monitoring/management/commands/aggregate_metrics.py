@@ -16,19 +16,89 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #########################################################################
+import time
 import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytz
+
 from django.conf import settings
+from django.db import transaction
 from django.core.management.base import BaseCommand
+from geonode.monitoring.aggregation import adjust_now_to_noon
 from geonode.monitoring.collector import CollectorAPI
+from geonode.monitoring.models import (
+    Host, MetricLabel, MetricValue, Service, ServiceType, ServiceTypeMetric, populate)
 
 log = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            dest='workers',
+            type=int,
+            default=None,
+            help="Number of periods aggregated in parallel (default: settings.MONITORING_AGGREGATION_WORKERS)"
+        )
+        parser.add_argument(
+            '--benchmark',
+            dest='benchmark',
+            type=int,
+            default=0,
+            metavar='VALUES',
+            help="Time the aggregation of VALUES synthetic metric values; the data is rolled back afterwards"
+        )
+
     def handle(self, *args, **kwargs):
         # Exit early if MONITORING_ENABLED=False
         if not settings.MONITORING_ENABLED:
             return
+        if kwargs['benchmark']:
+            self.benchmark(kwargs['benchmark'])
+            return
         c = CollectorAPI()
-        c.aggregate_past_periods()
+        c.aggregate_past_periods(workers=kwargs['workers'])
+
+    def benchmark(self, values_count):
+        """
+        Aggregates one minute synthetic values, collected two days ago, into hourly values.
+
+        Everything runs in a transaction that is rolled back, thus sequentially.
+        """
+        with transaction.atomic():
+            populate()
+            host, _ = Host.objects.get_or_create(name='localhost', ip='127.0.0.1')
+            service_type = ServiceType.objects.get(name=ServiceType.TYPE_GEONODE)
+            service, _ = Service.objects.get_or_create(
+                name='aggregation-benchmark', host=host, service_type=service_type)
+            service_metrics = list(ServiceTypeMetric.objects.filter(service_type=service_type))
+            labels = [MetricLabel.objects.get_or_create(name=f'benchmark-{i}')[0] for i in range(10)]
+            now = adjust_now_to_noon(datetime.utcnow().replace(tzinfo=pytz.utc))
+            start = now - timedelta(days=2)
+            per_minute = len(service_metrics) * len(labels)
+            values = []
+            for i in range(values_count):
+                valid_from = start + timedelta(minutes=i // per_minute)
+                values.append(MetricValue(
+                    service=service,
+                    service_metric=service_metrics[i % len(service_metrics)],
+                    label=labels[(i // len(service_metrics)) % len(labels)],
+                    valid_from=valid_from,
+                    valid_to=valid_from + timedelta(minutes=1),
+                    value=i % 100,
+                    value_num=Decimal(i % 100),
+                    value_raw=i % 100,
+                    samples_count=1))
+            MetricValue.objects.bulk_create(values, batch_size=1000)
+            started = time.monotonic()
+            aggregated = CollectorAPI().aggregate_past_periods(
+                MetricValue.objects.filter(service=service), now=now, max_since=start, workers=1)
+            duration = time.monotonic() - started
+            self.stdout.write(
+                f"Aggregated {values_count} metric values into {aggregated} values "
+                f"in {duration:.3f}s ({values_count / duration if duration else 0:.0f} values/s)")
+            transaction.set_rollback(True)
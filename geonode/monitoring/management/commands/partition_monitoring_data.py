@@ -0,0 +1,58 @@
+#########################################################################
+#
+# Copyright (C) 2022 OSGeo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#########################################################################
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.translation import ugettext_noop as _
+
+from geonode.monitoring.partitions import PARTITIONED_MODELS, get_interval, is_partitioned, partition_table
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Converts the monitoring tables to tables partitioned by time range,
+    moving the existing data into the partitions
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('-t', '--table', dest='tables', action='append', default=None,
+                            choices=[model._meta.db_table for model, key in PARTITIONED_MODELS],
+                            help=_("Convert only the given table, can be repeated (default: all of them)"))
+
+    def handle(self, *args, **options):
+        # Exit early if MONITORING_ENABLED=False
+        if not settings.MONITORING_ENABLED:
+            return
+        if connection.vendor != 'postgresql':
+            raise CommandError("Partitioned monitoring tables are available on PostgreSQL only")
+
+        interval = get_interval()
+        for model, key in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            if options['tables'] and table not in options['tables']:
+                continue
+            if is_partitioned(table):
+                self.stdout.write(f"{table} is already partitioned")
+                continue
+            moved = partition_table(model, key)
+            self.stdout.write(f"{table} partitioned by {key} per {interval}, {moved} rows moved")
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.16 on 2022-11-15 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0033_alter_monitoredresource_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='metricvalue',
+            index=models.Index(fields=['service_metric', 'service', 'event_type', 'valid_from', 'valid_to'], name='monitoring_mv_metric_period'),
+        ),
+        migrations.AddIndex(
+            model_name='metricvalue',
+            index=models.Index(fields=['resource', 'service_metric', 'valid_from', 'valid_to'], name='monitoring_mv_resource_period'),
+        ),
+    ]
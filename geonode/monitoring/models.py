@@ -20,6 +20,9 @@
 import logging
 import types
 import pytz
+import threading
+from functools import lru_cache
+from collections import Counter
 from urllib.parse import urlparse
 
 from socket import gethostbyname
@@ -27,7 +30,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 
 from django import forms
-from django.db import models
+from django.db import models, connection
 from django.conf import settings
 from django.http import Http404
 
@@ -54,20 +57,93 @@ from django.db.models import Sum, F, Case, When, Max
 log = logging.getLogger(__name__)
 
 GEOIP_DB = None
+_geoip_loaded = False
+_geoip_lock = threading.Lock()
 
 
 def get_geoip():
     # defer init until it's really needed
     # otherwise, some cli commands may fail (like updating geouip)
-    global GEOIP_DB
-    if GEOIP_DB is None:
-        try:
-            GEOIP_DB = GeoIP()
-        except Exception as e:
-            log.exception(e)
+    global GEOIP_DB, _geoip_loaded
+    if not _geoip_loaded:
+        with _geoip_lock:
+            # load the reader once per process, a failure is not retried on each request
+            if not _geoip_loaded:
+                try:
+                    GEOIP_DB = GeoIP()
+                except Exception as e:
+                    log.exception(e)
+                _geoip_loaded = True
     return GEOIP_DB
 
 
+@lru_cache(maxsize=getattr(settings, 'MONITORING_USER_AGENT_CACHE_SIZE', 1000))
+def resolve_user_agent(ua):
+    """
+    Returns the family of the user agent, cached since the traffic
+    usually comes from a small set of clients
+    """
+    return str(user_agents.parse(ua))
+
+
+@lru_cache(maxsize=getattr(settings, 'MONITORING_GEOIP_CACHE_SIZE', 10000))
+def resolve_location(request_ip):
+    """
+    Returns the 'client_*' RequestEvent fields for the client address,
+    an empty dict if it cannot be resolved.
+
+    Results are cached, callers must not change the returned dict.
+    """
+    out = {}
+    geoip = get_geoip()
+    if not geoip or request_ip in ('127.0.0.1',):
+        return out
+    try:
+        client_loc = geoip.city(request_ip)
+    except Exception as err:
+        log.warning("Cannot resolve %s: %s", request_ip, err)
+        client_loc = None
+
+    if client_loc:
+        lat, lon = client_loc['latitude'], client_loc['longitude'],
+        country = client_loc.get(
+            'country_code3') or client_loc['country_code']
+        if country and len(country) == 2:
+            _c = pycountry.countries.get(alpha_2=country)
+            country = _c.alpha_3 if _c else country
+        region = client_loc['region']
+        city = client_loc['city']
+
+        out.update({'client_ip': request_ip,
+                    'client_lat': lat,
+                    'client_lon': lon,
+                    'client_country': country,
+                    'client_region': region,
+                    'client_city': city})
+    return out
+
+
+def get_resolution_cache_stats():
+    """
+    Returns hits, misses and usage of the user agent and location caches
+    """
+    out = {}
+    for name, func in (('user_agent', resolve_user_agent,), ('location', resolve_location,),):
+        info = func.cache_info()
+        lookups = info.hits + info.misses
+        out[name] = {'hits': info.hits,
+                     'misses': info.misses,
+                     'size': info.currsize,
+                     'maxsize': info.maxsize,
+                     'hit_rate': float(info.hits) / lookups if lookups else 0.0}
+    return out
+
+
+def clear_resolution_caches():
+    resolve_user_agent.cache_clear()
+    resolve_location.cache_clear()
+
+
 class Host(models.Model):
 
     """
@@ -543,7 +619,7 @@ class RequestEvent(models.Model):
 
     @staticmethod
     def _get_ua_family(ua):
-        return str(user_agents.parse(ua))
+        return resolve_user_agent(ua)
 
     @classmethod
     def _get_user_agent(cls, ua):
@@ -560,36 +636,9 @@ class RequestEvent(models.Model):
 
     @classmethod
     def _get_user_location(cls, request_ip):
-        out = {}
-        lat = lon = None
-        country = region = city = None
-        if request_ip:
-            geoip = get_geoip()
-            if request_ip in ('127.0.0.1',):
-                return out
-            try:
-                client_loc = geoip.city(request_ip)
-            except Exception as err:
-                log.warning("Cannot resolve %s: %s", request_ip, err)
-                client_loc = None
-
-            if client_loc:
-                lat, lon = client_loc['latitude'], client_loc['longitude'],
-                country = client_loc.get(
-                    'country_code3') or client_loc['country_code']
-                if len(country) == 2:
-                    _c = pycountry.countries.get(alpha_2=country)
-                    country = _c.alpha_3
-                region = client_loc['region']
-                city = client_loc['city']
-
-                out.update({'client_ip': request_ip,
-                            'client_lat': lat,
-                            'client_lon': lon,
-                            'client_country': country,
-                            'client_region': region,
-                            'client_city': city})
-        return out
+        if not request_ip:
+            return {}
+        return dict(resolve_location(request_ip))
 
     @classmethod
     def _get_user_data_gn(cls, request):
@@ -633,7 +682,13 @@ class RequestEvent(models.Model):
         return out
 
     @classmethod
-    def from_geonode(cls, service, request, response):
+    def _get_geonode_data(cls, service, request, response):
+        """
+        Extracts from the request / response pair everything is needed to store the event,
+        without hitting the database tables of the events.
+
+        Returns a tuple in the form '(<RequestEvent fields>, <resources events>)'.
+        """
         from geonode.utils import parse_datetime
 
         received = datetime.utcnow().replace(tzinfo=pytz.utc)
@@ -650,39 +705,6 @@ class RequestEvent(models.Model):
         sensitive_data = cls._get_user_data_gn(request)
         event_type = cls._get_event_type(request)
 
-        # ua = request.META.get('HTTP_USER_AGENT') or ''
-        # ua_family = cls._get_ua_family(ua)
-        #
-        # ip, is_routable = get_client_ip(request)
-        # lat = lon = None
-        # country = region = city = None
-        # if ip and is_routable:
-        #     ip = ip.split(':')[0]
-        #     if settings.TEST and ip == 'testserver':
-        #         ip = '127.0.0.1'
-        #     try:
-        #         ip = gethostbyname(ip)
-        #     except Exception as err:
-        #         pass
-        #
-        #     geoip = get_geoip()
-        #     try:
-        #         client_loc = geoip.city(ip)
-        #     except Exception as err:
-        #         log.warning("Cannot resolve %s: %s", ip, err)
-        #         client_loc = None
-        #
-        #     if client_loc:
-        #         lat, lon = client_loc['latitude'], client_loc['longitude'],
-        #         country = client_loc.get(
-        #             'country_code3') or client_loc['country_code']
-        #         if len(country) == 2:
-        #             _c = pycountry.countries.get(alpha_2=country)
-        #             country = _c.alpha_3
-        #
-        #         region = client_loc['region']
-        #         city = client_loc['city']
-
         data = {'received': received,
                 'created': created,
                 'host': request.get_host(),
@@ -699,6 +721,11 @@ class RequestEvent(models.Model):
                 'response_time': duration}
 
         data.update(sensitive_data)
+        return data, list(rqmeta.get('events') or [])
+
+    @classmethod
+    def from_geonode(cls, service, request, response):
+        data, _ = cls._get_geonode_data(service, request, response)
 
         try:
             inst = cls.objects.create(**data)
@@ -711,9 +738,50 @@ class RequestEvent(models.Model):
             return None
 
     @classmethod
-    def from_geoserver(cls, service, request_data, received=None):
+    def bulk_from_geonode(cls, service, entries):
         """
-        Writes RequestEvent for data from audit log in GS
+        Stores a batch of GeoNode requests at once.
+
+        'entries' is a list of '(data, events, error)' tuples, where 'data' and 'events'
+        are the ones returned by '_get_geonode_data' and 'error' is either None or
+        an '(error_type, stack_trace)' pair.
+        """
+        if not entries:
+            return []
+        if not connection.features.can_return_rows_from_bulk_insert:
+            instances = [cls.objects.create(**data) for data, _, _ in entries]
+        else:
+            instances = cls.objects.bulk_create([cls(**data) for data, _, _ in entries])
+
+        resources = {}
+        requests_resources = []
+        errors = []
+        for inst, (data, events, error) in zip(instances, entries):
+            for evt_type, res_type, res_name, res_id in events:
+                _key = (res_name, res_type,)
+                if _key not in resources:
+                    resources[_key] = cls._get_or_create_resources(res_name, res_type, res_id)[0]
+                requests_resources.append(
+                    cls.resources.through(requestevent_id=inst.id, monitoredresource_id=resources[_key].id))
+            if error:
+                error_type, stack_trace = error
+                errors.append(
+                    ExceptionEvent.build_error(service, error_type, stack_trace, request=inst))
+        if requests_resources:
+            cls.resources.through.objects.bulk_create(requests_resources, ignore_conflicts=True)
+        if errors:
+            ExceptionEvent.objects.bulk_create(errors)
+        return instances
+
+    @classmethod
+    def _get_geoserver_data(cls, service, request_data, received=None):
+        """
+        Extracts from a GeoServer monitor record everything is needed to store the event,
+        without hitting the database tables of the events.
+
+        Returns a tuple in the form '(<RequestEvent fields>, <resource names>, <error>)',
+        where 'error' is either None or an '(error_type, stack_trace, message)' triple,
+        or None if the record cannot be stored.
         """
         from dateutil.tz import tzlocal
         from geonode.utils import parse_datetime
@@ -729,29 +797,6 @@ class RequestEvent(models.Model):
 
         sensitive_data = cls._get_user_data_gs(rd)
 
-        # ua = rd.get('remoteUserAgent') or ''
-        # ua_family = cls._get_ua_family(ua)
-        # ip = rd['remoteAddr']
-        # lat = lon = None
-        # country = region = city = None
-        # if ip:
-        #     geoip = get_geoip()
-        #     try:
-        #         client_loc = geoip.city(ip)
-        #     except Exception as err:
-        #         log.warning("Cannot resolve %s: %s", ip, err)
-        #         client_loc = None
-        #
-        #     if client_loc:
-        #         lat, lon = client_loc['latitude'], client_loc['longitude'],
-        #         country = client_loc.get(
-        #             'country_code3') or client_loc['country_code']
-        #         if len(country) == 2:
-        #             _c = pycountry.countries.get(alpha_2=country)
-        #             country = _c.alpha_3
-        #         region = client_loc['region']
-        #         city = client_loc['city']
-
         utc = pytz.utc
         try:
             local_tz = pytz.timezone(datetime.now(tzlocal()).tzname())
@@ -786,12 +831,13 @@ class RequestEvent(models.Model):
                 'response_time': rd['totalTime']}
         data.update(sensitive_data)
 
-        inst = cls.objects.create(**data)
         resource_names = (rd.get('resources') or {}).get('string') or []
         if not isinstance(resource_names, (list, tuple)):
             resource_names = [resource_names]
-        resources = cls._get_resources('layer', resource_names)
+
+        error = None
         if rd.get('error'):
+            emessage = rd['error']['detailMessage'] if 'detailMessage' in rd['error'] else str(rd['error'])
             try:
                 etype = rd[
                     'error'][
@@ -799,21 +845,90 @@ class RequestEvent(models.Model):
                             'error'] else rd[
                                 'error'][
                     'class']
-                edata = '\n'.join(rd['error']['stackTrace']['trace'])
-                emessage = rd['error']['detailMessage'] if 'detailMessage' in rd['error'] else str(rd['error'])
-                ExceptionEvent.add_error(
-                    service, etype, edata, message=emessage, request=inst)
             except Exception:
-                emessage = rd['error']['detailMessage'] if 'detailMessage' in rd['error'] else str(rd['error'])
-                ExceptionEvent.add_error(service, 'undefined',
-                                         '\n'.join(
-                                             rd['error']['stackTrace']['trace']),
-                                         message=emessage, request=inst)
+                etype = 'undefined'
+            error = (etype, '\n'.join(rd['error']['stackTrace']['trace']), emessage,)
+        return data, resource_names, error
+
+    @classmethod
+    def from_geoserver(cls, service, request_data, received=None):
+        """
+        Writes RequestEvent for data from audit log in GS
+        """
+        gs_data = cls._get_geoserver_data(service, request_data, received=received)
+        if not gs_data:
+            return
+        data, resource_names, error = gs_data
+
+        inst = cls.objects.create(**data)
+        resources = cls._get_resources('layer', resource_names)
+        if error:
+            etype, edata, emessage = error
+            ExceptionEvent.add_error(
+                service, etype, edata, message=emessage, request=inst)
         if resources:
             inst.resources.add(*resources)
             inst.save()
         return inst
 
+    @classmethod
+    def bulk_from_geoserver(cls, service, requests_data, received=None, since=None):
+        """
+        Stores a batch of records from the GeoServer audit log at once.
+
+        Records started before 'since', if given, are already stored and skipped; the ones
+        started at 'since' are skipped only if already stored.
+        """
+        received = received or datetime.utcnow().replace(tzinfo=pytz.utc)
+        entries = []
+        for request_data in requests_data:
+            gs_data = cls._get_geoserver_data(service, request_data, received=received)
+            if not gs_data:
+                continue
+            if since and gs_data[0]['created'] < since:
+                continue
+            entries.append(gs_data)
+        if since and any(data['created'] == since for data, _, _ in entries):
+            _key = ('request_path', 'request_method', 'host',)
+            stored = Counter(
+                cls.objects.filter(service=service, created=since).values_list(*_key))
+            _entries = []
+            for entry in entries:
+                if entry[0]['created'] == since:
+                    _entry_key = tuple(entry[0][_k] for _k in _key)
+                    if stored[_entry_key] > 0:
+                        stored[_entry_key] -= 1
+                        continue
+                _entries.append(entry)
+            entries = _entries
+        if not entries:
+            return []
+        if not connection.features.can_return_rows_from_bulk_insert:
+            instances = [cls.objects.create(**data) for data, _, _ in entries]
+        else:
+            instances = cls.objects.bulk_create([cls(**data) for data, _, _ in entries])
+
+        resources = {}
+        requests_resources = []
+        errors = []
+        for inst, (data, resource_names, error) in zip(instances, entries):
+            for res_name in resource_names:
+                if res_name is None:
+                    continue
+                if res_name not in resources:
+                    resources[res_name] = cls._get_resources('layer', [res_name])[0]
+                requests_resources.append(
+                    cls.resources.through(requestevent_id=inst.id, monitoredresource_id=resources[res_name].id))
+            if error:
+                etype, edata, emessage = error
+                errors.append(
+                    ExceptionEvent.build_error(service, etype, edata, message=emessage, request=inst))
+        if requests_resources:
+            cls.resources.through.objects.bulk_create(requests_resources, ignore_conflicts=True)
+        if errors:
+            ExceptionEvent.objects.bulk_create(errors)
+        return instances
+
 
 class ExceptionEvent(models.Model):
     created = models.DateTimeField(db_index=True, null=False)
@@ -825,8 +940,8 @@ class ExceptionEvent(models.Model):
     request = models.ForeignKey(RequestEvent, related_name='exceptions', on_delete=models.CASCADE)
 
     @classmethod
-    def add_error(cls, from_service, error_type, stack_trace,
-                  request=None, created=None, message=None):
+    def build_error(cls, from_service, error_type, stack_trace,
+                    request=None, created=None, message=None):
         received = datetime.utcnow().replace(tzinfo=pytz.utc)
         if not isinstance(error_type, str):
             _cls = error_type.__class__
@@ -838,13 +953,21 @@ class ExceptionEvent(models.Model):
 
         if not isinstance(created, datetime):
             created = received
-        return cls.objects.create(created=created,
-                                  received=received,
-                                  service=from_service,
-                                  error_type=error_type,
-                                  error_data=stack_trace,
-                                  error_message=message or '',
-                                  request=request)
+        return cls(created=created,
+                   received=received,
+                   service=from_service,
+                   error_type=error_type,
+                   error_data=stack_trace,
+                   error_message=message or '',
+                   request=request)
+
+    @classmethod
+    def add_error(cls, from_service, error_type, stack_trace,
+                  request=None, created=None, message=None):
+        inst = cls.build_error(from_service, error_type, stack_trace,
+                               request=request, created=created, message=message)
+        inst.save()
+        return inst
 
     @property
     def url(self):
@@ -940,6 +1063,13 @@ class MetricValue(models.Model):
              'label',
              'event_type',
              ))
+        # match the filters of CollectorAPI.get_metrics_data
+        indexes = [
+            models.Index(fields=['service_metric', 'service', 'event_type', 'valid_from', 'valid_to'],
+                         name='monitoring_mv_metric_period'),
+            models.Index(fields=['resource', 'service_metric', 'valid_from', 'valid_to'],
+                         name='monitoring_mv_resource_period'),
+        ]
 
     def __str__(self):
         metric = self.service_metric.metric.name
@@ -1015,6 +1145,85 @@ class MetricValue(models.Model):
             samples_count=samples_count or 0,
             data=data or {})
 
+    @classmethod
+    def add_many(cls, metric, valid_from, valid_to, service, values,
+                 resource=None, event_type=None):
+        """
+        Create or update, in bulk, the values of a metric for many labels
+
+        @param values list of dicts with label, value, value_raw, value_num and
+                      samples_count keys, as passed to MetricValue.add
+        """
+        if not values:
+            return []
+        if isinstance(metric, Metric):
+            service_metric = ServiceTypeMetric.objects.get(
+                service_type=service.service_type, metric=metric)
+        else:
+            service_metric = ServiceTypeMetric.objects.get(
+                service_type=service.service_type, metric__name=metric)
+        if event_type:
+            if not isinstance(event_type, EventType):
+                event_type = EventType.get(event_type)
+
+        label_names = []
+        label_users = {}
+        for row in values:
+            label_name = row['label']
+            label_user = None
+            if label_name and isinstance(label_name, tuple):
+                label_name, label_user = label_name
+            label_name = str(label_name or 'count')
+            label_names.append(label_name)
+            label_users.setdefault(label_name, label_user)
+        labels = {}
+        for label in MetricLabel.objects.filter(name__in=set(label_names)).order_by('id'):
+            labels.setdefault(label.name, label)
+        missing_labels = [MetricLabel(name=label_name, user=label_users[label_name])
+                          for label_name in set(label_names) if label_name not in labels]
+        for label in MetricLabel.objects.bulk_create(missing_labels):
+            labels[label.name] = label
+
+        existing = {
+            inst.label_id: inst for inst in cls.objects.filter(
+                valid_from=valid_from,
+                valid_to=valid_to,
+                service=service,
+                resource=resource,
+                event_type=event_type,
+                service_metric=service_metric,
+                label__in=list(labels.values())).order_by('id')
+        }
+        to_create = {}
+        to_update = {}
+        for row, label_name in zip(values, label_names):
+            label = labels[label_name]
+            inst = to_create.get(label.id) or existing.get(label.id)
+            if inst is None:
+                to_create[label.id] = cls(
+                    valid_from=valid_from,
+                    valid_to=valid_to,
+                    service=service,
+                    service_metric=service_metric,
+                    label=label,
+                    resource=resource,
+                    event_type=event_type,
+                    value=row.get('value_raw'),
+                    value_raw=row.get('value_raw'),
+                    value_num=row.get('value_num'),
+                    samples_count=row.get('samples_count') or 0,
+                    data={})
+            else:
+                inst.value = abs(row['value']) if row.get('value') else 0
+                inst.value_raw = abs(row['value_raw']) if row.get('value_raw') else 0
+                inst.value_num = abs(row['value_num']) if row.get('value_num') else 0
+                inst.samples_count = row.get('samples_count') or 0
+                if inst.pk:
+                    to_update[inst.pk] = inst
+        cls.objects.bulk_create(to_create.values())
+        cls.objects.bulk_update(to_update.values(), ['value', 'value_raw', 'value_num', 'samples_count'])
+        return list(to_create.values()) + list(to_update.values())
+
     @classmethod
     def get_for(cls, metric, service=None, valid_on=None,
                 resource=None, label=None, event_type=None):
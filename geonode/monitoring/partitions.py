@@ -0,0 +1,253 @@
+#########################################################################
+#
+# Copyright (C) 2022 OSGeo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#########################################################################
+"""
+Time-range partitioning of the monitoring tables on PostgreSQL.
+
+The tables are converted by the 'partition_monitoring_data' management command.
+Partitions are then created ahead of time by the metrics collection and the
+expired ones are dropped as a whole by 'CollectorAPI.clear_old_data'.
+"""
+import re
+import logging
+from datetime import datetime, timedelta
+
+import pytz
+from dateutil.parser import parse as parse_date
+
+from django.conf import settings
+from django.db import connection, transaction, DatabaseError
+
+from geonode.monitoring.models import RequestEvent, ExceptionEvent, MetricValue
+
+log = logging.getLogger(__name__)
+
+PARTITION_INTERVALS = ('day', 'week', 'month',)
+
+# (model, partition key); the keys are the ones used by the retention, thus
+# a dropped partition holds expired rows only. The requests come first, so the
+# foreign keys of the exceptions are not recreated against the partitioned requests table
+PARTITIONED_MODELS = (
+    (RequestEvent, 'created',),
+    (ExceptionEvent, 'created',),
+    (MetricValue, 'valid_to',),
+)
+
+_BOUNDS_RE = re.compile(r"FROM \('(?P<start>[^']+)'\) TO \('(?P<end>[^']+)'\)")
+
+
+def get_interval():
+    interval = getattr(settings, 'MONITORING_PARTITION_INTERVAL', 'week')
+    if interval not in PARTITION_INTERVALS:
+        raise ValueError(f"MONITORING_PARTITION_INTERVAL should be one of {PARTITION_INTERVALS}, not {interval}")
+    return interval
+
+
+def get_partition_start(when, interval=None):
+    """
+    Returns the start of the partition holding 'when'
+    """
+    interval = interval or get_interval()
+    when = when.astimezone(pytz.utc) if when.tzinfo else when.replace(tzinfo=pytz.utc)
+    start = when.replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == 'week':
+        start -= timedelta(days=start.weekday())
+    elif interval == 'month':
+        start = start.replace(day=1)
+    return start
+
+
+def get_partition_end(start, interval=None):
+    """
+    Returns the end, excluded, of the partition starting at 'start'
+    """
+    interval = interval or get_interval()
+    if interval == 'day':
+        return start + timedelta(days=1)
+    if interval == 'week':
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def get_partition_ranges(since, until, interval=None):
+    """
+    Returns the '(start, end)' ranges of the partitions covering 'since' - 'until'
+    """
+    start = get_partition_start(since, interval)
+    while start <= until:
+        end = get_partition_end(start, interval)
+        yield start, end
+        start = end
+
+
+def is_partitioned(table):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def get_partitions(table):
+    """
+    Returns the '(name, start, end)' range partitions of the table
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON (c.oid = i.inhrelid) WHERE i.inhparent = to_regclass(%s)", [table])
+        rows = cursor.fetchall()
+    out = []
+    for name, bounds in rows:
+        match = _BOUNDS_RE.search(bounds or '')
+        # the default partition has no bounds
+        if match:
+            out.append((name, parse_date(match.group('start')), parse_date(match.group('end')),))
+    return sorted(out, key=lambda p: p[1])
+
+
+def create_partition(cursor, table, start, end):
+    qn = connection.ops.quote_name
+    name = f'{table}_p{start:%Y%m%d}'
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(table)} "
+        f"FOR VALUES FROM (%s) TO (%s)", [start, end])
+    return name
+
+
+def ensure_partitions(now=None, ahead=None):
+    """
+    Creates the partitions for the current period and the next 'ahead' ones
+    on each partitioned monitoring table.
+    """
+    now = now or datetime.utcnow().replace(tzinfo=pytz.utc)
+    ahead = getattr(settings, 'MONITORING_PARTITIONS_AHEAD', 2) if ahead is None else ahead
+    until = now
+    for _i in range(ahead):
+        until = get_partition_end(get_partition_start(until))
+    created = []
+    for model, key in PARTITIONED_MODELS:
+        table = model._meta.db_table
+        if not is_partitioned(table):
+            continue
+        existing = {p[0] for p in get_partitions(table)}
+        for start, end in get_partition_ranges(now, until):
+            if f'{table}_p{start:%Y%m%d}' in existing:
+                continue
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    created.append(create_partition(cursor, table, start, end))
+            except DatabaseError as e:
+                # rows of the period may already be stored in the default partition
+                log.warning("Cannot create the partition of %s from %s: %s", table, start, e)
+    return created
+
+
+def drop_old_partitions(cutoff):
+    """
+    Drops the partitions holding rows older than 'cutoff' only.
+
+    The rows older than 'cutoff' in the remaining partitions are left
+    to the usual deletion.
+    """
+    qn = connection.ops.quote_name
+    dropped = []
+    for model, key in PARTITIONED_MODELS:
+        table = model._meta.db_table
+        if not is_partitioned(table):
+            continue
+        for name, start, end in get_partitions(table):
+            if end > cutoff:
+                break
+            with transaction.atomic(), connection.cursor() as cursor:
+                if model is RequestEvent:
+                    # the references to the requests are not enforced on partitioned tables
+                    cursor.execute(
+                        f"DELETE FROM {qn(RequestEvent.resources.through._meta.db_table)} r "
+                        f"USING {qn(name)} p WHERE r.requestevent_id = p.id")
+                    cursor.execute(
+                        f"DELETE FROM {qn(ExceptionEvent._meta.db_table)} e "
+                        f"USING {qn(name)} p WHERE e.request_id = p.id")
+                cursor.execute(f"DROP TABLE {qn(name)}")
+            dropped.append(name)
+    if dropped:
+        log.info("Dropped monitoring partitions: %s", ', '.join(dropped))
+    return dropped
+
+
+def partition_table(model, key):
+    """
+    Converts the table of the model to a table partitioned by time range on 'key',
+    moving the existing rows into it.
+
+    The primary key becomes '(id, <key>)' and the foreign keys pointing to the
+    table are dropped, since PostgreSQL cannot enforce them on a partitioned table.
+    """
+    qn = connection.ops.quote_name
+    table = model._meta.db_table
+    legacy = f'{table}_legacy'
+    with transaction.atomic(), connection.cursor() as cursor:
+        # deferred foreign key checks would prevent the tables to be altered
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(
+            "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+            "WHERE i.indrelid = to_regclass(%s) AND NOT EXISTS "
+            "(SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)", [table])
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid), contype, confrelid FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('u', 'f')", [table])
+        constraints = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, conrelid::regclass FROM pg_constraint "
+            "WHERE confrelid = to_regclass(%s) AND contype = 'f'", [table])
+        references = cursor.fetchall()
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        sequence = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({qn(key)})")
+        cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, {qn(key)})")
+        cursor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+
+        cursor.execute(f"SELECT min({qn(key)}) FROM {qn(legacy)}")
+        since = cursor.fetchone()[0] or datetime.utcnow().replace(tzinfo=pytz.utc)
+        for start, end in get_partition_ranges(since, datetime.utcnow().replace(tzinfo=pytz.utc)):
+            create_partition(cursor, table, start, end)
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}")
+        moved = cursor.rowcount
+
+        if sequence:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {qn(table)}.id")
+        cursor.execute(f"DROP TABLE {qn(legacy)} CASCADE")
+        for name, referencing in references:
+            log.info("Dropped the foreign key %s of %s to %s", name, referencing, table)
+
+        for index in indexes:
+            cursor.execute(index)
+        for name, definition, contype, referenced in constraints:
+            if contype == 'f':
+                cursor.execute("SELECT relkind FROM pg_class WHERE oid = %s", [referenced])
+                if cursor.fetchone()[0] == 'p':
+                    log.info("Skipping the foreign key %s of %s to a partitioned table", name, table)
+                    continue
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+    return moved
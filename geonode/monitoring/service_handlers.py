@@ -19,9 +19,13 @@
 
 import logging
 import pytz
+from itertools import islice
 from datetime import datetime, timedelta
 
 import requests
+
+from django.conf import settings
+
 from geonode.monitoring.utils import GeoServerMonitorClient
 from geonode.monitoring.probes import get_probe
 from geonode.monitoring.models import RequestEvent, ExceptionEvent
@@ -175,14 +179,24 @@ class GeoServerService(BaseServiceHandler):
 
     def _collect(self, since, until, format=None, **kwargs):
         format = format or 'json'
-        requests = list(self.gs_monitor.get_requests(format=format, since=since, until=until))
+        # don't read again the requests already stored by previous runs
+        self.high_water_mark = self.get_last_request_timestamp()
+        if self.high_water_mark and self.high_water_mark > since:
+            since = self.high_water_mark
+        requests = self.gs_monitor.get_requests(format=format, since=since, until=until)
         return requests
 
     def handle_collected(self, requests):
         utc = pytz.utc
         now = datetime.utcnow().replace(tzinfo=utc)
-        for r in requests:
-            RequestEvent.from_geoserver(self.service, r, received=now)
+        batch_size = getattr(settings, 'MONITORING_GEOSERVER_BATCH_SIZE', 500)
+        since = getattr(self, 'high_water_mark', None)
+        requests = iter(requests)
+        while True:
+            batch = list(islice(requests, batch_size))
+            if not batch:
+                break
+            RequestEvent.bulk_from_geoserver(self.service, batch, received=now, since=since)
         return RequestEvent.objects.filter(service=self.service, received=now)
 
 
@@ -30,12 +30,13 @@ import os.path
 import xmljson
 
 from decimal import Decimal  # noqa
+from unittest import mock, skipUnless
 from importlib import import_module
 from owslib.etree import etree as dlxml
 
 from django.core import mail
 from django.conf import settings
-from django.db import connections
+from django.db import connections, transaction
 from django.urls import reverse
 from django.test.utils import override_settings
 from django.core.management import call_command
@@ -45,7 +46,7 @@ from geonode.monitoring.models import (
     RequestEvent, Host, Service, ServiceType,
     populate, ExceptionEvent, MetricNotificationCheck,
     MetricValue, NotificationCheck, Metric, EventType,
-    MonitoredResource, MetricLabel,
+    MonitoredResource, MetricLabel, ServiceTypeMetric,
     NotificationMetricDefinition,)
 from geonode.monitoring.models import do_autoconfigure
 from geonode.compat import ensure_string
@@ -255,6 +256,79 @@ class RequestsTestCase(MonitoringTestBase):
             q[0].error_type,
             'org.geoserver.platform.ServiceException')
 
+    def test_gs_bulk_req(self):
+        """
+        Test if we can store a batch of geoserver requests at once
+        """
+        rqs = RequestEvent.bulk_from_geoserver(self.service, [req_big, req_err_big])
+        self.assertEqual(len(rqs), 2)
+        self.assertEqual(ExceptionEvent.objects.filter(request__in=[rq.id for rq in rqs]).count(), 1)
+        self.assertEqual(
+            list(RequestEvent.objects.get(id=rqs[0].id).resources.values_list('name', 'type')),
+            [('nurc:Arc_Sample', 'layer',)])
+
+        # requests already stored are skipped
+        _since = max(RequestEvent.objects.get(id=rq.id).created for rq in rqs)
+        self.assertEqual(
+            RequestEvent.bulk_from_geoserver(self.service, [req_big, req_err_big], since=_since), [])
+
+        # but not the ones started at the high-water mark and not stored yet
+        RequestEvent.objects.filter(id__in=[rq.id for rq in rqs], created=_since).delete()
+        self.assertEqual(
+            len(RequestEvent.bulk_from_geoserver(self.service, [req_big, req_err_big], since=_since)), 1)
+
+    def test_user_data_caches(self):
+        """
+        Test if user agents and client locations are resolved once
+        """
+        from geonode.monitoring.models import get_resolution_cache_stats, clear_resolution_caches
+
+        clear_resolution_caches()
+        for _r in range(3):
+            RequestEvent.from_geoserver(self.service, req_big)
+        stats = get_resolution_cache_stats()
+        self.assertEqual(stats['user_agent']['misses'], 1)
+        self.assertEqual(stats['user_agent']['hits'], 2)
+        self.assertEqual(stats['location']['misses'], 1)
+        self.assertEqual(stats['location']['hits'], 2)
+        self.assertAlmostEqual(stats['location']['hit_rate'], 2 / 3.0)
+
+        # the cached location is not shared with the callers
+        location = RequestEvent._get_user_location('201.195.233.98')
+        location['client_city'] = 'changed'
+        self.assertNotEqual(RequestEvent._get_user_location('201.195.233.98').get('client_city'), 'changed')
+
+    def test_gs_monitor_export(self):
+        """
+        Test if the geoserver monitor requests are read in pages from the csv export
+        """
+        from geonode.monitoring.utils import GeoServerMonitorClient
+
+        _header = ','.join(GeoServerMonitorClient.EXPORT_FIELDS)
+        _row = ('{},FINISHED,2017-05-30T16:04:00.719+0000,localhost,/wms,SERVICE=WMS,GET,200,3622,'
+                'image/png,90,WMS,[nurc:Arc_Sample],127.0.0.1,Mozilla,,')
+        _pages = [
+            '\n'.join([_header, _row.format(1), _row.format(2)]),
+            '\n'.join([_header, _row.format(2), _row.format(3)]),
+            _header]
+        _responses = [
+            mock.Mock(status_code=200, headers={'Content-Type': 'text/csv'}, text=_page) for _page in _pages]
+
+        client = GeoServerMonitorClient('http://localhost:8080/geoserver/', page_size=2)
+        with mock.patch.object(client.session, 'get', side_effect=_responses) as _get:
+            rqs = list(client.get_requests(format='json'))
+        self.assertEqual(_get.call_count, 3)
+        self.assertEqual([_get.call_args_list[idx][1]['params']['offset'] for idx in range(3)], [0, 2, 4])
+        # rows repeated across pages are read once
+        self.assertEqual([rq['org.geoserver.monitor.RequestData']['id'] for rq in rqs], ['1', '2', '3'])
+        rd = rqs[0]['org.geoserver.monitor.RequestData']
+        self.assertEqual(rd['startTime'], '2017-05-30T16:04:00.719000')
+        self.assertEqual(rd['resources'], {'string': ['nurc:Arc_Sample']})
+        self.assertEqual(rd['responseLength'], 3622)
+
+        rqs = RequestEvent.bulk_from_geoserver(self.service, rqs)
+        self.assertEqual(len(rqs), 3)
+
     def test_gn_request(self):
         """
         Test if we have geonode requests logged
@@ -293,6 +367,46 @@ class RequestsTestCase(MonitoringTestBase):
         if eq:
             self.assertEqual('django.http.response.Http404', eq.error_type)
 
+    def test_gn_request_writer(self):
+        """
+        Test if the background writer stores the requests in batches
+        """
+        from geonode.monitoring.utils import RequestToMonitoringThread
+
+        _now = datetime.utcnow().replace(tzinfo=pytz.utc)
+        _data = {'received': _now,
+                 'created': _now,
+                 'host': 'localhost',
+                 'service': self.service,
+                 'event_type': EventType.get(EventType.EVENT_VIEW),
+                 'request_path': '/',
+                 'request_method': 'GET',
+                 'response_status': 200,
+                 'response_size': 10,
+                 'response_type': 'text/html',
+                 'response_time': 5}
+        _events = [('view', 'dataset', 'geonode:writer_test', None,)]
+        _error = ('django.http.response.Http404', ['traceback'],)
+
+        writer = RequestToMonitoringThread(self.service, maxsize=3, batch_size=2, flush_interval=0.1)
+        _before = RequestEvent.objects.count()
+        self.assertTrue(writer.add((dict(_data), _events, None,)))
+        self.assertTrue(writer.add((dict(_data), _events, _error,)))
+        self.assertTrue(writer.add((dict(_data), [], None,)))
+        # the queue is bounded: further events are dropped and counted
+        self.assertFalse(writer.add((dict(_data), [], None,)))
+        self.assertEqual(writer.stats['dropped'], 1)
+
+        writer.start()
+        writer.stop(timeout=5)
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(writer.stats['written'], 3)
+        self.assertEqual(writer.stats['batches'], 2)
+        self.assertEqual(RequestEvent.objects.count(), _before + 3)
+        self.assertEqual(
+            MonitoredResource.objects.get(name='geonode:writer_test', type='dataset').requests.count(), 2)
+        self.assertTrue(ExceptionEvent.objects.filter(error_type='django.http.response.Http404').exists())
+
     def test_service_handlers(self):
         """
         Test if we can calculate metrics
@@ -363,6 +477,16 @@ class MonitoringUtilsTestCase(MonitoringTestBase):
 
     def setUp(self):
         super().setUp()
+        populate()
+
+        self.host, _ = Host.objects.get_or_create(
+            name='localhost', ip='127.0.0.1')
+        self.service_type = ServiceType.objects.get(
+            name=ServiceType.TYPE_GEONODE)
+        self.service, _ = Service.objects.get_or_create(
+            name=settings.MONITORING_SERVICE_NAME,
+            host=self.host,
+            service_type=self.service_type)
 
     def test_time_periods(self):
         """
@@ -427,6 +551,149 @@ class MonitoringUtilsTestCase(MonitoringTestBase):
                 pnow))
         self.assertEqual(len(periods), 3)
 
+    def test_aggregate_period(self):
+        """
+        Test that the values of a period are aggregated per metric and label
+        """
+        from geonode.monitoring.aggregation import aggregate_period
+
+        count_metric = Metric.objects.get(name='request.count')
+        rate_metric = Metric.objects.get(name='response.time')
+        period_start = datetime(2017, 6, 20, 12, 0, 0, tzinfo=pytz.utc)
+        period_end = period_start + timedelta(hours=1)
+        for minute in range(3):
+            valid_from = period_start + timedelta(minutes=minute)
+            valid_to = valid_from + timedelta(minutes=1)
+            for label in ('count', 'other'):
+                MetricValue.add(count_metric, valid_from, valid_to, self.service, label=label,
+                                value_raw=10, value_num=10, value=10, samples_count=1)
+            MetricValue.add(rate_metric, valid_from, valid_to, self.service, label='count',
+                            value_raw=minute, value_num=minute, value=minute, samples_count=2)
+        metric_data_q = MetricValue.objects.filter(service=self.service)
+
+        with self.assertNumQueries(5):
+            self.assertEqual(aggregate_period(period_start, period_end, metric_data_q), 3)
+        aggregated = metric_data_q.filter(valid_from=period_start, valid_to=period_end)
+        self.assertEqual(metric_data_q.count(), 3)
+        self.assertEqual(
+            aggregated.get(service_metric__metric=count_metric, label__name='other').value_num, 30)
+        rate_value = aggregated.get(service_metric__metric=rate_metric)
+        self.assertEqual(rate_value.samples_count, 6)
+        self.assertEqual(rate_value.value_num, Decimal('0.5'))
+
+    def test_metric_values_add_many(self):
+        """
+        Test that the values of a metric for many labels are created and updated in bulk
+        """
+        valid_from = datetime(2017, 6, 20, 12, 0, 0, tzinfo=pytz.utc)
+        valid_to = valid_from + timedelta(minutes=1)
+        values = [{'label': f'/path/{i}/', 'value': i, 'value_num': i, 'value_raw': i, 'samples_count': i}
+                  for i in range(1, 51)]
+        values.append({'label': ('anonymous-1', 'AnonymousUser'), 'value': 1, 'value_num': 1,
+                       'value_raw': 1, 'samples_count': 1})
+        with self.assertNumQueries(5):
+            MetricValue.add_many('request.path', valid_from, valid_to, self.service, values)
+        metric_values = MetricValue.objects.filter(service=self.service, valid_from=valid_from, valid_to=valid_to)
+        self.assertEqual(metric_values.count(), 51)
+        self.assertEqual(metric_values.get(label__name='/path/7/').value_num, 7)
+        self.assertEqual(MetricLabel.objects.get(name='anonymous-1').user, 'AnonymousUser')
+
+        # existing values are updated
+        values[6]['value_num'] = values[6]['value_raw'] = 70
+        MetricValue.add_many('request.path', valid_from, valid_to, self.service, values)
+        self.assertEqual(metric_values.count(), 51)
+        self.assertEqual(metric_values.get(label__name='/path/7/').value_num, 70)
+
+    def test_partition_ranges(self):
+        """
+        Test the time ranges of the monitoring tables partitions
+        """
+        from geonode.monitoring.partitions import get_partition_ranges
+
+        since = datetime(2017, 6, 20, 12, 22, 50, tzinfo=pytz.utc)
+        until = datetime(2017, 7, 3, 0, 0, 0, tzinfo=pytz.utc)
+        self.assertEqual(
+            [start.date().isoformat() for start, end in get_partition_ranges(since, until, 'week')],
+            ['2017-06-19', '2017-06-26', '2017-07-03'])
+        self.assertEqual(
+            list(get_partition_ranges(since, until, 'month')),
+            [(datetime(2017, 6, 1, tzinfo=pytz.utc), datetime(2017, 7, 1, tzinfo=pytz.utc),),
+             (datetime(2017, 7, 1, tzinfo=pytz.utc), datetime(2017, 8, 1, tzinfo=pytz.utc),)])
+        self.assertEqual(len(list(get_partition_ranges(since, since, 'day'))), 1)
+
+    @override_settings(MONITORING_DATA_TTL=timedelta(days=1), MONITORING_DELETE_BATCH_SIZE=2)
+    def test_clear_old_data(self):
+        """
+        Test that the expired monitoring data is deleted in batches
+        """
+        now = datetime.utcnow().replace(tzinfo=pytz.utc)
+        for created in [now - timedelta(days=3)] * 5 + [now]:
+            RequestEvent.objects.create(
+                service=self.service, created=created, received=created, host='localhost',
+                request_path='/', request_method='GET', response_status=200)
+
+        CollectorAPI().clear_old_data()
+        self.assertEqual(RequestEvent.objects.filter(service=self.service).count(), 1)
+        self.assertEqual(RequestEvent.objects.filter(service=self.service).get().created, now)
+
+    @skipUnless(connections['default'].vendor == 'postgresql', "Partitioned tables are available on PostgreSQL only")
+    @override_settings(MONITORING_PARTITION_INTERVAL='week')
+    def test_partitioned_tables(self):
+        """
+        Test that the monitoring tables are partitioned and the expired partitions dropped
+        """
+        from geonode.monitoring.partitions import (
+            PARTITIONED_MODELS, partition_table, drop_old_partitions, get_partitions, is_partitioned)
+
+        service_metric = ServiceTypeMetric.objects.filter(service_type=self.service.service_type).first()
+        label, _ = MetricLabel.objects.get_or_create(name='partitions')
+        now = datetime.utcnow().replace(tzinfo=pytz.utc)
+        old = now - timedelta(days=30)
+        cutoff = now - timedelta(days=14)
+
+        def _request(created):
+            rq = RequestEvent.objects.create(
+                service=self.service, created=created, received=created, host='localhost',
+                request_path='/', request_method='GET', response_status=200)
+            rq.resources.add(MonitoredResource.objects.get_or_create(name='partitions', type='dataset')[0])
+            return rq
+
+        def _value(valid_from, valid_to):
+            return MetricValue.objects.create(
+                service=self.service, service_metric=service_metric, label=label,
+                valid_from=valid_from, valid_to=valid_to, value=1, value_num=1, value_raw=1)
+
+        old_request = _request(old)
+        new_request = _request(now)
+        ExceptionEvent.add_error(self.service, 'partitions', 'trace', request=old_request, created=old)
+        old_value = _value(old, old + timedelta(hours=1))
+        # aggregated over a period ending after the cutoff, thus not expired yet
+        spanning_value = _value(cutoff - timedelta(days=2), cutoff + timedelta(hours=1))
+
+        with transaction.atomic():
+            for model, key in PARTITIONED_MODELS:
+                partition_table(model, key)
+                self.assertTrue(is_partitioned(model._meta.db_table))
+                self.assertTrue(get_partitions(model._meta.db_table))
+            self.assertEqual(RequestEvent.objects.filter(service=self.service).count(), 2)
+            self.assertEqual(MetricValue.objects.filter(service=self.service).count(), 2)
+            self.assertEqual(old_request.exceptions.count(), 1)
+
+            dropped = drop_old_partitions(cutoff)
+            self.assertTrue(dropped)
+            self.assertFalse(RequestEvent.objects.filter(id=old_request.id).exists())
+            self.assertFalse(ExceptionEvent.objects.filter(request_id=old_request.id).exists())
+            self.assertFalse(
+                RequestEvent.resources.through.objects.filter(requestevent_id=old_request.id).exists())
+            self.assertEqual(new_request.resources.count(), 1)
+            self.assertFalse(MetricValue.objects.filter(id=old_value.id).exists())
+            self.assertTrue(MetricValue.objects.filter(id=spanning_value.id).exists())
+
+            # new rows are stored in the partitioned tables
+            self.assertTrue(_request(now).id)
+            # the schema changes are not kept
+            transaction.set_rollback(True)
+
 
 @override_settings(USE_TZ=True)
 class MonitoringChecksTestCase(MonitoringTestBase):
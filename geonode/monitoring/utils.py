@@ -16,8 +16,12 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #########################################################################
+import io
 import os
+import csv
+import time
 import pytz
+import atexit
 import queue
 import logging
 import xmljson
@@ -26,6 +30,7 @@ import threading
 import traceback
 
 from hashlib import md5
+from concurrent.futures import ThreadPoolExecutor
 from math import floor, ceil
 from urllib.parse import urlencode
 from urllib.parse import urlsplit
@@ -52,6 +57,9 @@ class MonitoringHandler(logging.Handler):
         self.service = service
 
     def emit(self, record):
+        if getattr(settings, 'MONITORING_ASYNC_WRITER', False):
+            return self.emit_async(record)
+
         from geonode.monitoring.models import RequestEvent, ExceptionEvent
 
         exc_info = record.exc_info
@@ -69,35 +77,170 @@ class MonitoringHandler(logging.Handler):
             tb = traceback.format_exception(*exc_info)
             ExceptionEvent.add_error(self.service, exc_info[1], tb, request=re)
 
+    def emit_async(self, record):
+        """
+        Hands the event over to the background writer of the current process,
+        instead of storing it while serving the request.
+        """
+        from geonode.monitoring.models import RequestEvent
+
+        req = record.request
+        if req._monitoring.get('processed'):
+            return
+        req._monitoring['processed'] = True
+        try:
+            data, events = RequestEvent._get_geonode_data(self.service, req, record.response)
+        except Exception as e:
+            log.debug(e)
+            return
+        error = None
+        if record.exc_info:
+            _cls = record.exc_info[1].__class__
+            error = (f'{_cls.__module__}.{_cls.__name__}', traceback.format_exception(*record.exc_info),)
+        get_monitoring_writer(self.service).add((data, events, error,))
+
 
 class RequestToMonitoringThread(threading.Thread):
-    q = queue.Queue()
+    """
+    Background writer storing the GeoNode requests events in batches.
 
-    def __init__(self, service, *args, **kwargs):
+    Events are collected into a bounded queue; the thread blocks on it and flushes
+    a batch either when 'batch_size' events are available or 'flush_interval'
+    seconds have passed since the first event of the batch has been received.
+    When the queue is full, new events are dropped and counted.
+    """
+
+    def __init__(self, service, maxsize=10000, batch_size=200, flush_interval=2.0, put_timeout=0, *args, **kwargs):
+        kwargs.setdefault('daemon', True)
+        kwargs.setdefault('name', 'RequestToMonitoringThread')
         super().__init__(*args, **kwargs)
         self.service = service
+        self.q = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.pid = os.getpid()
+        self.stats = {
+            'queued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0,
+        }
+        self._stop_event = threading.Event()
+
+    def add(self, item):
+        if self._stop_event.is_set():
+            self.stats['dropped'] += 1
+            return False
+        try:
+            if self.put_timeout:
+                self.q.put(item, timeout=self.put_timeout)
+            else:
+                self.q.put_nowait(item)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        self.stats['queued'] += 1
+        return True
 
-    def add(self, req, resp):
-        item = (req, resp,)
-        RequestToMonitoringThread.q.put(item)
+    def get_batch(self):
+        try:
+            # Block until there is something to write
+            batch = [self.q.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.q.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
 
-    def run(self):
+    def write(self, batch):
+        from django.db import close_old_connections
         from geonode.monitoring.models import RequestEvent
 
-        q = RequestToMonitoringThread.q
-        while True:
-            if not q.empty():
-                item = q.get()
-                req, resp = item
-                RequestEvent.from_geonode(self.service, req, resp)
+        close_old_connections()
+        try:
+            RequestEvent.bulk_from_geonode(self.service, batch)
+            self.stats['written'] += len(batch)
+        except Exception as e:
+            log.exception(e)
+            self.stats['failed'] += len(batch)
+        self.stats['batches'] += 1
+
+    def run(self):
+        while not self._stop_event.is_set() or not self.q.empty():
+            batch = self.get_batch()
+            if batch:
+                self.write(batch)
+
+    def stop(self, timeout=None):
+        """
+        Stops accepting new events, flushes the pending ones and waits for the thread to exit.
+        """
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        log.debug(f"Monitoring writer stopped: {self.stats}")
+
+
+_monitoring_writer = None
+_monitoring_writer_lock = threading.Lock()
+
+
+def get_monitoring_writer(service):
+    """
+    Returns the background events writer of the current process, starting a new one
+    when missing or when the process has been forked (e.g. Celery prefork, uWSGI workers).
+    """
+    global _monitoring_writer
+    _writer = _monitoring_writer
+    if _writer is None or _writer.pid != os.getpid() or not _writer.is_alive():
+        with _monitoring_writer_lock:
+            _writer = _monitoring_writer
+            if _writer is None or _writer.pid != os.getpid() or not _writer.is_alive():
+                _writer = RequestToMonitoringThread(
+                    service,
+                    maxsize=getattr(settings, 'MONITORING_WRITER_QUEUE_SIZE', 10000),
+                    batch_size=getattr(settings, 'MONITORING_WRITER_BATCH_SIZE', 200),
+                    flush_interval=getattr(settings, 'MONITORING_WRITER_FLUSH_INTERVAL', 2.0),
+                    put_timeout=getattr(settings, 'MONITORING_WRITER_PUT_TIMEOUT', 0))
+                _writer.start()
+                atexit.register(_writer.stop, timeout=_writer.flush_interval * 2)
+                _monitoring_writer = _writer
+    return _writer
 
 
 class GeoServerMonitorClient:
 
     REPORT_FORMATS = ('html', 'xml', 'json',)
 
-    def __init__(self, base_url):
+    # fields requested to the bulk CSV export of the monitor requests
+    EXPORT_FIELDS = ('id', 'status', 'startTime', 'host', 'path', 'queryString', 'httpMethod',
+                     'responseStatus', 'responseLength', 'responseContentType', 'totalTime',
+                     'service', 'resources', 'remoteAddr', 'remoteUserAgent', 'error', 'errorMessage',)
+
+    def __init__(self, base_url, page_size=None, max_workers=None):
+        from requests.auth import HTTPBasicAuth
+        from requests.adapters import HTTPAdapter
+
         self.base_url = base_url
+        self.page_size = page_size or getattr(settings, 'MONITORING_GEOSERVER_PAGE_SIZE', 1000)
+        self.max_workers = max_workers or getattr(settings, 'MONITORING_GEOSERVER_FETCH_WORKERS', 8)
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(
+            settings.OGC_SERVER['default']['USER'],
+            settings.OGC_SERVER['default']['PASSWORD'])
+        self.session.verify = False
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def get_href(self, link, format=None):
         href = urlsplit(link['href'])
@@ -112,13 +255,7 @@ class GeoServerMonitorClient:
             return f'{href}.{format}'
         return format
 
-    def get_requests(self, format=None, since=None, until=None):
-        """
-        Returns list of requests from monitoring
-        """
-        from requests.auth import HTTPBasicAuth
-
-        rest_url = f'{self.base_url}rest/monitor/requests.html'
+    def _get_period_args(self, since=None, until=None):
         qargs = {}
         if since:
             # since = since.astimezone(utc)
@@ -126,38 +263,114 @@ class GeoServerMonitorClient:
         if until:
             # until = until.astimezone(utc)
             qargs['to'] = until.strftime(GS_FORMAT)
+        return qargs
+
+    def get_requests(self, format=None, since=None, until=None):
+        """
+        Returns list of requests from monitoring.
+
+        Requests are read in pages from the CSV export of the monitor, when the
+        remote GeoServer provides it, otherwise each request listed in the html
+        index is fetched on its own, concurrently.
+        """
+        exported = self.export_requests(since=since, until=until)
+        if exported is not None:
+            yield from exported
+            return
+
+        rest_url = f'{self.base_url}rest/monitor/requests.html'
+        qargs = self._get_period_args(since=since, until=until)
         if qargs:
             rest_url = f'{rest_url}?{urlencode(qargs)}'
 
-        log.debug('checking', rest_url)
-        username = settings.OGC_SERVER['default']['USER']
-        password = settings.OGC_SERVER['default']['PASSWORD']
-        resp = requests.get(
-            rest_url,
-            auth=HTTPBasicAuth(username, password),
-            timeout=30,
-            verify=False)
+        log.debug('checking %s', rest_url)
+        resp = self.session.get(rest_url, timeout=30)
         doc = bs(resp.content, features="lxml")
-        links = doc.find_all('a')
-        for lyr in links:
-            href = self.get_href(lyr, format)
-            data = self.get_request(href, format=format)
-            if data:
-                yield data
-            else:
-                log.warning(f"Skipping payload for {href}")
+        hrefs = [self.get_href(lyr, format) for lyr in doc.find_all('a')]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for href, data in zip(hrefs, executor.map(lambda href: self.get_request(href, format=format), hrefs)):
+                if data:
+                    yield data
+                else:
+                    log.warning(f"Skipping payload for {href}")
 
-    def get_request(self, href, format=format):
-        from requests.auth import HTTPBasicAuth
+    def export_requests(self, since=None, until=None):
+        """
+        Returns an iterator over the requests read in pages from the CSV export
+        of the monitor, or None if the remote GeoServer does not provide it.
+        """
+        rest_url = f'{self.base_url}rest/monitor/requests.csv'
+        qargs = self._get_period_args(since=since, until=until)
+        qargs.update({
+            'fields': ';'.join(self.EXPORT_FIELDS),
+            'order': 'startTime;ASC',
+            'count': self.page_size})
+        try:
+            rows = self._get_export_page(rest_url, dict(qargs, offset=0))
+        except Exception as e:
+            log.debug("Cannot read the monitor export from %s: %s", rest_url, e)
+            return
+        if rows is None:
+            return
+        return self._iter_export(rest_url, qargs, rows)
+
+    def _get_export_page(self, rest_url, qargs):
+        resp = self.session.get(rest_url, params=qargs, timeout=30)
+        if resp.status_code != 200 or 'csv' not in resp.headers.get('Content-Type', ''):
+            return
+        reader = csv.DictReader(io.StringIO(resp.text))
+        if not reader.fieldnames or not {'id', 'startTime'}.issubset(reader.fieldnames):
+            return
+        return list(reader)
+
+    def _iter_export(self, rest_url, qargs, rows):
+        seen = set()
+        offset = 0
+        while rows:
+            for row in rows:
+                # rows can shift between pages while the monitor is written
+                if row['id'] in seen:
+                    continue
+                seen.add(row['id'])
+                yield self._from_csv_row(row)
+            if len(rows) < self.page_size:
+                break
+            offset += len(rows)
+            rows = self._get_export_page(rest_url, dict(qargs, offset=offset))
+
+    def _from_csv_row(self, row):
+        """
+        Converts a row of the CSV export to the payload of a single request record
+        """
+        from dateutil.parser import parse as parse_date
+
+        rd = {k: v for k, v in row.items() if v not in (None, '')}
+        if rd.get('startTime'):
+            start_time = parse_date(rd['startTime'])
+            if start_time.tzinfo:
+                start_time = start_time.astimezone(pytz.utc).replace(tzinfo=None)
+            rd['startTime'] = start_time.strftime('%Y-%m-%dT%H:%M:%S.%f')
+        for field in ('responseLength', 'responseStatus', 'totalTime',):
+            if field in rd:
+                try:
+                    rd[field] = int(float(rd[field]))
+                except ValueError:
+                    pass
+        resources = [r.strip() for r in rd.pop('resources', '').strip('[]').split(',') if r.strip()]
+        if resources:
+            rd['resources'] = {'string': resources}
+        error = rd.pop('error', None)
+        error_message = rd.pop('errorMessage', None)
+        if error or error_message:
+            error_class = (error or 'undefined').split(':')[0].strip()
+            rd['error'] = {'class': error_class,
+                           'detailMessage': error_message or error,
+                           'stackTrace': {'trace': []}}
+        return {'org.geoserver.monitor.RequestData': rd}
 
-        username = settings.OGC_SERVER['default']['USER']
-        password = settings.OGC_SERVER['default']['PASSWORD']
+    def get_request(self, href, format=format):
         log.debug(f" href: {href} ")
-        r = requests.get(
-            href,
-            auth=HTTPBasicAuth(username, password),
-            timeout=30,
-            verify=False)
+        r = self.session.get(href, timeout=30)
         if r.status_code != 200:
             log.warning('Invalid response for %s: %s', href, r)
             return
@@ -406,6 +619,7 @@ def collect_metric(**options):
     # Avoid possible module circular dependency issues
     from geonode.monitoring.models import Service
     from geonode.monitoring.collector import CollectorAPI
+    from geonode.monitoring.partitions import ensure_partitions
 
     _start_time = None
     _end_time = None
@@ -439,6 +653,10 @@ def collect_metric(**options):
                         print(' ')
                     return
                 c = CollectorAPI()
+                try:
+                    ensure_partitions()
+                except Exception as e:
+                    log.warning(e)
                 for s in services:
                     try:
                         run_check(
@@ -31,6 +31,7 @@ from urllib.parse import urljoin
 
 from django.conf import settings
 from geonode.proxy.templatetags.proxy_lib_tags import original_link_available
+from geonode.proxy.utils import StorageFilesReader, download_stats
 from django.test.client import RequestFactory
 from django.core.files.uploadedfile import SimpleUploadedFile
 from unittest.mock import patch
@@ -111,6 +112,30 @@ class ProxyTest(GeoNodeBaseTestSupport):
         # 200 - FOUND
         self.assertTrue(response.status_code in (200, 301))
 
+    @override_settings(DEBUG=False, PROXY_ALLOWED_HOSTS=())
+    def test_remote_services_hosts_cache(self):
+        """The Remote Services hosts are cached and rebuilt when a Service is saved or deleted."""
+        from geonode.services.models import Service
+        from geonode.services.enumerations import WMS, INDEXED
+        from geonode.proxy.utils import is_proxy_allowed_host, get_proxy_allowed_hosts
+
+        get_proxy_allowed_hosts().invalidate()
+        self.assertFalse(is_proxy_allowed_host('cached.pocus.com'))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_proxy_allowed_host('cached.pocus.com'))
+            self.assertTrue(is_proxy_allowed_host('www.example.org', ('.example.org', )))
+
+        service, _ = Service.objects.get_or_create(
+            type=WMS,
+            name='Cached',
+            title='Pocus',
+            owner=self.admin,
+            method=INDEXED,
+            base_url='http://Cached.Pocus.com/ows')
+        self.assertTrue(is_proxy_allowed_host('cached.pocus.com'))
+        service.delete()
+        self.assertFalse(is_proxy_allowed_host('cached.pocus.com'))
+
     @override_settings(DEBUG=False, PROXY_ALLOWED_HOSTS=('.example.org',))
     def test_relative_urls(self):
         """Proxying to a URL with a relative path element should normalise the path into
@@ -181,6 +206,44 @@ class ProxyTest(GeoNodeBaseTestSupport):
             }
         )
 
+    @override_settings(PROXY_STREAMING=True)
+    def test_proxy_streaming_range(self):
+        """The GeoNode Proxy should stream the upstream chunks and forward range requests."""
+        import geonode.proxy.views
+
+        _chunks = [b'Hello', b' World']
+
+        class Raw:
+            def stream(self, amt, decode_content=None):
+                yield from _chunks
+
+        class Response:
+            status_code = 206
+            raw = Raw()
+            headers = {
+                'Content-Type': 'image/tiff',
+                'Content-Range': 'bytes 0-10/116559',
+                'Content-Length': '11',
+                'Connection': 'keep-alive'
+            }
+            close = MagicMock()
+
+        request_mock = MagicMock()
+        request_mock.return_value = (Response(), Response.raw)
+
+        geonode.proxy.views.http_client.request = request_mock
+        url = "http://example.org/test/image.tiff"
+
+        response = self.client.get(f'{self.proxy_url}?url={url}', HTTP_RANGE='bytes=0-10')
+        self.assertTrue(request_mock.call_args[1]['stream'])
+        self.assertEqual(request_mock.call_args[1]['headers']['Range'], 'bytes=0-10')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers['Content-Range'], 'bytes 0-10/116559')
+        self.assertNotIn('Connection', response.headers)
+        self.assertEqual(b''.join(response.streaming_content), b'Hello World')
+        Response.close.assert_called_once()
+
 
 class DownloadResourceTestCase(GeoNodeBaseTestSupport):
 
@@ -209,7 +272,7 @@ class DownloadResourceTestCase(GeoNodeBaseTestSupport):
     @on_ogc_backend(geoserver.BACKEND_PACKAGE)
     def test_download_url_with_existing_files(self, fopen, fexists):
         fexists.return_value = True
-        fopen.return_value = SimpleUploadedFile('foo_file.shp', b'scc')
+        fopen.side_effect = lambda *args, **kwargs: SimpleUploadedFile('foo_file.shp', b'scc')
         dataset = Dataset.objects.all().first()
 
         dataset.files = [
@@ -243,7 +306,7 @@ class DownloadResourceTestCase(GeoNodeBaseTestSupport):
     @on_ogc_backend(geoserver.BACKEND_PACKAGE)
     def test_download_files(self, fopen, fexists):
         fexists.return_value = True
-        fopen.return_value = SimpleUploadedFile('foo_file.shp', b'scc')
+        fopen.side_effect = lambda *args, **kwargs: SimpleUploadedFile('foo_file.shp', b'scc')
         dataset = Dataset.objects.all().first()
 
         dataset.files = [
@@ -278,6 +341,55 @@ class DownloadResourceTestCase(GeoNodeBaseTestSupport):
         self.assertIn(".shx", "".join(zip_files))
         self.assertIn(".prj", "".join(zip_files))
 
+    @patch('geonode.storage.manager.storage_manager.exists')
+    @patch('geonode.storage.manager.storage_manager.open')
+    @on_ogc_backend(geoserver.BACKEND_PACKAGE)
+    def test_download_files_stores_compressed_formats(self, fopen, fexists):
+        fexists.return_value = True
+        fopen.side_effect = lambda name, *args, **kwargs: SimpleUploadedFile(name, name.encode() * 1000)
+        dataset = Dataset.objects.all().first()
+        dataset.files = [
+            "/tmpe1exb9e9/foo_file.tif",
+            "/tmpe1exb9e9/foo_file.aux.xml",
+        ]
+        dataset.save()
+        Upload.objects.create(
+            state='COMPLETE',
+            resource=dataset
+        )
+
+        self.client.login(username='admin', password='admin')
+        with self.settings(DOWNLOAD_READ_CHUNK_SIZE=1024, DOWNLOAD_READ_AHEAD_SIZE=2048):
+            response = self.client.get(reverse('download', args=(dataset.id,)))
+            zip_content = io.BytesIO(b"".join(response.streaming_content))
+        self.assertEqual(response.status_code, 200)
+        zip = zipfile.ZipFile(zip_content)
+        infos = {info.filename: info for info in zip.infolist()}
+        self.assertEqual(infos["foo_file.tif"].compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(infos["foo_file.aux.xml"].compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(zip.read("foo_file.tif"), b"/tmpe1exb9e9/foo_file.tif" * 1000)
+        self.assertEqual(zip.read("foo_file.aux.xml"), b"/tmpe1exb9e9/foo_file.aux.xml" * 1000)
+
+    def test_storage_files_reader(self):
+        download_stats.clear()
+        handles = [io.BytesIO(b"a" * 10), io.BytesIO(b""), io.BytesIO(b"b" * 5)]
+        reader = StorageFilesReader(handles, chunk_size=4, read_ahead_size=4, backend="FakeStorageManager")
+        self.assertEqual([b"".join(reader.iter_file()) for _ in handles], [b"a" * 10, b"", b"b" * 5])
+        reader.close()
+        reader._thread.join(timeout=5)
+        self.assertTrue(all(handle.closed for handle in handles))
+        stats = download_stats.stats()["FakeStorageManager"]
+        self.assertEqual(stats["files"], 3)
+        self.assertEqual(stats["bytes"], 15)
+
+        # closing the reader before the end stops the reads and closes the files
+        handles = [io.BytesIO(b"a" * 10), io.BytesIO(b"b" * 10)]
+        reader = StorageFilesReader(handles, chunk_size=4, read_ahead_size=4, backend="FakeStorageManager")
+        self.assertEqual(next(reader.iter_file()), b"aaaa")
+        reader.close()
+        reader._thread.join(timeout=5)
+        self.assertTrue(all(handle.closed for handle in handles))
+
 
 class OWSApiTestCase(GeoNodeBaseTestSupport):
 
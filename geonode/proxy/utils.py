@@ -0,0 +1,292 @@
+#########################################################################
+#
+# Copyright (C) 2022 OSGeo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#########################################################################
+import os
+import time
+import queue
+import typing
+import logging
+import threading
+import zipstream
+
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http.request import validate_host
+
+from geonode.storage import settings as sm_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyAllowedHosts:
+
+    CACHE_KEY = 'geonode:proxy:services_hosts'
+
+    def __init__(self, timeout: int = 30, cache_alias: typing.Optional[str] = None):
+        """
+        Set of the hostnames of the registered remote Services, which the proxy is allowed to forward requests to.
+
+        The set is built with a single query and kept in memory for 'timeout' seconds; it is rebuilt on
+        Service save/delete. When 'cache_alias' is set, the set is stored in the given Django cache too,
+        so that the other processes pick it up, once their own copy expires, without querying the DB.
+
+        :param timeout: number of seconds after which the in-process set is refreshed
+        :param cache_alias: optional alias of the Django cache shared by all the processes
+        """
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self._hosts = None
+        self._expires = 0
+        self._lock = threading.Lock()
+
+    @property
+    def shared_cache(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    @staticmethod
+    def _build() -> typing.FrozenSet[str]:
+        from geonode.services.models import Service
+        return frozenset(
+            _host.lower() for _host in (
+                urlsplit(_base_url).hostname for _base_url in Service.objects.values_list('base_url', flat=True)
+            ) if _host
+        )
+
+    def get(self) -> typing.FrozenSet[str]:
+        with self._lock:
+            if self._hosts is not None and self._expires > time.monotonic():
+                return self._hosts
+        hosts = None
+        if self.shared_cache is not None:
+            try:
+                hosts = self.shared_cache.get(self.CACHE_KEY)
+            except Exception as e:
+                logger.debug(f"Could not read the proxy allowed hosts from the shared cache: {e}")
+        if hosts is None:
+            hosts = self._build()
+            if self.shared_cache is not None:
+                try:
+                    self.shared_cache.set(self.CACHE_KEY, hosts, timeout=None)
+                except Exception as e:
+                    logger.debug(f"Could not store the proxy allowed hosts on the shared cache: {e}")
+        with self._lock:
+            self._hosts = hosts
+            self._expires = time.monotonic() + self.timeout
+        return hosts
+
+    def invalidate(self):
+        with self._lock:
+            self._hosts = None
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.delete(self.CACHE_KEY)
+            except Exception as e:
+                logger.debug(f"Could not invalidate the proxy allowed hosts on the shared cache: {e}")
+
+
+_proxy_allowed_hosts = None
+
+
+def get_proxy_allowed_hosts() -> ProxyAllowedHosts:
+    """
+    Returns the remote Services allowed hosts configured by settings.PROXY_ALLOWED_HOSTS_CACHE.
+    """
+    global _proxy_allowed_hosts
+    if _proxy_allowed_hosts is None:
+        options = getattr(settings, 'PROXY_ALLOWED_HOSTS_CACHE', {})
+        _proxy_allowed_hosts = ProxyAllowedHosts(
+            options.get('timeout', 30),
+            options.get('cache_alias'))
+    return _proxy_allowed_hosts
+
+
+def invalidate_proxy_allowed_hosts():
+    get_proxy_allowed_hosts().invalidate()
+
+
+@lru_cache(maxsize=32)
+def _split_allowed_hosts(allowed_hosts: typing.Tuple[str]) -> typing.Tuple[typing.FrozenSet[str], typing.Tuple[str]]:
+    """
+    Splits the allowed hosts into the plain hostnames, to be matched by a set lookup,
+    and the patterns (e.g. '.example.org' or '*') to be matched by 'validate_host'.
+    """
+    hostnames = set()
+    patterns = []
+    for _host in allowed_hosts:
+        if not _host:
+            continue
+        _host = _host.lower()
+        if _host.startswith('.') or '*' in _host or ':' in _host:
+            patterns.append(_host)
+        else:
+            hostnames.add(_host)
+    return frozenset(hostnames), tuple(patterns)
+
+
+def is_proxy_allowed_host(hostname: str, allowed_hosts: typing.Iterable[str] = ()) -> bool:
+    """
+    Checks whether the proxy can send requests to 'hostname', i.e. it is either one of 'allowed_hosts'
+    or the host of a registered remote Service.
+    """
+    if not hostname:
+        return False
+    hostname = hostname.lower()
+    hostnames, patterns = _split_allowed_hosts(tuple(allowed_hosts))
+    if hostname in hostnames or hostname in get_proxy_allowed_hosts().get():
+        return True
+    return bool(patterns) and validate_host(hostname, patterns)
+
+
+def get_zip_compression(file_name: str) -> int:
+    """
+    Returns the compression of a file added to a download archive: the formats which are already
+    compressed, listed by settings.DOWNLOAD_STORED_EXTENSIONS, are stored as they are.
+    """
+    _, ext = os.path.splitext(file_name)
+    stored_extensions = getattr(settings, 'DOWNLOAD_STORED_EXTENSIONS', ())
+    if ext.lower() in stored_extensions:
+        return zipstream.ZIP_STORED
+    return zipstream.ZIP_DEFLATED
+
+
+class DownloadStats:
+
+    def __init__(self):
+        """
+        Per storage backend totals of the files read in order to stream the downloads.
+        """
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def add(self, backend: str, files: int, size: int, seconds: float):
+        with self._lock:
+            _stats = self._stats.setdefault(backend, {'downloads': 0, 'files': 0, 'bytes': 0, 'seconds': 0.0})
+            _stats['downloads'] += 1
+            _stats['files'] += files
+            _stats['bytes'] += size
+            _stats['seconds'] += seconds
+
+    def stats(self) -> typing.Dict[str, typing.Dict]:
+        with self._lock:
+            return {
+                backend: dict(
+                    _stats,
+                    throughput=_stats['bytes'] / _stats['seconds'] if _stats['seconds'] else 0)
+                for backend, _stats in self._stats.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+download_stats = DownloadStats()
+
+
+class StorageFilesReader:
+
+    _END_OF_FILE = object()
+
+    def __init__(self, file_handles: typing.List, chunk_size: int, read_ahead_size: int, backend: str = None):
+        """
+        Reads the files opened from the storage, one after the other, in a background thread.
+
+        The chunks are handed over through a bounded queue, so that the next file is read while the
+        current one is being compressed, without buffering more than 'read_ahead_size' bytes.
+        Each file handle is closed once read.
+
+        :param file_handles: the files opened from the storage, in the order they are going to be consumed
+        :param chunk_size: size of the reads
+        :param read_ahead_size: maximum number of bytes read ahead of the consumer
+        :param backend: name of the storage backend the throughput is recorded for, defaults to the configured one
+        """
+        self.file_handles = list(file_handles)
+        self.chunk_size = chunk_size
+        self.backend = backend or sm_settings.STORAGE_MANAGER_CONCRETE_CLASS.rsplit('.', 1)[-1]
+        self.bytes_read = 0
+        self.read_seconds = 0.0
+        self._queue = queue.Queue(maxsize=max(read_ahead_size // chunk_size, 1))
+        self._closed = threading.Event()
+        self._thread = None
+
+    def _put(self, item) -> bool:
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_files(self):
+        remaining = list(self.file_handles)
+        try:
+            while remaining:
+                file_handle = remaining.pop(0)
+                try:
+                    while not self._closed.is_set():
+                        started = time.monotonic()
+                        buf = file_handle.read(self.chunk_size)
+                        self.read_seconds += time.monotonic() - started
+                        if not buf:
+                            break
+                        self.bytes_read += len(buf)
+                        if not self._put(buf):
+                            return
+                finally:
+                    file_handle.close()
+                if not remaining:
+                    # recorded before the consumer gets the end of the last file
+                    download_stats.add(self.backend, len(self.file_handles), self.bytes_read, self.read_seconds)
+                    logger.debug(
+                        f"Read {len(self.file_handles)} files, {self.bytes_read} bytes in {self.read_seconds:.3f}s "
+                        f"from the {self.backend} storage")
+                if not self._put(self._END_OF_FILE):
+                    return
+        except Exception as e:
+            self._put(e)
+        finally:
+            for file_handle in remaining:
+                file_handle.close()
+
+    def iter_file(self) -> typing.Iterator[bytes]:
+        """
+        Yields the chunks of the next file.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._read_files, name='download-read-ahead', daemon=True)
+            self._thread.start()
+        while True:
+            item = self._queue.get()
+            if item is self._END_OF_FILE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self):
+        """
+        Stops the reads, e.g. when the client went away before the end of the download.
+        """
+        self._closed.set()
+        if self._thread is None:
+            for file_handle in self.file_handles:
+                file_handle.close()
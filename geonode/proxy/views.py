@@ -32,7 +32,6 @@ from django.template import loader
 from django.http import HttpResponse, StreamingHttpResponse
 from django.views.generic import View
 from distutils.version import StrictVersion
-from django.http.request import validate_host
 from django.utils.translation import ugettext as _
 from django.views.decorators.csrf import requires_csrf_token
 
@@ -51,6 +50,7 @@ from geonode.base.enumerations import LINK_TYPES as _LT
 from geonode import geoserver  # noqa
 from geonode.base import register_event
 from geonode.base.auth import get_auth_user, get_token_from_auth_header
+from geonode.proxy.utils import StorageFilesReader, get_zip_compression, is_proxy_allowed_host
 
 BUFFER_CHUNK_SIZE = 64 * 1024
 
@@ -68,11 +68,16 @@ ows_regexp = re.compile(
 @requires_csrf_token
 def proxy(request, url=None, response_callback=None,
           sec_chk_hosts=True, sec_chk_rules=True, timeout=None,
-          allowed_hosts=[], headers=None, access_token=None, **kwargs):
+          allowed_hosts=[], headers=None, access_token=None, stream=None, **kwargs):
     # Request default timeout
     if not timeout:
         timeout = TIMEOUT
 
+    # Streaming mode; responses to be processed by a callback need their whole content though
+    if stream is None:
+        stream = getattr(settings, 'PROXY_STREAMING', False)
+    stream = stream and not response_callback
+
     # Security rules and settings
     PROXY_ALLOWED_HOSTS = getattr(settings, 'PROXY_ALLOWED_HOSTS', ())
 
@@ -100,17 +105,13 @@ def proxy(request, url=None, response_callback=None,
     if sec_chk_hosts and not settings.DEBUG:
 
         # Attach current SITEURL
-        if site_url.hostname not in PROXY_ALLOWED_HOSTS:
-            PROXY_ALLOWED_HOSTS += (site_url.hostname, )
+        PROXY_ALLOWED_HOSTS = tuple(PROXY_ALLOWED_HOSTS) + (site_url.hostname, )
 
         # Attach current hostname
         if check_ogc_backend(geoserver.BACKEND_PACKAGE):
             from geonode.geoserver.helpers import ogc_server_settings
-            hostname = (
-                ogc_server_settings.hostname,
-            ) if ogc_server_settings else ()
-            if hostname not in PROXY_ALLOWED_HOSTS:
-                PROXY_ALLOWED_HOSTS += hostname
+            if ogc_server_settings:
+                PROXY_ALLOWED_HOSTS += (ogc_server_settings.hostname, )
 
         # Check OWS regexp
         if url.query and ows_regexp.match(url.query):
@@ -119,17 +120,10 @@ def proxy(request, url=None, response_callback=None,
                     ows_tokens[1]) >= StrictVersion("1.0.0") and StrictVersion(
                         ows_tokens[1]) <= StrictVersion("3.0.0") and ows_tokens[2].lower() in (
                             'getcapabilities') and ows_tokens[3].upper() in ('OWS', 'WCS', 'WFS', 'WMS', 'WPS', 'CSW'):
-                if url.hostname not in PROXY_ALLOWED_HOSTS:
-                    PROXY_ALLOWED_HOSTS += (url.hostname, )
-
-        # Check Remote Services base_urls
-        from geonode.services.models import Service
-        for _s in Service.objects.all():
-            _remote_host = urlsplit(_s.base_url).hostname
-            PROXY_ALLOWED_HOSTS += (_remote_host, )
+                PROXY_ALLOWED_HOSTS += (url.hostname, )
 
-        if not validate_host(
-                url.hostname, PROXY_ALLOWED_HOSTS):
+        # Check the allowed hosts along with the Remote Services base_urls
+        if not is_proxy_allowed_host(url.hostname, PROXY_ALLOWED_HOSTS):
             return HttpResponse("DEBUG is set to False but the host of the path provided to the proxy service"
                                 " is not in the PROXY_ALLOWED_HOSTS setting.",
                                 status=403,
@@ -187,6 +181,19 @@ def proxy(request, url=None, response_callback=None,
             f'{settings.SITEURL}geoserver',
             ogc_server_settings.LOCATION.rstrip('/'))
 
+    if stream:
+        # forward range requests, the upstream server answers with the partial content
+        for _header in ('Range', 'If-Range'):
+            if _header in request.headers:
+                headers[_header] = request.headers[_header]
+        return _stream_response(
+            _url,
+            method=request.method,
+            data=_data.encode('utf-8'),
+            headers=headers,
+            timeout=timeout,
+            user=user)
+
     response, content = http_client.request(
         _url,
         method=request.method,
@@ -275,6 +282,39 @@ def proxy(request, url=None, response_callback=None,
             return fetch_response_headers(_response, response_headers)
 
 
+def _stream_response(url, method='GET', data=None, headers={}, timeout=None, user=None):
+    """
+    Forwards the upstream response chunk by chunk, without reading the whole payload in memory.
+    The body is forwarded as it is (i.e. still encoded), so that its Content-Length and
+    Content-Encoding headers stay valid.
+    """
+    response, content = http_client.request(
+        url,
+        method=method,
+        data=data,
+        headers=headers,
+        timeout=timeout,
+        stream=True,
+        user=user)
+    if response is None:
+        return HttpResponse(
+            content=content,
+            reason=content,
+            status=500)
+
+    def _chunks():
+        try:
+            yield from response.raw.stream(BUFFER_CHUNK_SIZE, decode_content=False)
+        finally:
+            response.close()
+
+    _response = StreamingHttpResponse(
+        _chunks(),
+        status=response.status_code,
+        content_type=response.headers.get('Content-Type'))
+    return fetch_response_headers(_response, response.headers)
+
+
 def download(request, resourceid, sender=Dataset):
 
     _not_authorized = _("You are not authorized to download this resource.")
@@ -327,22 +367,29 @@ def download(request, resourceid, sender=Dataset):
 
             target_zip = zipstream.ZipFile(mode='w', compression=zipstream.ZIP_DEFLATED, allowZip64=True)
 
-            # Iterable: Needed when the file_info has it's data as a stream
-            def _iterable(source_iter):
-                while True:
-                    buf = source_iter.read(BUFFER_CHUNK_SIZE)
-                    if not buf:
-                        break
-                    yield buf
+            # Files are read ahead, in a background thread, while the previous ones are being compressed
+            reader = StorageFilesReader(
+                [file_info['data_iter'] for file_info in file_list],
+                chunk_size=settings.DOWNLOAD_READ_CHUNK_SIZE,
+                read_ahead_size=settings.DOWNLOAD_READ_AHEAD_SIZE)
 
-            # Add files to zip
+            # Add files to zip; the already compressed formats are stored as they are
             for file_info in file_list:
-                target_zip.write_iter(arcname=file_info['name'], iterable=_iterable(file_info['data_iter']))
+                target_zip.write_iter(
+                    arcname=file_info['name'],
+                    iterable=reader.iter_file(),
+                    compress_type=get_zip_compression(file_info['name']))
+
+            def _stream_zip():
+                try:
+                    yield from target_zip
+                finally:
+                    reader.close()
 
             register_event(request, 'download', instance)
 
             # Streaming content response
-            response = StreamingHttpResponse(target_zip, content_type='application/zip')
+            response = StreamingHttpResponse(_stream_zip(), content_type='application/zip')
             response['Content-Disposition'] = f'attachment; filename="{target_file_name}"'
             return response
         except (NotImplementedError, Upload.DoesNotExist):
@@ -46,9 +46,11 @@ from geonode.thumbs.thumbnails import _generate_thumbnail_name
 from geonode.documents.tasks import create_document_thumbnail
 from geonode.thumbs import utils as thumb_utils
 from geonode.security.permissions import PermSpecCompact
+from geonode.security.cache import invalidate_permissions_cache
 from geonode.security.utils import (
     perms_as_set,
     get_user_groups,
+    update_visibility_index,
     skip_registered_members_common_group)
 
 from . import settings as rm_settings
@@ -214,6 +216,13 @@ class ResourceManager(ResourceManagerInterface):
     def _get_instance(cls, uuid: str) -> ResourceBase:
         return ResourceBase.objects.filter(uuid=uuid).first()
 
+    @staticmethod
+    def _invalidate_permissions_cache(resource_id: int):
+        # invalidate right away and once committed, so that no decision computed
+        # by another process before the commit survives it
+        invalidate_permissions_cache(resource_id)
+        transaction.on_commit(lambda: invalidate_permissions_cache(resource_id))
+
     def search(self, filter: dict, /, resource_type: typing.Optional[object]) -> QuerySet:
         _class = resource_type or ResourceBase
         _resources_queryset = _class.objects.filter(**filter)
@@ -564,6 +573,8 @@ class ResourceManager(ResourceManagerInterface):
                     GroupObjectPermission.objects.filter(
                         content_type=ContentType.objects.get_for_model(_resource.get_self_resource()),
                         object_pk=_resource.id).delete()
+                    update_visibility_index([_resource.id])
+                    self._invalidate_permissions_cache(_resource.id)
                     if not self._concrete_resource_manager.remove_permissions(uuid, instance=_resource):
                         raise Exception("Could not complete concrete manager operation successfully!")
                 _resource.set_processing_state(enumerations.STATE_PROCESSED)
@@ -727,6 +738,10 @@ class ResourceManager(ResourceManagerInterface):
 
                         _resource = AdvancedSecurityWorkflowManager.handle_moderated_uploads(_resource.uuid, instance=_resource)
 
+                    # Keep the materialized visibility index aligned with the Guardian tables
+                    update_visibility_index([_resource.id])
+                    self._invalidate_permissions_cache(_resource.id)
+
                     # Fixup GIS Backend Security Rules Accordingly
                     if not _resource.compare_perms(_prev_perm_spec, _perm_spec):
                         # Avoid setting the permissions if nothing changed
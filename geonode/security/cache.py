@@ -0,0 +1,191 @@
+#########################################################################
+#
+# Copyright (C) 2022 OSGeo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#########################################################################
+import time
+import typing
+import logging
+import threading
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+class PermissionsCache:
+
+    def __init__(self, max_size: int = 10000, timeout: int = 60, cache_alias: typing.Optional[str] = None):
+        """
+        Cache of the permission decisions ("is the user allowed to perform 'permission' on the resource?").
+
+        Decisions are kept in an in-process LRU and, when 'cache_alias' is set, in the given Django cache
+        so that they are shared by all the processes. Invalidations bump a version number, either of a single
+        resource or of all the resources (e.g. on group membership changes), which is part of the decision keys;
+        when a shared cache is configured the version numbers are stored there too, so that an invalidation
+        made by any process is seen by all of them.
+
+        :param max_size: maximum number of decisions kept by the in-process LRU
+        :param timeout: number of seconds after which a decision expires
+        :param cache_alias: optional alias of the Django cache shared by all the processes
+        """
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+        }
+        self._decisions = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def shared_cache(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    @staticmethod
+    def _user_key(user) -> str:
+        if user is None or not user.is_authenticated:
+            return 'anonymous'
+        return str(user.pk)
+
+    @staticmethod
+    def _version_key(resource_id=None) -> str:
+        return f"geonode:perms:version:{resource_id if resource_id is not None else 'all'}"
+
+    def _get_versions(self, resource_id) -> typing.Tuple[int, int]:
+        keys = [self._version_key(), self._version_key(resource_id)]
+        if self.shared_cache is not None:
+            try:
+                versions = self.shared_cache.get_many(keys)
+                return tuple(versions.get(_key, 0) for _key in keys)
+            except Exception as e:
+                logger.debug(f"Could not read the permissions versions from the shared cache: {e}")
+        with self._lock:
+            return tuple(self._versions.get(_key, 0) for _key in keys)
+
+    def _bump_version(self, resource_id=None):
+        key = self._version_key(resource_id)
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            if resource_id is None:
+                self._decisions.clear()
+            self.stats['invalidations'] += 1
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.add(key, 0, timeout=None)
+                self.shared_cache.incr(key)
+            except Exception as e:
+                logger.debug(f"Could not bump the permissions version on the shared cache: {e}")
+
+    def _decision_key(self, user, resource_id, permission) -> str:
+        all_version, resource_version = self._get_versions(resource_id)
+        return f"geonode:perms:{self._user_key(user)}:{resource_id}:{permission}:{all_version}:{resource_version}"
+
+    def get(self, user, resource_id, permission) -> typing.Optional[bool]:
+        """
+        Returns the cached decision, or None if there is no valid decision cached.
+        """
+        key = self._decision_key(user, resource_id, permission)
+        with self._lock:
+            decision = self._decisions.get(key)
+            if decision is not None:
+                allowed, expires = decision
+                if expires > time.monotonic():
+                    self._decisions.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return allowed
+                del self._decisions[key]
+        if self.shared_cache is not None:
+            try:
+                allowed = self.shared_cache.get(key)
+            except Exception as e:
+                logger.debug(f"Could not read the permission decision from the shared cache: {e}")
+                allowed = None
+            if allowed is not None:
+                self._store(key, allowed)
+                with self._lock:
+                    self.stats['hits'] += 1
+                return allowed
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, user, resource_id, permission, allowed: bool):
+        key = self._decision_key(user, resource_id, permission)
+        self._store(key, allowed)
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.set(key, allowed, timeout=self.timeout)
+            except Exception as e:
+                logger.debug(f"Could not store the permission decision on the shared cache: {e}")
+
+    def _store(self, key, allowed: bool):
+        with self._lock:
+            self._decisions[key] = (allowed, time.monotonic() + self.timeout)
+            self._decisions.move_to_end(key)
+            while len(self._decisions) > self.max_size:
+                self._decisions.popitem(last=False)
+
+    def invalidate(self, resource_id=None):
+        """
+        Invalidates the decisions of the given resource, or of all the resources if 'resource_id' is None.
+        """
+        self._bump_version(resource_id)
+
+
+_permissions_cache = None
+
+
+def get_permissions_cache() -> typing.Optional[PermissionsCache]:
+    """
+    Returns the permission decisions cache configured by settings.PERMISSIONS_CACHE, or None if it is disabled.
+    """
+    global _permissions_cache
+    options = getattr(settings, 'PERMISSIONS_CACHE', {})
+    if not options.get('enabled', False):
+        return None
+    if _permissions_cache is None:
+        _permissions_cache = PermissionsCache(
+            options.get('max_size', 10000),
+            options.get('timeout', 60),
+            options.get('cache_alias'))
+    return _permissions_cache
+
+
+def invalidate_permissions_cache(resource_id=None):
+    permissions_cache = get_permissions_cache()
+    if permissions_cache is not None:
+        permissions_cache.invalidate(resource_id)
+
+
+def has_perm(user, permission, obj) -> bool:
+    """
+    Cached counterpart of "user.has_perm(permission, obj)".
+    """
+    permissions_cache = get_permissions_cache()
+    if permissions_cache is None:
+        return user.has_perm(permission, obj)
+    allowed = permissions_cache.get(user, obj.pk, permission)
+    if allowed is None:
+        allowed = user.has_perm(permission, obj)
+        permissions_cache.set(user, obj.pk, permission, allowed)
+    return allowed
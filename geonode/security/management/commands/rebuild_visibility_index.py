@@ -0,0 +1,66 @@
+#########################################################################
+#
+# Copyright (C) 2022 OSGeo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#########################################################################
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from geonode.base.models import ResourceBase
+from geonode.security.utils import update_visibility_index
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized resources visibility index from the Guardian permissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-c',
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=1000,
+            help='Number of resources to process on each iteration')
+        parser.add_argument(
+            '-r',
+            '--resource',
+            dest='resource_ids',
+            type=int,
+            action='append',
+            default=[],
+            help='Only rebuild the index of the specified resource id (can be repeated)')
+
+    def handle(self, *args, **options):
+        chunk_size = options.get('chunk_size')
+        resource_ids = options.get('resource_ids')
+
+        if resource_ids:
+            _ids = list(resource_ids)
+        else:
+            _ids = list(ResourceBase.objects.order_by('id').values_list('id', flat=True))
+
+        _total = len(_ids)
+        _rows = 0
+        for _offset in range(0, _total, chunk_size):
+            _chunk = _ids[_offset:_offset + chunk_size]
+            _rows += update_visibility_index(_chunk)
+            logger.info(f"[{min(_offset + chunk_size, _total)} / {_total}] resources indexed")
+
+        self.stdout.write(f"Visibility index rebuilt: {_total} resources, {_rows} entries.")
@@ -0,0 +1,36 @@
+# Generated by Django 3.2.12 on 2022-04-04 10:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('base', '0080_alter_resourcebase_uuid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVisibility',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='auth.group')),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visibility_index', to='base.resourcebase')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='resourcevisibility',
+            index=models.Index(fields=['user', 'resource'], name='security_rv_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resourcevisibility',
+            index=models.Index(fields=['group', 'resource'], name='security_rv_group_idx'),
+        ),
+    ]
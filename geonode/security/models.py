@@ -24,6 +24,7 @@ import traceback
 
 from functools import reduce
 
+from django.db import models
 from django.db.models import Q
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -425,3 +426,40 @@ class PermissionLevelMixin:
             return False
 
         return True
+
+
+class ResourceVisibility(models.Model):
+    """
+    Materialized "resource x principal" index of the guardian
+    'view_resourcebase' / 'change_resourcebase' object permissions.
+
+    Each row states that either a user or a group is allowed to see a resource.
+    The rows are kept in sync by the "ResourceManager" whenever the permissions
+    of a resource are set or removed, and can be rebuilt from scratch through
+    the "rebuild_visibility_index" management command.
+    """
+    resource = models.ForeignKey(
+        'base.ResourceBase',
+        on_delete=models.CASCADE,
+        related_name='visibility_index')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='+')
+    group = models.ForeignKey(
+        Group,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'resource'], name='security_rv_user_idx'),
+            models.Index(fields=['group', 'resource'], name='security_rv_group_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.resource_id} -> {self.user_id or self.group_id}"
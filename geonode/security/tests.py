@@ -22,6 +22,8 @@ import logging
 import requests
 import importlib
 
+from unittest.mock import patch, MagicMock
+
 from requests.auth import HTTPBasicAuth
 from tastypie.test import ResourceTestCaseMixin
 
@@ -73,12 +75,18 @@ from geonode.geoserver.security import (
     purge_geofence_all,
     sync_geofence_with_guardian,
     sync_resources_with_guardian,
+    diff_geofence_rules,
+    run_geofence_batch,
+    get_geofence_rules_for_perms,
     _get_gwc_filters_and_formats
 )
 
+from .models import ResourceVisibility
 from .utils import (
     get_users_with_perms,
     get_visible_resources,
+    get_resources_with_perms,
+    update_visibility_index,
 )
 
 from .permissions import (
@@ -1590,6 +1598,67 @@ class SecurityTests(ResourceTestCaseMixin, GeoNodeBaseTestSupport):
             user=get_user_model().objects.get(username=self.user))
         self.assertIn(x.title, list(actual.values_list('title', flat=True)))
 
+    def test_get_visible_resources_with_visibility_index(self):
+        standard_user = get_user_model().objects.get(username="bobby")
+        layers = Dataset.objects.all()
+        update_visibility_index(layers.values_list('id', flat=True))
+
+        x = Dataset.objects.get(title='common bar')
+        self.assertTrue(ResourceVisibility.objects.filter(resource_id=x.id).exists())
+        with self.settings(RESOURCE_VISIBILITY_INDEX=False):
+            expected = set(get_resources_with_perms(standard_user).values_list('id', flat=True))
+        with self.settings(RESOURCE_VISIBILITY_INDEX=True):
+            actual = set(get_resources_with_perms(standard_user).values_list('id', flat=True))
+        self.assertSetEqual(expected, actual)
+
+        # removing the permissions through the resource manager must update the index
+        resource_manager.remove_permissions(x.uuid, instance=x)
+        self.assertFalse(ResourceVisibility.objects.filter(resource_id=x.id).exists())
+        with self.settings(RESOURCE_VISIBILITY_INDEX=True):
+            actual = get_visible_resources(queryset=layers, user=standard_user)
+            self.assertNotIn(x.title, list(actual.values_list('title', flat=True)))
+            actual = get_visible_resources(queryset=layers, user=get_user_model().objects.get(username=self.user))
+            self.assertIn(x.title, list(actual.values_list('title', flat=True)))
+
+        # setting the permissions back must restore it
+        resource_manager.set_permissions(x.uuid, instance=x, permissions={"users": {"bobby": ["view_resourcebase"]}})
+        self.assertTrue(ResourceVisibility.objects.filter(resource_id=x.id, user=standard_user).exists())
+        with self.settings(RESOURCE_VISIBILITY_INDEX=True):
+            actual = get_visible_resources(queryset=layers, user=standard_user)
+            self.assertIn(x.title, list(actual.values_list('title', flat=True)))
+
+    def test_resolve_object_with_permissions_cache(self):
+        from django.core.exceptions import PermissionDenied
+        from geonode.utils import resolve_object
+        from geonode.security import cache
+
+        standard_user = get_user_model().objects.get(username="bobby")
+        x = Dataset.objects.get(title='common bar')
+        cache._permissions_cache = None
+        try:
+            with self.settings(PERMISSIONS_CACHE={'enabled': True, 'max_size': 100, 'timeout': 60}):
+                resource_manager.set_permissions(
+                    x.uuid, instance=x, permissions={"users": {"bobby": ["view_resourcebase"]}})
+                permissions_cache = cache.get_permissions_cache()
+                self.assertEqual(resolve_object(None, Dataset, {'pk': x.pk}, user=standard_user), x)
+                self.assertEqual(permissions_cache.stats['misses'], 1)
+                self.assertEqual(resolve_object(None, Dataset, {'pk': x.pk}, user=standard_user), x)
+                self.assertEqual(permissions_cache.stats['hits'], 1)
+
+                # removing the permissions through the resource manager must invalidate the decisions
+                resource_manager.remove_permissions(x.uuid, instance=x)
+                with self.assertRaises(PermissionDenied):
+                    resolve_object(None, Dataset, {'pk': x.pk}, user=standard_user)
+                self.assertEqual(permissions_cache.stats['misses'], 2)
+
+                # so must group membership changes
+                standard_user.groups.add(Group.objects.create(name='permissions_cache_test'))
+                with self.assertRaises(PermissionDenied):
+                    resolve_object(None, Dataset, {'pk': x.pk}, user=standard_user)
+                self.assertEqual(permissions_cache.stats['misses'], 3)
+        finally:
+            cache._permissions_cache = None
+
     def test_perm_spec_conversion(self):
         """
         Perm Spec from extended to cmpact and viceversa
@@ -2064,6 +2133,96 @@ class TestGetUserGeolimits(TestCase):
         self.assertTrue(_disable_dataset_cache)
 
 
+class TestGeofenceRulesDiff(TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+        self.layer = create_single_dataset("diff-layer")
+        self.owner = get_user_model().objects.get(username='admin')
+
+    def test_get_geofence_rules_for_perms(self):
+        rules = get_geofence_rules_for_perms(self.layer, ['view_resourcebase', 'download_resourcebase'], user=self.owner)
+        self.assertTrue(all(_r['userName'] == 'admin' and _r['roleName'] is None for _r in rules))
+        _wfs = [(_r['request'], _r['access']) for _r in rules if _r['service'] == 'WFS']
+        # the WFS-T requests are denied before WFS is allowed
+        self.assertEqual(_wfs[-1], (None, 'ALLOW'))
+        self.assertIn(('TRANSACTION', 'DENY'), _wfs)
+
+    def test_diff_geofence_rules(self):
+        rules = get_geofence_rules_for_perms(self.layer, ['view_resourcebase'], user=self.owner) + \
+            get_geofence_rules_for_perms(self.layer, ['view_resourcebase'])
+        existing_rules = [dict(_r, id=_id, priority=_id) for _id, _r in enumerate(rules)]
+
+        # nothing changed
+        self.assertEqual(diff_geofence_rules(existing_rules, rules), ([], []))
+
+        # the anonymous rules are revoked, the ones of the owner are left untouched
+        owner_rules = [_r for _r in rules if _r['userName']]
+        to_delete, to_insert = diff_geofence_rules(existing_rules, owner_rules)
+        self.assertEqual(to_delete, [_r['id'] for _r in existing_rules if not _r['userName']])
+        self.assertEqual(to_insert, [])
+
+        # the owner rules are replaced altogether
+        new_owner_rules = get_geofence_rules_for_perms(
+            self.layer, ['view_resourcebase', 'download_resourcebase'], user=self.owner)
+        to_delete, to_insert = diff_geofence_rules(existing_rules, new_owner_rules)
+        self.assertEqual(to_delete, [_r['id'] for _r in existing_rules])
+        self.assertEqual(to_insert, new_owner_rules)
+
+    def test_run_geofence_batch(self):
+        rule = get_geofence_rules_for_perms(self.layer, ['view_resourcebase'], user=self.owner)[0]
+        with patch('geonode.geoserver.security.requests') as requests_mock:
+            requests_mock.post.return_value = MagicMock(status_code=200, text='')
+            self.assertTrue(run_geofence_batch([('delete', 10), ('insert', rule)]))
+
+        # the operations are executed with a single request
+        requests_mock.post.assert_called_once()
+        args, kwargs = requests_mock.post.call_args
+        self.assertTrue(args[0].endswith('rest/geofence/batch/exec'))
+        self.assertEqual(
+            kwargs['json'],
+            {'Batch': {'operations': [
+                {'@service': 'rules', '@type': 'delete', '@id': 10},
+                {'@service': 'rules', '@type': 'insert', 'Rule': rule}]}})
+        requests_mock.delete.assert_not_called()
+
+    def test_run_geofence_batch_fallback(self):
+        rules = get_geofence_rules_for_perms(self.layer, ['view_resourcebase'], user=self.owner)[:2]
+        operations = [('delete', 10), ('insert', rules[0]), ('insert', rules[1])]
+        with patch('geonode.geoserver.security.requests') as requests_mock:
+            # the batch fails, then the operations are executed one by one
+            requests_mock.post.side_effect = [
+                MagicMock(status_code=500, text='Internal Server Error'),
+                MagicMock(status_code=409, text='Duplicate Rule'),
+                MagicMock(status_code=201, text='')]
+            requests_mock.delete.return_value = MagicMock(status_code=200, text='')
+            # the duplicated rules are not errors
+            self.assertTrue(run_geofence_batch(operations))
+            self.assertEqual(requests_mock.post.call_count, 3)
+            self.assertEqual(
+                [_call[1]['json'] for _call in requests_mock.post.call_args_list[1:]],
+                [{'Rule': rules[0]}, {'Rule': rules[1]}])
+            requests_mock.delete.assert_called_once()
+            self.assertTrue(requests_mock.delete.call_args[0][0].endswith('rest/geofence/rules/id/10'))
+
+            # any other failure of a single operation fails the batch
+            requests_mock.post.side_effect = [
+                Exception('Connection refused'),
+                MagicMock(status_code=400, text='Bad Request'),
+                MagicMock(status_code=201, text='')]
+            self.assertFalse(run_geofence_batch(operations))
+            self.assertEqual(requests_mock.post.call_count, 6)
+
+            # as well as a connection error, without stopping the other operations
+            requests_mock.post.side_effect = [
+                Exception('Connection refused'),
+                Exception('Connection refused'),
+                MagicMock(status_code=201, text='')]
+            self.assertFalse(run_geofence_batch(operations))
+            self.assertEqual(requests_mock.post.call_count, 9)
+            self.assertEqual(requests_mock.delete.call_count, 3)
+
+
 class SetPermissionsTestCase(GeoNodeBaseTestSupport):
 
     def setUp(self):
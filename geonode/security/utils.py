@@ -22,13 +22,14 @@ import logging
 from itertools import chain
 
 from django.apps import apps
+from django.db import transaction
 from django.db.models import Q
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import Group, Permission
 from guardian.utils import get_user_obj_perms_model
-from guardian.shortcuts import get_objects_for_user
+from guardian.shortcuts import get_objects_for_user, get_anonymous_user
 
 from geonode.groups.conf import settings as groups_settings
 from geonode.security.permissions import (
@@ -47,6 +48,81 @@ from geonode.security.permissions import (
 
 logger = logging.getLogger(__name__)
 
+VISIBILITY_PERMISSIONS = ['view_resourcebase', 'change_resourcebase']
+
+
+def is_visibility_index_enabled() -> bool:
+    return getattr(settings, 'RESOURCE_VISIBILITY_INDEX', False)
+
+
+def update_visibility_index(resource_ids) -> int:
+    """
+    Recomputes the "ResourceVisibility" rows of the given resources from the guardian
+    object permissions tables. Returns the number of index rows written.
+    """
+    from geonode.base.models import ResourceBase
+    from geonode.security.models import ResourceVisibility
+    from guardian.models import UserObjectPermission, GroupObjectPermission
+
+    resource_ids = set(ResourceBase.objects.filter(id__in=list(resource_ids)).values_list('id', flat=True))
+    if not resource_ids:
+        return 0
+
+    _perms_filter = dict(
+        content_type=ContentType.objects.get_for_model(ResourceBase),
+        permission__codename__in=VISIBILITY_PERMISSIONS,
+        object_pk__in=[str(_id) for _id in resource_ids])
+    _entries = set()
+    for object_pk, user_id in UserObjectPermission.objects.filter(**_perms_filter).values_list('object_pk', 'user_id'):
+        _entries.add((int(object_pk), user_id, None))
+    for object_pk, group_id in GroupObjectPermission.objects.filter(**_perms_filter).values_list('object_pk', 'group_id'):
+        _entries.add((int(object_pk), None, group_id))
+
+    with transaction.atomic():
+        ResourceVisibility.objects.filter(resource_id__in=resource_ids).delete()
+        ResourceVisibility.objects.bulk_create(
+            [ResourceVisibility(resource_id=resource_id, user_id=user_id, group_id=group_id)
+             for resource_id, user_id, group_id in _entries],
+            batch_size=1000)
+    return len(_entries)
+
+
+def get_objects_visible_to(user, accept_global_perms=True):
+    """
+    Index based equivalent of:
+
+        get_objects_for_user(
+            user,
+            ['base.view_resourcebase', 'base.change_resourcebase'],
+            any_perm=True)
+
+    Joins the "ResourceVisibility" index on integer keys instead of scanning
+    the guardian tables (whose "object_pk" is a varchar).
+    """
+    from geonode.base.models import ResourceBase
+    from geonode.security.models import ResourceVisibility
+
+    if not user or user.is_anonymous:
+        user = get_anonymous_user()
+    if user.is_superuser:
+        return ResourceBase.objects.all()
+    if accept_global_perms and any(user.has_perm(f'base.{_perm}') for _perm in VISIBILITY_PERMISSIONS):
+        return ResourceBase.objects.all()
+    _visible = ResourceVisibility.objects.filter(
+        Q(user=user) | Q(group__in=user.groups.all())).values('resource_id')
+    return ResourceBase.objects.filter(id__in=_visible)
+
+
+def _get_allowed_resources(user, shortcut_kwargs={}):
+    if is_visibility_index_enabled() and set(shortcut_kwargs.keys()) <= {'accept_global_perms'}:
+        return get_objects_visible_to(user, **shortcut_kwargs)
+    return get_objects_for_user(
+        user,
+        ['base.view_resourcebase', 'base.change_resourcebase'],
+        any_perm=True,
+        **shortcut_kwargs
+    )
+
 
 def get_visible_resources(queryset,
                           user,
@@ -81,10 +157,7 @@ def get_visible_resources(queryset,
 
     if not is_admin:
         if user:
-            _allowed_resources = get_objects_for_user(
-                user,
-                ['base.view_resourcebase', 'base.change_resourcebase'],
-                any_perm=True)
+            _allowed_resources = _get_allowed_resources(user)
             filter_set = filter_set.filter(id__in=_allowed_resources.values('id'))
 
         if admin_approval_required:
@@ -164,6 +237,82 @@ def perms_as_set(perm) -> set:
     return perm if isinstance(perm, set) else set(perm if isinstance(perm, list) else [perm])
 
 
+def get_user_perms_for_objects(user, objects) -> list:
+    """
+    Batched counterpart of "PermissionLevelMixin.get_user_perms": returns, for each one
+    of the given objects, the set of permissions codenames the user has on it.
+    The number of queries depends on the number of distinct models of the objects,
+    not on the number of objects.
+    """
+    from guardian.core import ObjectPermissionChecker
+    from geonode.base.models import Configuration
+
+    config = Configuration.load()
+    objects = list(objects)
+    perms = [set() for _obj in objects]
+
+    by_model = {}
+    for _index, _obj in enumerate(objects):
+        by_model.setdefault(type(_obj), []).append(_index)
+
+    for model, indexes in by_model.items():
+        _objs = [objects[_index] for _index in indexes]
+        ctype = ContentType.objects.get_for_model(model)
+        ctype_perms = set(Permission.objects.filter(
+            codename__in=VIEW_PERMISSIONS + DOWNLOAD_PERMISSIONS + ADMIN_PERMISSIONS + SERVICE_PERMISSIONS +
+            DATASET_ADMIN_PERMISSIONS + DATASET_EDIT_STYLE_PERMISSIONS,
+            content_type_id=ctype.id
+        ).values_list('codename', flat=True))
+
+        if not user.is_superuser:
+            user_model = get_user_obj_perms_model(model)
+            explicit_perms = {}
+            for _object_pk, _codename in user_model.objects.filter(
+                    object_pk__in=[str(_obj.pk) for _obj in _objs],
+                    content_type_id=ctype.id,
+                    user__username=str(user),
+                    permission__codename__in=ctype_perms).values_list('object_pk', 'permission__codename'):
+                explicit_perms.setdefault(str(_object_pk), set()).add(_codename)
+
+            # get user's implicit perms for anyone flag
+            checker = ObjectPermissionChecker(user)
+            checker.prefetch_perms(_objs)
+            implicit_perms = {}
+            for _obj in _objs:
+                _implicit_perms = set(checker.get_perms(_obj))
+                # filter out implicit permissions unappliable to "subtype != 'vector'"
+                if getattr(_obj, 'subtype', None) == 'raster':
+                    _implicit_perms -= set(DATASET_EDIT_DATA_PERMISSIONS)
+                elif getattr(_obj, 'subtype', None) != 'vector':
+                    _implicit_perms -= set(DATASET_ADMIN_PERMISSIONS)
+                implicit_perms[_obj.pk] = _implicit_perms
+            assigned_perms = set(user_model.objects.filter(
+                permission__codename__in=set(chain.from_iterable(implicit_perms.values()))
+            ).values_list('permission__codename', flat=True).distinct())
+
+        for _index, _obj in zip(indexes, _objs):
+            perms_to_fetch = VIEW_PERMISSIONS + DOWNLOAD_PERMISSIONS + ADMIN_PERMISSIONS + SERVICE_PERMISSIONS
+            # include explicit permissions appliable to "subtype == 'vector'"
+            if getattr(_obj, 'subtype', None) == 'vector':
+                perms_to_fetch += DATASET_ADMIN_PERMISSIONS
+            elif getattr(_obj, 'subtype', None) == 'raster':
+                perms_to_fetch += DATASET_EDIT_STYLE_PERMISSIONS
+            resource_perms = ctype_perms.intersection(perms_to_fetch)
+
+            if not user.is_superuser:
+                resource_perms = explicit_perms.get(str(_obj.pk), set()).intersection(resource_perms).union(
+                    implicit_perms[_obj.pk].intersection(assigned_perms))
+
+            # filter out permissions for edit, change or publish if readonly mode is active
+            if config.read_only:
+                resource_perms = {
+                    _codename for _codename in resource_perms
+                    if not any(_prefix in _codename for _prefix in ('change', 'delete', 'publish'))
+                }
+            perms[_index] = resource_perms
+    return perms
+
+
 def get_resources_with_perms(user, filter_options={}, shortcut_kwargs={}):
     """
     Returns resources a user has access to.
@@ -174,12 +323,7 @@ def get_resources_with_perms(user, filter_options={}, shortcut_kwargs={}):
     if settings.SKIP_PERMS_FILTER:
         resources = ResourceBase.objects.all()
     else:
-        resources = get_objects_for_user(
-            user,
-            ['base.view_resourcebase', 'base.change_resourcebase'],
-            any_perm=True,
-            **shortcut_kwargs
-        )
+        resources = _get_allowed_resources(user, shortcut_kwargs=shortcut_kwargs)
 
     resources_with_perms = get_visible_resources(
         resources,
@@ -189,24 +333,23 @@ def get_resources_with_perms(user, filter_options={}, shortcut_kwargs={}):
         private_groups_not_visibile=settings.GROUP_PRIVATE_RESOURCES)
 
     if filter_options:
-        if resources_with_perms and resources_with_perms.count() > 0:
-            if filter_options.get('title_filter'):
-                resources_with_perms = resources_with_perms.filter(
-                    title__icontains=filter_options.get('title_filter')
-                )
-            type_filters = []
-            if filter_options.get('type_filter'):
-                _type_filter = filter_options.get('type_filter')
-                if _type_filter:
-                    type_filters.append(_type_filter)
-                # get subtypes for geoapps
-                if _type_filter == 'geoapp':
-                    type_filters.extend(get_geoapp_subtypes())
-
-            if type_filters:
-                resources_with_perms = resources_with_perms.filter(
-                    polymorphic_ctype__model__in=type_filters
-                )
+        if filter_options.get('title_filter'):
+            resources_with_perms = resources_with_perms.filter(
+                title__icontains=filter_options.get('title_filter')
+            )
+        type_filters = []
+        if filter_options.get('type_filter'):
+            _type_filter = filter_options.get('type_filter')
+            if _type_filter:
+                type_filters.append(_type_filter)
+            # get subtypes for geoapps
+            if _type_filter == 'geoapp':
+                type_filters.extend(get_geoapp_subtypes())
+
+        if type_filters:
+            resources_with_perms = resources_with_perms.filter(
+                polymorphic_ctype__model__in=type_filters
+            )
 
     return resources_with_perms
 
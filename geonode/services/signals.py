@@ -22,8 +22,11 @@
 import logging
 
 from django.dispatch import receiver
+from django.db import transaction
 from django.db.models import signals
 
+from geonode.proxy.utils import invalidate_proxy_allowed_hosts
+
 from .models import Service
 
 logger = logging.getLogger(__name__)
@@ -40,3 +43,11 @@ def remove_harvesters(instance, **kwargs):
 def post_save_service(instance, sender, created, **kwargs):
     if created:
         instance.set_default_permissions()
+
+
+@receiver(signals.post_save, sender=Service)
+@receiver(signals.post_delete, sender=Service)
+def service_base_url_changed(instance, sender, **kwargs):
+    """Rebuild the hosts the proxy can send requests to."""
+    invalidate_proxy_allowed_hosts()
+    transaction.on_commit(invalidate_proxy_allowed_hosts)
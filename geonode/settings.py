@@ -1033,6 +1033,8 @@ OGC_SERVER = {
         'BACKOFF_FACTOR': float(os.getenv('OGC_REQUEST_BACKOFF_FACTOR', '0.3')),
         'POOL_MAXSIZE': int(os.getenv('OGC_REQUEST_POOL_MAXSIZE', '10')),
         'POOL_CONNECTIONS': int(os.getenv('OGC_REQUEST_POOL_CONNECTIONS', '10')),
+        # Seconds the users' access tokens are cached by the HTTP client; 0 disables the cache
+        'TOKEN_CACHE_TIMEOUT': int(os.getenv('OGC_REQUEST_TOKEN_CACHE_TIMEOUT', '60')),
     }
 }
 
@@ -1260,6 +1262,25 @@ except ValueError:
 # The proxy to use when making cross origin requests.
 PROXY_URL = os.environ.get('PROXY_URL', '/proxy/?url=')
 
+# Cache of the remote Services hosts the proxy is allowed to send requests to; it is rebuilt
+# on Service save/delete. Set 'cache_alias' to one of the CACHES in order to share it among processes.
+PROXY_ALLOWED_HOSTS_CACHE = {
+    'timeout': int(os.getenv('PROXY_ALLOWED_HOSTS_CACHE_TIMEOUT', 30)),
+    'cache_alias': os.getenv('PROXY_ALLOWED_HOSTS_CACHE_ALIAS', None),
+}
+
+# Forward the proxied responses chunk by chunk instead of buffering them in memory
+PROXY_STREAMING = ast.literal_eval(os.getenv('PROXY_STREAMING', 'False'))
+
+# Datasets download: size of the reads from the storage, maximum number of bytes read ahead of
+# the compression and file extensions added to the archive without compressing them again
+DOWNLOAD_READ_CHUNK_SIZE = int(os.getenv('DOWNLOAD_READ_CHUNK_SIZE', 1024 * 1024))
+DOWNLOAD_READ_AHEAD_SIZE = int(os.getenv('DOWNLOAD_READ_AHEAD_SIZE', 8 * 1024 * 1024))
+DOWNLOAD_STORED_EXTENSIONS = (
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.kmz',
+    '.tif', '.tiff', '.jpg', '.jpeg', '.png', '.jp2', '.ecw', '.sid', '.laz',
+)
+
 # Haystack Search Backend Configuration. To enable,
 # first install the following:
 # - pip install django-haystack
@@ -1269,6 +1290,18 @@ PROXY_URL = os.environ.get('PROXY_URL', '/proxy/?url=')
 HAYSTACK_SEARCH = ast.literal_eval(os.getenv('HAYSTACK_SEARCH', 'False'))
 # Avoid permissions prefiltering
 SKIP_PERMS_FILTER = ast.literal_eval(os.getenv('SKIP_PERMS_FILTER', 'False'))
+# Resolve the visible resources through the materialized visibility index instead of
+# the Guardian tables. Run "python manage.py rebuild_visibility_index" before enabling it.
+RESOURCE_VISIBILITY_INDEX = ast.literal_eval(os.getenv('RESOURCE_VISIBILITY_INDEX', 'False'))
+# Cache of the per-user / per-resource permission decisions taken by "resolve_object" and the OWS views.
+# Decisions are invalidated when the permissions of a resource or the group memberships change; set
+# 'cache_alias' to one of the CACHES in order to share the decisions and invalidations among processes.
+PERMISSIONS_CACHE = {
+    'enabled': ast.literal_eval(os.getenv('PERMISSIONS_CACHE_ENABLED', 'False')),
+    'max_size': int(os.getenv('PERMISSIONS_CACHE_MAX_SIZE', 10000)),
+    'timeout': int(os.getenv('PERMISSIONS_CACHE_TIMEOUT', 60)),
+    'cache_alias': os.getenv('PERMISSIONS_CACHE_ALIAS', None),
+}
 # Update facet counts from Haystack
 HAYSTACK_FACET_COUNTS = ast.literal_eval(os.getenv('HAYSTACK_FACET_COUNTS', 'True'))
 if HAYSTACK_SEARCH:
@@ -1972,6 +2005,23 @@ THUMBNAIL_SIZE = {
     'height': int(os.environ.get('THUMBNAIL_GENERATOR_DEFAULT_SIZE_HEIGHT', 200))
 }
 
+# concurrent fetching of the thumbnails' background tiles and WMS images:
+# size of the threads pool and max number of simultaneous requests to the same host
+THUMBNAIL_CONCURRENCY = {
+    'max_workers': int(os.environ.get('THUMBNAIL_CONCURRENCY_MAX_WORKERS', 4)),
+    'max_per_host': int(os.environ.get('THUMBNAIL_CONCURRENCY_MAX_PER_HOST', 2)),
+}
+
+# persistent on-disk cache of the thumbnails' background tiles, shared by all the processes of a host
+THUMBNAIL_TILES_CACHE = {
+    'enabled': ast.literal_eval(os.environ.get('THUMBNAIL_TILES_CACHE_ENABLED', 'False')),
+    'location': os.environ.get('THUMBNAIL_TILES_CACHE_LOCATION', '/tmp/geonode_thumbs_tiles'),
+    # max size in bytes, least recently used tiles are evicted beyond it
+    'max_size': int(os.environ.get('THUMBNAIL_TILES_CACHE_MAX_SIZE', 512 * 1024 * 1024)),
+    # seconds after which a cached tile is fetched again
+    'ttl': int(os.environ.get('THUMBNAIL_TILES_CACHE_TTL', 7 * 24 * 3600)),
+}
+
 THUMBNAIL_BACKGROUND = {
     # class generating thumbnail's background
     'class': 'geonode.thumbs.background.WikiMediaTileBackground',
@@ -2026,6 +2076,35 @@ MONITORING_SERVICE_NAME = os.getenv("MONITORING_SERVICE_NAME", 'geonode')
 # how long monitoring data should be stored
 MONITORING_DATA_TTL = timedelta(days=int(os.getenv("MONITORING_DATA_TTL", 365)))
 
+# store the requests events through a per-process background writer, in batches,
+# instead of writing them while serving the requests
+MONITORING_ASYNC_WRITER = ast.literal_eval(os.environ.get('MONITORING_ASYNC_WRITER', 'False'))
+# max number of events waiting to be written; when full, new events are dropped
+MONITORING_WRITER_QUEUE_SIZE = int(os.getenv('MONITORING_WRITER_QUEUE_SIZE', 10000))
+MONITORING_WRITER_BATCH_SIZE = int(os.getenv('MONITORING_WRITER_BATCH_SIZE', 200))
+# max seconds an event waits in the queue before being flushed
+MONITORING_WRITER_FLUSH_INTERVAL = float(os.getenv('MONITORING_WRITER_FLUSH_INTERVAL', 2.0))
+# seconds a request waits for room in a full queue before the event is dropped
+MONITORING_WRITER_PUT_TIMEOUT = float(os.getenv('MONITORING_WRITER_PUT_TIMEOUT', 0))
+# number of periods aggregated in parallel by aggregate_past_periods
+MONITORING_AGGREGATION_WORKERS = int(os.getenv('MONITORING_AGGREGATION_WORKERS', 1))
+# number of requests read per page from the GeoServer monitor export
+MONITORING_GEOSERVER_PAGE_SIZE = int(os.getenv('MONITORING_GEOSERVER_PAGE_SIZE', 1000))
+# concurrent connections used when the monitor requests must be fetched one by one
+MONITORING_GEOSERVER_FETCH_WORKERS = int(os.getenv('MONITORING_GEOSERVER_FETCH_WORKERS', 8))
+# number of GeoServer requests stored per bulk insert
+MONITORING_GEOSERVER_BATCH_SIZE = int(os.getenv('MONITORING_GEOSERVER_BATCH_SIZE', 500))
+# number of resolved user agents and client locations kept in memory by each process
+MONITORING_USER_AGENT_CACHE_SIZE = int(os.getenv('MONITORING_USER_AGENT_CACHE_SIZE', 1000))
+MONITORING_GEOIP_CACHE_SIZE = int(os.getenv('MONITORING_GEOIP_CACHE_SIZE', 10000))
+# time range of each partition of the monitoring tables (day, week or month), once converted
+# with the partition_monitoring_data command (PostgreSQL only)
+MONITORING_PARTITION_INTERVAL = os.getenv('MONITORING_PARTITION_INTERVAL', 'week')
+# number of partitions created ahead of the current one
+MONITORING_PARTITIONS_AHEAD = int(os.getenv('MONITORING_PARTITIONS_AHEAD', 2))
+# number of expired rows deleted per transaction when clearing old data
+MONITORING_DELETE_BATCH_SIZE = int(os.getenv('MONITORING_DELETE_BATCH_SIZE', 10000))
+
 # this will disable csrf check for notification config views,
 # use with caution - for dev purpose only
 MONITORING_DISABLE_CSRF = ast.literal_eval(os.environ.get('MONITORING_DISABLE_CSRF', 'False'))
@@ -35,7 +35,7 @@ from geonode.layers.models import Attribute
 from geonode.geoserver.helpers import set_attributes
 from geonode.tests.base import GeoNodeBaseTestSupport
 from geonode.br.management.commands.utils.utils import ignore_time
-from geonode.utils import copy_tree, fixup_shp_columnnames, unzip_file
+from geonode.utils import copy_tree, fixup_shp_columnnames, unzip_file, HttpSessionsPool
 
 
 class TestCopyTree(GeoNodeBaseTestSupport):
@@ -219,3 +219,24 @@ class TestSetAttributes(GeoNodeBaseTestSupport):
         # The name and type should be set as provided by attribute map
         for a in _l.attributes:
             self.assertIn([a.attribute, a.attribute_type], expected_results)
+
+
+class TestHttpSessionsPool(GeoNodeBaseTestSupport):
+
+    def test_sessions_are_reused_per_host(self):
+        pool = HttpSessionsPool()
+        _args = dict(retries=1, backoff_factor=0.3, status_forcelist=(500, ), pool_connections=10, pool_maxsize=10)
+        session = pool.get_session('http://localhost:8080/geoserver/ows', **_args)
+        self.assertIs(session, pool.get_session('http://localhost:8080/geoserver/rest', **_args))
+        self.assertIsNot(session, pool.get_session('http://example.org/', **_args))
+        self.assertIsNot(session, pool.get_session('http://localhost:8080/geoserver/ows', **dict(_args, retries=3)))
+
+        stats = pool.stats()
+        self.assertEqual(stats['sessions'], 3)
+        self.assertEqual(stats['requests'], 4)
+        self.assertEqual(stats['hosts']['http://localhost:8080']['sessions'], 2)
+
+        # forked processes must not share the parent's sessions
+        with patch('geonode.utils.os.getpid', return_value=stats['pid'] + 1):
+            self.assertIsNot(session, pool.get_session('http://localhost:8080/geoserver/ows', **_args))
+            self.assertEqual(pool.stats()['sessions'], 1)
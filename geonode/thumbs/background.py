@@ -24,6 +24,7 @@ import logging
 import mercantile
 
 from io import BytesIO
+from functools import partial
 from pyproj import Transformer
 from abc import ABC, abstractmethod
 from math import ceil, floor, copysign
@@ -33,6 +34,7 @@ from django.conf import settings
 from django.utils.html import strip_tags
 
 from geonode.thumbs import utils
+from geonode.thumbs.cache import get_tiles_cache
 from geonode.utils import http_client
 from geonode.thumbs.exceptions import ThumbnailError
 
@@ -342,34 +344,24 @@ class GenericXYZBackground(BaseThumbBackground):
             (250, 250, 250),
         )
 
+        tiles = []
         for offset_x, x in enumerate(tiles_rows):
             for offset_y, y in enumerate(tiles_cols):
                 if self.tms:
                     y = (2 ** zoom) - y - 1
-                imgurl = self.url.format(x=x, y=y, z=zoom)
-
-                im = None
-                for retries in range(self.max_retries):
-                    try:
-                        resp, content = http_client.request(imgurl)
-                        if resp.status_code > 400:
-                            retries = self.max_retries - 1
-                            raise Exception(f"{strip_tags(content)}")
-                        im = BytesIO(content)
-                        Image.open(im).verify()  # verify that it is, in fact an image
-                        break
-                    except Exception as e:
-                        logger.error(f"Thumbnail background fetching from {imgurl} failed {retries} time(s) with: {e}")
-                        if retries + 1 == self.max_retries:
-                            raise e
-                        time.sleep(self.retry_delay)
-                        continue
-
-                if im:
-                    image = Image.open(im)  # "re-open" the file (required after running verify method)
-
-                    # add the fetched tile to the background image, placing it under proper coordinates
-                    background.paste(image, (offset_x * self.tile_size, offset_y * self.tile_size + fixed_top_offset))
+                tiles.append(((offset_x, offset_y), (x, y)))
+
+        _start = time.perf_counter()
+        images = utils.fetch_concurrently(
+            [(self.url.format(x=x, y=y, z=zoom), partial(self.fetch_tile, x, y, zoom)) for _, (x, y) in tiles])
+        logger.debug(f"Thumbnail background: {len(tiles)} tiles fetched in {time.perf_counter() - _start:.3f}s")
+
+        for ((offset_x, offset_y), _), im in zip(tiles, images):
+            if im:
+                image = Image.open(im)  # "re-open" the file (required after running verify method)
+
+                # add the fetched tile to the background image, placing it under proper coordinates
+                background.paste(image, (offset_x * self.tile_size, offset_y * self.tile_size + fixed_top_offset))
 
         # get BBOX of the tiles
         top_left_bounds = mercantile.bounds(top_left_tile)
@@ -419,6 +411,45 @@ class GenericXYZBackground(BaseThumbBackground):
             raise ThumbnailError("Thumbnail background outside the allowed area.")
         return background
 
+    def fetch_tile(self, x: int, y: int, zoom: int) -> typing.Optional[BytesIO]:
+        """
+        Fetches a single Slippy Map tile, retrying self.max_retries times and waiting self.retry_delay
+        seconds between consecutive requests. When the tiles cache is enabled, cached tiles are returned
+        without hitting the provider and fetched ones are stored into it.
+
+        :param x: x coordinate of the tile (already converted for TMS services)
+        :param y: y coordinate of the tile (already converted for TMS services)
+        :param zoom: zoom level of the tile
+        :return: the verified tile image content
+        """
+        tiles_cache = get_tiles_cache()
+        if tiles_cache:
+            content = tiles_cache.get(self.url, zoom, x, y)
+            if content:
+                return BytesIO(content)
+
+        imgurl = self.url.format(x=x, y=y, z=zoom)
+        im = None
+        for retries in range(self.max_retries):
+            try:
+                resp, content = http_client.request(imgurl)
+                if resp.status_code > 400:
+                    retries = self.max_retries - 1
+                    raise Exception(f"{strip_tags(content)}")
+                im = BytesIO(content)
+                Image.open(im).verify()  # verify that it is, in fact an image
+                break
+            except Exception as e:
+                logger.error(f"Thumbnail background fetching from {imgurl} failed {retries} time(s) with: {e}")
+                if retries + 1 == self.max_retries:
+                    raise e
+                time.sleep(self.retry_delay)
+                continue
+
+        if im and tiles_cache:
+            tiles_cache.set(self.url, zoom, x, y, im.getvalue())
+        return im
+
     def calculate_zoom(self):
         # maximum number of needed tiles for thumbnail of given width and height
         max_tiles = (ceil(self.thumbnail_width / self.tile_size) + 1) * (
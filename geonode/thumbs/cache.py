@@ -0,0 +1,159 @@
+#########################################################################
+#
+# Copyright (C) 2022 OSGeo
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#########################################################################
+import os
+import time
+import typing
+import hashlib
+import logging
+import tempfile
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TilesCache:
+
+    def __init__(self, location: str, max_size: int, ttl: int, evict_every: int = 100):
+        """
+        Persistent on-disk cache of the Slippy Map tiles used as thumbnails background.
+
+        Tiles are stored as plain files under 'location', keyed by the provider's URL template and the tile's
+        z, x, y coordinates, so that the cache can be shared by all the processes (e.g. Celery workers) of a host.
+        Files are written atomically; the modification time of a file is its creation time (used for the TTL),
+        while its access time is updated on every hit (used for the LRU eviction).
+
+        :param location: directory where the tiles are stored
+        :param max_size: maximum size in bytes of the cache; least recently used tiles are evicted beyond it
+        :param ttl: number of seconds after which a tile is considered expired
+        :param evict_every: number of writes of the current process between two evictions runs
+        """
+        self.location = location
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evict_every = evict_every
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+        }
+        self._writes_since_eviction = 0
+        self._lock = threading.Lock()
+
+    def _path(self, url_template: str, z: int, x: int, y: int) -> str:
+        provider = hashlib.md5(url_template.encode()).hexdigest()
+        return os.path.join(self.location, provider, str(z), str(x), f"{y}.tile")
+
+    def _count(self, key: str, value: int = 1):
+        with self._lock:
+            self.stats[key] += value
+
+    def get(self, url_template: str, z: int, x: int, y: int) -> typing.Optional[bytes]:
+        path = self._path(url_template, z, x, y)
+        try:
+            stat = os.stat(path)
+            if time.time() - stat.st_mtime > self.ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "rb") as tile:
+                content = tile.read()
+            # keep the creation time (TTL), refresh the last access time (LRU)
+            os.utime(path, (time.time(), stat.st_mtime))
+        except OSError:
+            self._count('misses')
+            return None
+        self._count('hits')
+        return content
+
+    def set(self, url_template: str, z: int, x: int, y: int, content: bytes):
+        path = self._path(url_template, z, x, y)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as tile:
+                tile.write(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not store the tile {path} into the cache: {e}")
+            return
+        self._count('writes')
+
+        with self._lock:
+            self._writes_since_eviction += 1
+            evict = self._writes_since_eviction >= self.evict_every
+            if evict:
+                self._writes_since_eviction = 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes the expired tiles, then the least recently used ones until the cache size
+        goes back below the 90% of max_size.
+        """
+        now = time.time()
+        tiles = []
+        size = 0
+        for root, _, files in os.walk(self.location):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                    if now - stat.st_mtime > self.ttl:
+                        os.remove(path)
+                        self._count('evictions')
+                        continue
+                except OSError:
+                    continue
+                tiles.append((stat.st_atime, stat.st_size, path))
+                size += stat.st_size
+
+        if size > self.max_size:
+            tiles.sort()
+            for _, tile_size, path in tiles:
+                if size <= self.max_size * 0.9:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= tile_size
+                self._count('evictions')
+        logger.debug(f"Thumbnails tiles cache evicted, current size {size} bytes, stats {self.stats}")
+
+
+_tiles_cache = None
+
+
+def get_tiles_cache() -> typing.Optional[TilesCache]:
+    """
+    Returns the tiles cache configured by settings.THUMBNAIL_TILES_CACHE, or None if it is disabled.
+    """
+    global _tiles_cache
+    options = getattr(settings, 'THUMBNAIL_TILES_CACHE', {})
+    if not options.get('enabled', False):
+        return None
+    if _tiles_cache is None:
+        _tiles_cache = TilesCache(
+            options.get('location', os.path.join(tempfile.gettempdir(), 'geonode_thumbs_tiles')),
+            options.get('max_size', 512 * 1024 * 1024),
+            options.get('ttl', 7 * 24 * 3600))
+    return _tiles_cache
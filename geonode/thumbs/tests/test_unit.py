@@ -17,11 +17,16 @@
 #
 #########################################################################
 
+import os
 import re
+import time
 import uuid
+import tempfile
 
+from functools import partial
 from unittest.mock import patch, PropertyMock, MagicMock
 from django.conf import settings
+from django.test.utils import override_settings
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import Polygon
 from geonode.documents.models import Document
@@ -30,6 +35,7 @@ from geonode.resource.manager import resource_manager
 
 from geonode.thumbs import utils
 from geonode.thumbs import thumbnails
+from geonode.thumbs.cache import TilesCache
 from geonode.layers.models import Dataset
 from geonode.utils import DisableDjangoSignals
 from geonode.maps.models import Map, MapLayer
@@ -80,6 +86,49 @@ class ThumbnailsUtilsUnitTest(GeoNodeBaseSimpleTestSupport):
         self.assertEqual(height / width, ratio, "Expected ratio to be equal target ratio after transformation")
         self.assertEqual(center, new_center, "Expected center to be preserved after transformation")
 
+    @override_settings(THUMBNAIL_CONCURRENCY={"max_workers": 4, "max_per_host": 2})
+    def test_fetch_concurrently(self):
+        urls = [f"http://tiles-{i % 2}.test/{i}.png" for i in range(10)]
+        results = utils.fetch_concurrently([(url, partial(str.upper, url)) for url in urls])
+        self.assertEqual([url.upper() for url in urls], results, "Expected results in the same order of the tasks")
+
+        def _fail():
+            raise ValueError("tile not found")
+
+        with self.assertRaises(ValueError):
+            utils.fetch_concurrently([(urls[0], partial(str.upper, urls[0])), (urls[1], _fail)])
+
+    @override_settings(THUMBNAIL_CONCURRENCY={"max_workers": 1})
+    def test_fetch_sequentially(self):
+        calls = []
+        utils.fetch_concurrently([("http://tiles.test/0.png", partial(calls.append, 0)), ("http://tiles.test/1.png", partial(calls.append, 1))])
+        self.assertEqual([0, 1], calls)
+
+    def test_tiles_cache(self):
+        template = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+        with tempfile.TemporaryDirectory() as location:
+            cache = TilesCache(location, max_size=25, ttl=60, evict_every=1000)
+            self.assertIsNone(cache.get(template, 1, 0, 0))
+            cache.set(template, 1, 0, 0, b"0" * 10)
+            self.assertEqual(b"0" * 10, cache.get(template, 1, 0, 0))
+            # different providers do not share the tiles
+            self.assertIsNone(cache.get("https://maps.wikimedia.org/osm-intl/{z}/{x}/{y}.png", 1, 0, 0))
+            self.assertEqual({"hits": 1, "misses": 2, "writes": 1, "evictions": 0}, cache.stats)
+
+            # least recently used tiles are evicted beyond max_size
+            cache.set(template, 1, 0, 1, b"1" * 10)
+            cache.set(template, 1, 1, 0, b"2" * 10)
+            past = time.time() - 30
+            os.utime(cache._path(template, 1, 0, 1), (past, os.stat(cache._path(template, 1, 0, 1)).st_mtime))
+            cache.evict()
+            self.assertIsNone(cache.get(template, 1, 0, 1))
+            self.assertIsNotNone(cache.get(template, 1, 1, 0))
+
+            # expired tiles are not returned
+            cache.ttl = 0
+            time.sleep(0.01)
+            self.assertIsNone(cache.get(template, 1, 1, 0))
+
 
 class ThumbnailsUnitTest(GeoNodeBaseTestSupport):
 
@@ -238,6 +287,42 @@ class ThumbnailsUnitTest(GeoNodeBaseTestSupport):
         self.assertEqual(bbox[-1].upper(), "EPSG:3857", "Expected calculated BBOX CRS to be EPSG:3857")
         self.assertEqual(locations, expected_locations, "Expected calculated locations to match pre-computed.")
 
+    def test_datasets_locations_composition_map_lookup(self):
+        map = Map.objects.get(title_en="composition_map")
+        expected_locations, expected_bbox = thumbnails._datasets_locations(map, compute_bbox=True)
+
+        maps = list(Map.objects.filter(id=map.id).prefetch_related('maplayers'))
+        datasets_lookup = thumbnails.DatasetsLookup(maps)
+        locations, bbox = thumbnails._datasets_locations(maps[0], compute_bbox=True, datasets_lookup=datasets_lookup)
+
+        self.assertEqual(locations, expected_locations, "Expected prefetched locations to match the queried ones.")
+        self.assertEqual(bbox, expected_bbox, "Expected prefetched BBOX to match the queried one.")
+
+    def test_create_thumbnails_dedupes_requests(self):
+        resource_ids = list(Dataset.objects.values_list('id', flat=True)) + list(Map.objects.values_list('id', flat=True))
+        request = {
+            "name": "thumb.png",
+            "bbox": [0, 1, 0, 1, "EPSG:3857"],
+            "layers": [[settings.OGC_SERVER["default"]["LOCATION"], ["geonode:theaters_nyc"], []]],
+            "is_map_with_datasets": False,
+        }
+
+        with patch("geonode.thumbs.thumbnails._thumbnail_request", return_value=request), \
+                patch("geonode.thumbs.thumbnails._render_thumbnail", return_value=b"image") as render_mock, \
+                patch("geonode.base.models.ResourceBase.save_thumbnail") as save_mock:
+            stats = thumbnails.create_thumbnails(resource_ids)
+
+        self.assertEqual(render_mock.call_count, 1)
+        self.assertEqual(save_mock.call_count, len(resource_ids))
+        self.assertEqual(stats["processed"], len(resource_ids))
+        self.assertEqual(stats["generated"], len(resource_ids))
+        self.assertEqual(stats["reused"], len(resource_ids) - 1)
+        self.assertEqual(stats["failed"], 0)
+
+        summary = thumbnails.merge_thumbnails_stats([stats, stats])
+        self.assertEqual(summary["batches"], 2)
+        self.assertEqual(summary["processed"], 2 * len(resource_ids))
+
     def test_create_map_thumbnail_using_ll_bbox_polygon(self):
         map = Map.objects.get(title_en="theaters_nyc_map")
 
@@ -245,10 +330,10 @@ class ThumbnailsUnitTest(GeoNodeBaseTestSupport):
             _mck.return_value = [MagicMock(), MagicMock()]
             if not map.ll_bbox_polygon:
                 thumbnails.create_thumbnail(map, overwrite=True)
-                _mck.assert_called_with(map, compute_bbox=True, target_crs="EPSG:3857")
+                _mck.assert_called_with(map, compute_bbox=True, target_crs="EPSG:3857", datasets_lookup=None)
 
             ll_bbox_polygon = Polygon.from_bbox((0, 22, 0, 22))
             map.ll_bbox_polygon = ll_bbox_polygon
             map.save()
             thumbnails.create_thumbnail(map, overwrite=True)
-            _mck.assert_called_with(map, compute_bbox=False, target_crs="EPSG:3857")
+            _mck.assert_called_with(map, compute_bbox=False, target_crs="EPSG:3857", datasets_lookup=None)
@@ -16,13 +16,16 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #########################################################################
+import time
 import logging
 
 from io import BytesIO
+from functools import partial
 from PIL import Image, UnidentifiedImageError
-from typing import List, Union, Optional, Tuple
+from typing import Iterable, List, Union, Optional, Tuple
 
 from django.conf import settings
+from django.db.models import Q
 from django.templatetags.static import static
 from django.utils.module_loading import import_string
 
@@ -83,15 +86,154 @@ def create_thumbnail(
 
     instance.refresh_from_db()
 
+    timings = {}
+    request = _thumbnail_request(
+        instance, bbox=bbox, forced_crs=forced_crs, styles=styles, overwrite=overwrite, timings=timings)
+    if request is None:
+        return
+
+    content = _render_thumbnail(
+        request, wms_version=wms_version, background_zoom=background_zoom, title=instance.title, timings=timings)
+    if content is None:
+        utils.assign_missing_thumbnail(instance)
+        raise ThumbnailError("Thumbnail generation failed - no image retrieved from WMS services.")
+
+    # save thumbnail
+    _stage_start = time.perf_counter()
+    instance.save_thumbnail(request["name"], image=content)
+    timings['save'] = time.perf_counter() - _stage_start
+
+    logger.debug(
+        f"Thumbnail generated for {instance}: " + ", ".join(f"{stage} {elapsed:.3f}s" for stage, elapsed in timings.items()))
+    return instance.thumbnail_url
+
+
+def create_thumbnails(
+    resource_ids: Iterable[int],
+    wms_version: Optional[str] = None,
+    overwrite: bool = True,
+    background_zoom: Optional[int] = None,
+) -> dict:
+    """
+    Function generating and saving the thumbnails of a batch of Datasets and Maps. Compared to calling
+    `create_thumbnail` for each instance, the batch is loaded with a fixed number of queries (Maps' layers
+    and their datasets included), and identical requests (same layers, styles and bbox) are rendered only once.
+
+    :param resource_ids: ids of the resources of the batch; ids of resources which are neither Datasets
+                         nor Maps are ignored
+    :param wms_version: WMS version of the queries, by default the one of the default OGC server
+    :param overwrite: overwrite existing thumbnails
+    :param background_zoom: zoom of the XYZ Slippy Map used to retrieve background image
+    :return: a dict with the batch statistics: "processed", "generated", "reused", "skipped" and "failed"
+             counters, "errors" (resource id -> error message) and "elapsed" seconds
+    """
+    _start = time.perf_counter()
+    if wms_version is None:
+        ogc_server_settings = OGC_Servers_Handler(settings.OGC_SERVER)["default"]
+        wms_version = getattr(ogc_server_settings, "WMS_VERSION") or "1.1.1"
+
+    resource_ids = list(resource_ids)
+    instances = list(Dataset.objects.filter(id__in=resource_ids).select_related('default_style'))
+    maps = list(Map.objects.filter(id__in=resource_ids).prefetch_related('maplayers'))
+    datasets_lookup = DatasetsLookup(maps)
+    instances.extend(maps)
+    instances.sort(key=lambda instance: instance.id)
+
+    stats = {
+        "processed": 0,
+        "generated": 0,
+        "reused": 0,
+        "skipped": 0,
+        "failed": 0,
+        "errors": {},
+    }
+    renders = {}
+    for instance in instances:
+        stats["processed"] += 1
+        try:
+            request = _thumbnail_request(instance, overwrite=overwrite, datasets_lookup=datasets_lookup)
+            if request is None:
+                stats["skipped"] += 1
+                continue
+
+            key = _thumbnail_request_key(request, wms_version, background_zoom)
+            if key in renders:
+                stats["reused"] += 1
+            else:
+                renders[key] = _render_thumbnail(
+                    request, wms_version=wms_version, background_zoom=background_zoom, title=instance.title)
+            content = renders[key]
+            if content is None:
+                utils.assign_missing_thumbnail(instance)
+                raise ThumbnailError("Thumbnail generation failed - no image retrieved from WMS services.")
+
+            instance.save_thumbnail(request["name"], image=content)
+            stats["generated"] += 1
+        except Exception as e:
+            logger.exception(e)
+            stats["failed"] += 1
+            stats["errors"][str(instance.id)] = str(e)
+
+    stats["elapsed"] = time.perf_counter() - _start
+    logger.debug(
+        f"Thumbnails batch of {stats['processed']} resources processed in {stats['elapsed']:.3f}s: "
+        f"{stats['generated']} generated ({stats['reused']} reused), {stats['skipped']} skipped, "
+        f"{stats['failed']} failed")
+    return stats
+
+
+def merge_thumbnails_stats(results: Iterable[dict]) -> dict:
+    """
+    Function summing up the statistics of several `create_thumbnails` batches.
+    The "elapsed" value of the summary is the sum of the batches' processing time.
+    """
+    summary = {
+        "batches": 0,
+        "processed": 0,
+        "generated": 0,
+        "reused": 0,
+        "skipped": 0,
+        "failed": 0,
+        "errors": {},
+        "elapsed": 0.0,
+    }
+    for result in results:
+        if not result:
+            continue
+        summary["batches"] += 1
+        for counter in ("processed", "generated", "reused", "skipped", "failed", "elapsed"):
+            summary[counter] += result.get(counter, 0)
+        summary["errors"].update(result.get("errors", {}))
+    return summary
+
+
+def _thumbnail_request(
+    instance: Union[Dataset, Map],
+    bbox: Optional[Union[List, Tuple]] = None,
+    forced_crs: Optional[str] = None,
+    styles: Optional[List] = None,
+    overwrite: bool = False,
+    datasets_lookup: Optional["DatasetsLookup"] = None,
+    timings: Optional[dict] = None,
+) -> Optional[dict]:
+    """
+    Function computing everything needed to render the thumbnail of the given instance, without fetching
+    any image yet. See `create_thumbnail` for the meaning of the parameters.
+
+    :param datasets_lookup: optional `DatasetsLookup` used to resolve Map's datasets without querying the DB for
+                            each one of the Map's layers (the instance's maplayers are expected to be prefetched)
+    :param timings: optional dict collecting the elapsed time of the stage
+    :return: a dict with the thumbnail's file name, bbox, WMS layers to fetch (list of (OGC server, datasets,
+             styles)), and whether the instance is a Map with local datasets, or None if there is nothing to render
+    """
+    _stage_start = time.perf_counter()
+
     default_thumbnail_name = _generate_thumbnail_name(instance)
-    mime_type = "image/png"
-    width = settings.THUMBNAIL_SIZE["width"]
-    height = settings.THUMBNAIL_SIZE["height"]
 
     if default_thumbnail_name is None:
         # instance is Map and has no datasets defined
         utils.assign_missing_thumbnail(instance)
-        return
+        return None
 
     # handle custom, uploaded thumbnails, which may have different extensions from the default thumbnail
     thumbnail_exists = False
@@ -100,7 +242,7 @@ def create_thumbnail(
 
     if (thumbnail_exists or utils.thumb_exists(default_thumbnail_name)) and not overwrite:
         logger.debug(f"Thumbnail for {instance.name} already exists. Skipping thumbnail generation.")
-        return
+        return None
 
     # --- determine target CRS and bbox ---
     target_crs = forced_crs.upper() if forced_crs is not None else "EPSG:3857"
@@ -109,7 +251,11 @@ def create_thumbnail(
     is_map_with_datasets = False
 
     if isinstance(instance, Map):
-        is_map_with_datasets = MapLayer.objects.filter(map=instance, local=True).exclude(dataset=None).count() > 0
+        if datasets_lookup is not None:
+            is_map_with_datasets = any(
+                map_dataset.local and map_dataset.dataset_id for map_dataset in instance.maplayers.all())
+        else:
+            is_map_with_datasets = MapLayer.objects.filter(map=instance, local=True).exclude(dataset=None).count() > 0
     if bbox:
         bbox = utils.clean_bbox(bbox, target_crs)
     elif instance.ll_bbox_polygon:
@@ -118,7 +264,8 @@ def create_thumbnail(
         compute_bbox_from_datasets = True
 
     # --- define dataset locations ---
-    locations, datasets_bbox = _datasets_locations(instance, compute_bbox=compute_bbox_from_datasets, target_crs=target_crs)
+    locations, datasets_bbox = _datasets_locations(
+        instance, compute_bbox=compute_bbox_from_datasets, target_crs=target_crs, datasets_lookup=datasets_lookup)
 
     if compute_bbox_from_datasets and is_map_with_datasets:
         if not datasets_bbox:
@@ -134,32 +281,88 @@ def create_thumbnail(
         if instance.default_style:
             styles = [instance.default_style.name]
 
-    # --- fetch WMS datasets ---
-    partial_thumbs = []
-
+    layers = []
     for ogc_server, datasets, _styles in locations:
         if isinstance(instance, Map) and len(datasets) == len(_styles):
             styles = _styles
+        layers.append((ogc_server, datasets, styles))
+
+    if timings is not None:
+        timings['locations'] = time.perf_counter() - _stage_start
+
+    return {
+        "name": default_thumbnail_name,
+        "bbox": bbox,
+        "layers": layers,
+        "is_map_with_datasets": is_map_with_datasets,
+    }
+
+
+def _thumbnail_request_key(request: dict, wms_version: str, background_zoom: Optional[int] = None) -> tuple:
+    """
+    Function returning a hashable key of a thumbnail request: requests sharing the same key render
+    exactly the same image.
+    """
+    return (
+        wms_version,
+        background_zoom,
+        tuple(request["bbox"]) if request["bbox"] else None,
+        tuple(
+            (ogc_server, tuple(datasets), tuple(styles) if styles else None)
+            for ogc_server, datasets, styles in request["layers"]
+        ),
+        request["is_map_with_datasets"],
+    )
+
+
+def _render_thumbnail(
+    request: dict,
+    wms_version: str = settings.OGC_SERVER["default"].get("WMS_VERSION", "1.1.1"),
+    background_zoom: Optional[int] = None,
+    title: Optional[str] = None,
+    timings: Optional[dict] = None,
+) -> Optional[bytes]:
+    """
+    Function fetching the WMS images and the background of a thumbnail request (as returned by
+    `_thumbnail_request`), and merging them into a PNG image.
+
+    :return: content of the PNG image, or None if no image could be retrieved for a Map with datasets
+    """
+    mime_type = "image/png"
+    width = settings.THUMBNAIL_SIZE["width"]
+    height = settings.THUMBNAIL_SIZE["height"]
+    bbox = request["bbox"]
+    timings = timings if timings is not None else {}
+
+    # --- fetch WMS datasets ---
+    _stage_start = time.perf_counter()
+
+    def _get_partial_thumb(ogc_server, datasets, styles):
         try:
-            partial_thumbs.append(
-                utils.get_map(
-                    ogc_server,
-                    datasets,
-                    wms_version=wms_version,
-                    bbox=bbox,
-                    mime_type=mime_type,
-                    styles=styles,
-                    width=width,
-                    height=height,
-                )
-            )
+            return [utils.get_map(
+                ogc_server,
+                datasets,
+                wms_version=wms_version,
+                bbox=bbox,
+                mime_type=mime_type,
+                styles=styles,
+                width=width,
+                height=height,
+            )]
         except Exception as e:
-            logger.error(f"Exception occurred while fetching partial thumbnail for {instance.title}.")
+            logger.error(f"Exception occurred while fetching partial thumbnail for {title}.")
             logger.exception(e)
+            return []
 
-    if not partial_thumbs and is_map_with_datasets:
-        utils.assign_missing_thumbnail(instance)
-        raise ThumbnailError("Thumbnail generation failed - no image retrieved from WMS services.")
+    tasks = [
+        (ogc_server, partial(_get_partial_thumb, ogc_server, datasets, styles))
+        for ogc_server, datasets, styles in request["layers"]
+    ]
+    partial_thumbs = [image for images in utils.fetch_concurrently(tasks) for image in images]
+    timings['datasets'] = time.perf_counter() - _stage_start
+
+    if not partial_thumbs and request["is_map_with_datasets"]:
+        return None
 
     # --- merge retrieved WMS images ---
     merged_partial_thumbs = Image.new("RGBA", (width, height), (255, 255, 255, 0))
@@ -177,6 +380,7 @@ def create_thumbnail(
                 logger.exception(e)
 
     # --- fetch background image ---
+    _stage_start = time.perf_counter()
     try:
         BackgroundGenerator = import_string(settings.THUMBNAIL_BACKGROUND["class"])
         background = BackgroundGenerator(width, height).fetch(bbox, background_zoom) if bbox else None
@@ -184,6 +388,7 @@ def create_thumbnail(
         logger.error(f"Thumbnail generation. Error occurred while fetching background image: {e}")
         logger.exception(e)
         background = None
+    timings['background'] = time.perf_counter() - _stage_start
 
     # --- overlay image with background ---
     thumbnail = Image.new("RGB", (width, height), (250, 250, 250))
@@ -196,11 +401,7 @@ def create_thumbnail(
     # convert image to the format required by save_thumbnail
     with BytesIO() as output:
         thumbnail.save(output, format="PNG")
-        content = output.getvalue()
-
-    # save thumbnail
-    instance.save_thumbnail(default_thumbnail_name, image=content)
-    return instance.thumbnail_url
+        return output.getvalue()
 
 
 def _generate_thumbnail_name(instance: Union[Dataset, Map, Document, GeoApp]) -> Optional[str]:
@@ -237,8 +438,48 @@ def _generate_thumbnail_name(instance: Union[Dataset, Map, Document, GeoApp]) ->
     return file_name
 
 
+class DatasetsLookup:
+    """
+    Resolves the Datasets referenced by the layers of a batch of Maps with a single query, applying the
+    same precedence as `_datasets_locations` does (store and workspace, workspace, alternate).
+    The Maps' `maplayers` are expected to be prefetched.
+    """
+
+    def __init__(self, maps: Iterable[Map]):
+        names = set()
+        alternates = set()
+        for _map in maps:
+            for map_dataset in _map.maplayers.all():
+                names.add(get_dataset_name(map_dataset))
+                alternates.add(map_dataset.name)
+
+        self._by_name = {}
+        self._by_alternate = {}
+        if names or alternates:
+            _datasets = Dataset.objects.filter(
+                Q(name__in=names) | Q(alternate__in=alternates)).select_related('remote_service').order_by('pk')
+            for dataset in _datasets:
+                self._by_name.setdefault(dataset.name, []).append(dataset)
+                self._by_alternate.setdefault(dataset.alternate, dataset)
+
+    def get(self, store: Optional[str], workspace: Optional[str], name: str, alternate: str) -> Optional[Dataset]:
+        candidates = self._by_name.get(name, [])
+        if store:
+            for dataset in candidates:
+                if dataset.store == store and dataset.workspace == workspace:
+                    return dataset
+        if workspace:
+            for dataset in candidates:
+                if dataset.workspace == workspace:
+                    return dataset
+        return self._by_alternate.get(alternate)
+
+
 def _datasets_locations(
-    instance: Union[Dataset, Map], compute_bbox: bool = False, target_crs: str = "EPSG:3857"
+    instance: Union[Dataset, Map],
+    compute_bbox: bool = False,
+    target_crs: str = "EPSG:3857",
+    datasets_lookup: Optional[DatasetsLookup] = None
 ) -> Tuple[List[List], List]:
     """
     Function returning a list mapping instance's datasets to their locations, enabling to construct a minimum
@@ -248,6 +489,7 @@ def _datasets_locations(
     :param compute_bbox: flag determining whether a BBOX containing the instance should be computed,
                          based on instance's datasets
     :param target_crs: valid only when compute_bbox is True - CRS of the returned BBOX
+    :param datasets_lookup: optional `DatasetsLookup` resolving Map's datasets from a prefetched batch
     :return: a tuple with a list, which maps datasets to their locations in a correct datasets order
              e.g.
                 [
@@ -280,7 +522,12 @@ def _datasets_locations(
             else:
                 bbox = utils.transform_bbox(instance.bbox, target_crs)
     elif isinstance(instance, Map):
-        for map_dataset in instance.maplayers.iterator():
+        if datasets_lookup is not None:
+            map_datasets = instance.maplayers.all()
+        else:
+            map_datasets = instance.maplayers.iterator()
+
+        for map_dataset in map_datasets:
 
             if not map_dataset.local and not map_dataset.ows_url:
                 logger.warning(
@@ -294,7 +541,12 @@ def _datasets_locations(
             workspace = get_dataset_workspace(map_dataset)
             map_dataset_style = map_dataset.current_style
 
-            if store and Dataset.objects.filter(store=store, workspace=workspace, name=name).count() > 0:
+            if datasets_lookup is not None:
+                dataset = datasets_lookup.get(store, workspace, name, map_dataset.name)
+                if dataset is None:
+                    logger.warning(f"Dataset for MapLayer {name} was not found. Skipping it in the thumbnail.")
+                    continue
+            elif store and Dataset.objects.filter(store=store, workspace=workspace, name=name).count() > 0:
                 dataset = Dataset.objects.filter(store=store, workspace=workspace, name=name).first()
             elif workspace and Dataset.objects.filter(workspace=workspace, name=name).count() > 0:
                 dataset = Dataset.objects.filter(workspace=workspace, name=name).first()
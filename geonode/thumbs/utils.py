@@ -21,13 +21,17 @@ import re
 import time
 import base64
 import logging
+import threading
 
 from pyproj import CRS
 from owslib.wms import WebMapService
-from typing import List, Tuple, Callable, Union
+from typing import List, Tuple, Callable, Union, Iterable, Iterator
 from uuid import uuid4
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
 
 from django.conf import settings
+from django.db import connection
 from django.contrib.auth import get_user_model
 
 from geonode.utils import (
@@ -42,6 +46,71 @@ logger = logging.getLogger(__name__)
 MISSING_THUMB = settings.MISSING_THUMBNAIL
 BASE64_PATTERN = 'data:image/(jpeg|png|jpg);base64'
 
+_hosts_semaphores = {}
+_hosts_semaphores_lock = threading.Lock()
+
+
+def _get_host_semaphore(url: str, max_per_host: int) -> threading.BoundedSemaphore:
+    host = urlsplit(url or '').netloc
+    with _hosts_semaphores_lock:
+        if host not in _hosts_semaphores:
+            _hosts_semaphores[host] = threading.BoundedSemaphore(max_per_host)
+        return _hosts_semaphores[host]
+
+
+def fetch_concurrently(tasks: Iterable[Tuple[str, Callable]]) -> List:
+    """
+    Runs the given '(url, fetch)' tasks through a thread pool, limiting the number of simultaneous requests
+    to the same host, and returns the results of the 'fetch' callables in the same order of the tasks.
+    The first exception raised by a 'fetch' callable is re-raised, after cancelling the pending tasks.
+
+    The pool size and the per host limit are set by settings.THUMBNAIL_CONCURRENCY; with a single worker
+    the tasks are run sequentially.
+
+    :param tasks: list of tuples in the form (URL to be requested, callable without arguments performing the request)
+    :return: list of the callables results
+    """
+    tasks = list(tasks)
+    options = getattr(settings, 'THUMBNAIL_CONCURRENCY', {})
+    max_workers = min(options.get('max_workers', 1), len(tasks))
+    max_per_host = options.get('max_per_host', max_workers)
+
+    if max_workers <= 1:
+        return [fetch() for _, fetch in tasks]
+
+    def _fetch(url, fetch):
+        try:
+            with _get_host_semaphore(url, max_per_host):
+                return fetch()
+        finally:
+            # each worker thread may have opened its own DB connection
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbs') as executor:
+        futures = [executor.submit(_fetch, url, fetch) for url, fetch in tasks]
+        try:
+            return [future.result() for future in futures]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def chunked_ids(queryset, chunk_size: int = 100) -> Iterator[List[int]]:
+    """
+    Generator streaming the primary keys of a queryset in chunks of (at most) chunk_size ids,
+    using keyset pagination so that neither the whole queryset nor an OFFSET scan is needed.
+    """
+    last_id = None
+    queryset = queryset.order_by('pk')
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(pk__gt=last_id)
+        ids = list(chunk.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
 
 def make_bbox_to_pixels_transf(src_bbox: Union[List, Tuple], dest_bbox: Union[List, Tuple]) -> Callable:
     """
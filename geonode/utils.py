@@ -41,9 +41,10 @@ from PIL import Image
 from urllib3 import Retry
 from io import BytesIO, StringIO
 from decimal import Decimal
-from threading import local
+from threading import local, Lock
 from slugify import slugify
 from contextlib import closing
+from http.cookiejar import DefaultCookiePolicy
 from collections import namedtuple, defaultdict
 from rest_framework.exceptions import APIException
 from math import atan, exp, log, pi, sin, tan, floor
@@ -655,17 +656,42 @@ def resolve_object(request, model, query, permission='base.view_resourcebase',
     obj = get_object_or_404(model, **query)
     obj_to_check = obj.get_self_resource()
 
+    allowed = True
+    if permission.split('.')[-1] in ['change_dataset_data',
+                                     'change_dataset_style']:
+        if obj.__class__.__name__ == 'Dataset':
+            obj_to_check = obj
+    if permission:
+        if permission_required or request.method != 'GET':
+            from geonode.security.cache import get_permissions_cache
+
+            permissions_cache = get_permissions_cache()
+            allowed = permissions_cache.get(user, obj_to_check.pk, permission) if permissions_cache else None
+            if allowed is None:
+                allowed = _check_object_permission(user, obj_to_check, permission)
+                if permissions_cache:
+                    permissions_cache.set(user, obj_to_check.pk, permission, allowed)
+    if not allowed:
+        mesg = permission_msg or _('Permission Denied')
+        raise PermissionDenied(mesg)
+    return obj
+
+
+def _check_object_permission(user, obj, permission):
+    """Checks whether the user is a manager of one of the groups the object
+    belongs to, or has the given permission on it.
+    """
     from guardian.shortcuts import get_groups_with_perms
     from geonode.groups.models import GroupProfile
 
-    groups = get_groups_with_perms(obj_to_check,
+    resource = obj.get_self_resource()
+    groups = get_groups_with_perms(resource,
                                    attach_perms=True)
 
-    if obj_to_check.group and obj_to_check.group not in groups:
-        groups[obj_to_check.group] = obj_to_check.group
+    if resource.group and resource.group not in groups:
+        groups[resource.group] = resource.group
 
     obj_group_managers = []
-    obj_group_members = []
     if groups:
         for group in groups:
             try:
@@ -675,29 +701,14 @@ def resolve_object(request, model, query, permission='base.view_resourcebase',
                     for manager in managers:
                         if manager not in obj_group_managers and not manager.is_superuser:
                             obj_group_managers.append(manager)
-                if group_profile.user_is_member(
-                        user) and user not in obj_group_members:
-                    obj_group_members.append(user)
             except GroupProfile.DoesNotExist:
                 pass
 
-    allowed = True
-    if permission.split('.')[-1] in ['change_dataset_data',
-                                     'change_dataset_style']:
-        if obj.__class__.__name__ == 'Dataset':
-            obj_to_check = obj
-    if permission:
-        if permission_required or request.method != 'GET':
-            if user in obj_group_managers:
-                allowed = True
-            else:
-                allowed = user.has_perm(
-                    permission,
-                    obj_to_check)
-    if not allowed:
-        mesg = permission_msg or _('Permission Denied')
-        raise PermissionDenied(mesg)
-    return obj
+    if user in obj_group_managers:
+        return True
+    return user.has_perm(
+        permission,
+        obj)
 
 
 def json_response(body=None, errors=None, url=None, redirect_to=None, exception=None,
@@ -1133,6 +1144,135 @@ def check_ogc_backend(backend_package):
     return False
 
 
+class _BlockAllCookiesPolicy(DefaultCookiePolicy):
+    """Pooled sessions are shared among users, hence they must never store cookies."""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+class HttpSessionsPool:
+    """
+    Process-wide pool of `requests.Session`, one per remote host and retry policy.
+
+    The sessions keep their connections alive among the requests; the pool is reset
+    in forked processes (e.g. the Celery prefork workers), since the sockets cannot be shared
+    with the parent process.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._sessions = {}
+        self._stats = defaultdict(lambda: {'sessions': 0, 'requests': 0})
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            # forked process: drop the parent's sessions without closing their sockets
+            self._lock = Lock()
+            self._reset()
+
+    def get_session(self, url, retries, backoff_factor, status_forcelist, pool_connections, pool_maxsize):
+        _url = urlsplit(url)
+        host = f"{_url.scheme}://{_url.netloc}"
+        key = (host, retries, backoff_factor, tuple(status_forcelist), pool_connections, pool_maxsize)
+        self._check_pid()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.cookies.set_policy(_BlockAllCookiesPolicy())
+                retry = Retry(
+                    total=retries,
+                    read=retries,
+                    connect=retries,
+                    backoff_factor=backoff_factor,
+                    status_forcelist=status_forcelist,
+                )
+                adapter = requests.adapters.HTTPAdapter(
+                    max_retries=retry,
+                    pool_maxsize=pool_maxsize,
+                    pool_connections=pool_connections
+                )
+                session.mount(f"{_url.scheme}://", adapter)
+                session.verify = False
+                self._sessions[key] = session
+                self._stats[host]['sessions'] += 1
+            self._stats[host]['requests'] += 1
+        return session
+
+    def clear(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._reset()
+
+    def stats(self):
+        """Returns the number of sessions, requests and open connection pools per remote host."""
+        self._check_pid()
+        with self._lock:
+            hosts = {_host: dict(_stats, connection_pools=0) for _host, _stats in self._stats.items()}
+            for (_host, *_rest), session in self._sessions.items():
+                for adapter in session.adapters.values():
+                    hosts[_host]['connection_pools'] += len(getattr(adapter.poolmanager, 'pools', ()))
+        return {
+            'pid': self._pid,
+            'sessions': len(self._sessions),
+            'requests': sum(_stats['requests'] for _stats in hosts.values()),
+            'hosts': hosts
+        }
+
+
+class AccessTokensCache:
+    """
+    Short-lived cache of the users' OAuth2 access tokens, saving the user lookup and the
+    token round-trip to the DB on every authenticated outbound request.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._tokens = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username):
+        now = time.time()
+        with self._lock:
+            entry = self._tokens.get(username)
+            if entry and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self._tokens.pop(username, None)
+            self.misses += 1
+        return None
+
+    def set(self, username, access_token, timeout):
+        expires = time.time() + timeout
+        if access_token.expires:
+            expires = min(expires, access_token.expires.timestamp())
+        with self._lock:
+            self._tokens[username] = (access_token.token, expires)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._tokens),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+http_sessions_pool = HttpSessionsPool()
+access_tokens_cache = AccessTokensCache()
+
+
 class HttpClient:
 
     def __init__(self):
@@ -1142,6 +1282,7 @@ class HttpClient:
         self.backoff_factor = 0.3
         self.pool_connections = 10
         self.status_forcelist = (500, 502, 503, 504)
+        self.token_cache_timeout = 60
         self.username = 'admin'
         self.password = 'admin'
         if check_ogc_backend(geoserver.BACKEND_PACKAGE):
@@ -1151,21 +1292,32 @@ class HttpClient:
             self.backoff_factor = ogc_server_settings.get('BACKOFF_FACTOR', 0.3)
             self.pool_maxsize = ogc_server_settings.get('POOL_MAXSIZE', 10)
             self.pool_connections = ogc_server_settings.get('POOL_CONNECTIONS', 10)
+            self.token_cache_timeout = ogc_server_settings.get('TOKEN_CACHE_TIMEOUT', 60)
             self.username = ogc_server_settings.get('USER', 'admin')
             self.password = ogc_server_settings.get('PASSWORD', 'geoserver')
 
+    def _get_access_token(self, user):
+        username = user if isinstance(user, str) else getattr(user, 'username', None) or self.username
+        token = access_tokens_cache.get(username) if self.token_cache_timeout else None
+        if not token:
+            if not user or isinstance(user, str):
+                user = get_user_model().objects.get(username=username)
+            access_token = get_or_create_token(user)
+            if access_token and not access_token.is_expired():
+                token = access_token.token
+                if self.token_cache_timeout:
+                    access_tokens_cache.set(username, access_token, self.token_cache_timeout)
+        return token
+
     def request(self, url, method='GET', data=None, headers={}, stream=False,
                 timeout=None, retries=None, user=None, verify=False):
         if (user or self.username != 'admin') and \
                 check_ogc_backend(geoserver.BACKEND_PACKAGE) and 'Authorization' not in headers:
             if connection.cursor().db.vendor not in ('sqlite', 'sqlite3', 'spatialite'):
                 try:
-                    if user and isinstance(user, str):
-                        user = get_user_model().objects.get(username=user)
-                    _u = user or get_user_model().objects.get(username=self.username)
-                    access_token = get_or_create_token(_u)
-                    if access_token and not access_token.is_expired():
-                        headers['Authorization'] = f'Bearer {access_token.token}'
+                    access_token = self._get_access_token(user)
+                    if access_token:
+                        headers['Authorization'] = f'Bearer {access_token}'
                 except Exception:
                     tb = traceback.format_exc()
                     logger.debug(tb)
@@ -1177,22 +1329,14 @@ class HttpClient:
         headers['User-Agent'] = 'GeoNode'
         response = None
         content = None
-        session = requests.Session()
-        retry = Retry(
-            total=retries or self.retries,
-            read=retries or self.retries,
-            connect=retries or self.retries,
+        session = http_sessions_pool.get_session(
+            url,
+            retries=retries or self.retries,
             backoff_factor=self.backoff_factor,
             status_forcelist=self.status_forcelist,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize
         )
-        adapter = requests.adapters.HTTPAdapter(
-            max_retries=retry,
-            pool_maxsize=self.pool_maxsize,
-            pool_connections=self.pool_connections
-        )
-        scheme = urlsplit(url).scheme
-        session.mount(f"{scheme}://", adapter)
-        session.verify = False
         action = getattr(session, method.lower(), None)
         if action:
             _req_tout = timeout or self.timeout
@@ -1219,6 +1363,13 @@ class HttpClient:
 
         return (response, content)
 
+    def pool_stats(self):
+        """Statistics of the shared HTTP sessions pool and of the access tokens cache."""
+        return {
+            'sessions_pool': http_sessions_pool.stats(),
+            'access_tokens_cache': access_tokens_cache.stats()
+        }
+
     def get(self, url, data=None, headers={}, stream=False, timeout=None, user=None, verify=False):
         return self.request(url,
                             method='GET',